@@ -0,0 +1,181 @@
+"""Admission control for the BigQuery jobs a worker process runs.
+
+Without it every request submits its jobs at once, so a burst of dashboards
+runs into the project's concurrent-query quota and everything slows down
+together. AdmissionController hands out job slots instead:
+
+- at most `max_concurrent` jobs run at a time, and each route class has its
+  own limit on top, so heavy charts can never take every slot;
+- waiting jobs are admitted by class priority (interactive list and detail
+  views first, heavy charts last), first come first served within a class;
+- at most `max_queue` jobs wait. When the queue is full, a new job either
+  sheds the newest waiter of a lower-priority class or is rejected itself;
+  a job that waits longer than `max_wait` seconds is rejected too.
+  Rejections raise AdmissionRejected, which app.py answers with 503.
+
+Queue depth, running jobs and wait times are kept per class for /metrics
+and /api/_stats. Everything is per worker process, like the telemetry.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """No job slot: the queue was full, a more urgent job took the place, or the wait timed out."""
+
+
+class _Ticket:
+    def __init__(self, priority, sequence, route_class):
+        self.priority = priority
+        self.sequence = sequence
+        self.route_class = route_class
+        self.event = threading.Event()
+        self.granted = False
+        self.shed = False
+
+    def order(self):
+        return self.priority, self.sequence
+
+
+class AdmissionController:
+    def __init__(self, classes, max_concurrent=16, max_queue=64, max_wait=10.0):
+        """
+        `classes` maps a route class to (priority, limit); lower priorities
+        are admitted first. max_concurrent <= 0 turns admission control off.
+        """
+        self.classes = dict(classes)
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._sequence = itertools.count()
+        self._waiting = []
+        self._running = {name: 0 for name in self.classes}
+        self._stats = {
+            name: {"admitted": 0, "shed": 0, "timed_out": 0, "wait_seconds_sum": 0.0, "max_wait_seconds": 0.0}
+            for name in self.classes
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_concurrent > 0
+
+    def _can_run(self, route_class):
+        return (
+            sum(self._running.values()) < self.max_concurrent
+            and self._running[route_class] < self.classes[route_class][1]
+        )
+
+    def _dispatch(self):
+        """Admit waiting tickets in priority order while their class has room."""
+        for ticket in sorted(self._waiting, key=_Ticket.order):
+            if self._can_run(ticket.route_class):
+                self._waiting.remove(ticket)
+                self._running[ticket.route_class] += 1
+                ticket.granted = True
+                ticket.event.set()
+
+    def _make_room(self, ticket):
+        """With a full queue, shed the newest waiter of a lower priority; False if there is none."""
+        lower = [waiting for waiting in self._waiting if waiting.priority > ticket.priority]
+        if not lower:
+            return False
+        victim = max(lower, key=_Ticket.order)
+        self._waiting.remove(victim)
+        victim.shed = True
+        victim.event.set()
+        return True
+
+    def acquire(self, route_class):
+        """Wait for a job slot; returns the seconds waited or raises AdmissionRejected."""
+        started = time.perf_counter()
+        with self._lock:
+            ticket = _Ticket(self.classes[route_class][0], next(self._sequence), route_class)
+            stats = self._stats[route_class]
+            ahead = any(waiting.order() < ticket.order() for waiting in self._waiting)
+            if not ahead and self._can_run(route_class):
+                # Free slot and nobody more urgent waiting: no need to queue
+                self._running[route_class] += 1
+                stats["admitted"] += 1
+                return 0.0
+            if len(self._waiting) >= self.max_queue and not self._make_room(ticket):
+                stats["shed"] += 1
+                raise AdmissionRejected(f"Too many queries waiting ({self.max_queue}), try again shortly")
+            self._waiting.append(ticket)
+            self._dispatch()
+
+        ticket.event.wait(self.max_wait)
+        waited = time.perf_counter() - started
+        with self._lock:
+            if not ticket.granted and not ticket.shed:
+                # Timed out; a grant racing with the timeout wins above
+                self._waiting.remove(ticket)
+                stats["timed_out"] += 1
+                raise AdmissionRejected(f"No query slot within {self.max_wait:g}s, try again shortly")
+            if ticket.shed:
+                stats["shed"] += 1
+                raise AdmissionRejected("Shed for more urgent queries, try again shortly")
+            stats["admitted"] += 1
+            stats["wait_seconds_sum"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        return waited
+
+    def release(self, route_class):
+        with self._lock:
+            self._running[route_class] -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, route_class):
+        """Hold a job slot for the duration of the block; yields the seconds waited."""
+        if not self.enabled:
+            yield 0.0
+            return
+        waited = self.acquire(route_class)
+        try:
+            yield waited
+        finally:
+            self.release(route_class)
+
+    def snapshot(self):
+        with self._lock:
+            waiting = {name: 0 for name in self.classes}
+            for ticket in self._waiting:
+                waiting[ticket.route_class] += 1
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "running": sum(self._running.values()),
+                "queue_depth": len(self._waiting),
+                "classes": {
+                    name: {
+                        "priority": priority,
+                        "limit": limit,
+                        "running": self._running[name],
+                        "queue_depth": waiting[name],
+                        **self._stats[name]
+                    }
+                    for name, (priority, limit) in self.classes.items()
+                }
+            }
+
+    def prometheus(self):
+        """Prometheus text exposition of snapshot(), per route class."""
+        classes = self.snapshot()["classes"]
+        metrics = [
+            ("running", "ezpass_admission_running_jobs", "gauge", "BigQuery jobs holding a slot"),
+            ("queue_depth", "ezpass_admission_queue_depth", "gauge", "Jobs waiting for a slot"),
+            ("admitted", "ezpass_admission_admitted_total", "counter", "Jobs given a slot"),
+            ("shed", "ezpass_admission_shed_total", "counter", "Jobs rejected because the queue was full"),
+            ("timed_out", "ezpass_admission_timed_out_total", "counter", "Jobs rejected after waiting too long"),
+            ("wait_seconds_sum", "ezpass_admission_wait_seconds_total", "counter", "Time admitted jobs spent waiting")
+        ]
+        lines = []
+        for key, name, metric_type, help_text in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for route_class, stats in classes.items():
+                lines.append(f'{name}{{class="{route_class}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+"""Shared alert poller that fans new or changed alerts out to SSE clients.
+
+One background thread per process runs a high-watermark query every
+`interval` seconds while at least one client is subscribed, and hands the
+result (already serialized, so once for everybody) to every subscriber's queue. N open dashboards therefore cost one
+BigQuery query per interval instead of N. The thread starts with the first
+subscriber and exits after the last one leaves.
+
+A subscriber that falls `max_backlog` events behind is sent a single
+"resync" event instead, telling the client to refetch the alert lists.
+"""
+import queue
+import threading
+import time
+
+RESYNC = object()
+
+
+class AlertFeed:
+    def __init__(self, poll, initial_watermark, interval=15, max_backlog=100):
+        """
+        `initial_watermark()` returns the current high watermark; `poll(watermark)`
+        returns (event for the changes after it or None, new watermark).
+        """
+        self._poll = poll
+        self._initial_watermark = initial_watermark
+        self.interval = interval
+        self._max_backlog = max_backlog
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self._max_backlog)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-feed", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Too far behind to catch up event by event
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(RESYNC)
+
+    def _run(self):
+        watermark = None
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                if watermark is None:
+                    watermark = self._initial_watermark()
+                else:
+                    event, watermark = self._poll(watermark)
+                    if event:
+                        self.publish(event)
+            except Exception as e:
+                print(f"Error polling alert feed: {str(e)}")
+            time.sleep(self.interval)
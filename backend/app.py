@@ -1,181 +1,883 @@
-from flask import Flask, jsonify, request
+import time
+
+# Process start, for the cold-start-to-first-response measurement
+STARTED_AT = time.perf_counter()
+
+from flask import Flask, Response, g, has_request_context, jsonify, request, stream_with_context
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 from flask_cors import CORS
 from dotenv import load_dotenv
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import wraps
+import base64
+import contextvars
+import csv
+import hashlib
+import hmac
+import io
+import json
 import os
-import tempfile
+import queue
+import threading
+import uuid
+
+from admission import AdmissionController, AdmissionRejected
+from alert_feed import RESYNC, AlertFeed
+from async_jobs import wait_for_job
+from bigquery_client import LazyClient, create_bigquery_client
+from query_builder import (
+    ALERT_FIELDS, LISTING_FIELDS, count_query, export_query, listing_query, parse_date_window, parse_fields,
+    parse_filters, rollup_count_query, select_list, window_conditions
+)
+from query_budget import QueryBudget, apply_budget, check_estimate, error_status
+from query_cache import QueryCache
+from responses import FastJSONProvider, compress_response
+from single_flight import SingleFlight
+from status_writer import StatusWriteQueue
+from telemetry import Telemetry
 
 load_dotenv()
 
-# Service account JSON stored in environment variable
-key_json_str = os.getenv("BIGQUERY_KEY_JSON")
+# Which engine runs the endpoint queries: "bigquery" (default) or "duckdb",
+# a local Parquet snapshot of the same tables (see duckdb_backend.py)
+QUERY_BACKEND = os.getenv("QUERY_BACKEND", "bigquery")
+
+if QUERY_BACKEND not in ("bigquery", "duckdb"):
+    raise ValueError(f"Unsupported QUERY_BACKEND: {QUERY_BACKEND}")
+
+# Connections kept alive per worker process; at least the queries a worker runs at once
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
 
-if not key_json_str:
-    raise ValueError("BIGQUERY_KEY_JSON environment variable is not set.")
+def create_client():
+    if QUERY_BACKEND == "duckdb":
+        from duckdb_backend import DuckDBClient
 
-# Use OS temp directory (works on Windows & Linux)
-temp_dir = tempfile.gettempdir()
-key_path = os.path.join(temp_dir, "bigquery-key.json")
+        return DuckDBClient(os.getenv("DUCKDB_DATA_DIR", "data"))
 
-# Write JSON to file
-with open(key_path, "w") as f:
-    f.write(key_json_str)
+    # Service account JSON stored in environment variable
+    key_json_str = os.getenv("BIGQUERY_KEY_JSON")
 
-# Initialize BigQuery
-client = bigquery.Client.from_service_account_json(key_path)
+    if not key_json_str:
+        raise ValueError("BIGQUERY_KEY_JSON environment variable is not set.")
+
+    return create_bigquery_client(key_json_str, HTTP_POOL_SIZE)
+
+# Created on first use, once per process (see bigquery_client.py)
+client = LazyClient(create_client, on_create=lambda seconds: telemetry.mark_startup("client_init", seconds))
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get("Accept-Encoding", ""), COMPRESS_MIN_BYTES)
+
+# Request/BigQuery job telemetry, served at /metrics and /api/_stats
+telemetry = Telemetry(
+    window=int(os.getenv("TELEMETRY_WINDOW", 1024)),
+    skip_endpoints=("prometheus_metrics", "stats"),
+    started_at=STARTED_AT
+)
+telemetry.init_app(app)
+
 TABLE_NAME = os.getenv("BIGQUERY_TABLE", "master_viz")
 
-def get_table():
+# Append-only status changes (created by the Airflow DAG, folded into master_viz
+# by dbt). Set STATUS_EVENTS_TABLE to an empty string to UPDATE master_viz instead.
+STATUS_EVENTS_TABLE = os.getenv("STATUS_EVENTS_TABLE", "transaction_status_events")
+
+# Whether the status event table exists yet, rechecked every minute
+status_events_tables = QueryCache(maxsize=4, ttl=60)
+
+def status_events_table_exists(table_id):
+    exists = status_events_tables.get(table_id)
+    if exists is not None:
+        return exists
+    try:
+        client.get_table(table_id)
+        exists = True
+    except NotFound:
+        print(f"Status event table {table_id} not found; updating {TABLE_NAME} in place until it is created")
+        exists = False
+    except Exception as e:
+        # Don't turn a metadata hiccup into in-place updates
+        print(f"Error checking status event table: {str(e)}")
+        return True
+    status_events_tables.set(table_id, exists)
+    return exists
+
+def get_status_events_table_id():
+    """
+    Status event table for the current TABLE_NAME, or None if status is updated
+    in place: when disabled, or until the pipeline (master_viz's dbt pre-hook or
+    the main DAG) has created the table.
+    """
+    if STATUS_EVENTS_TABLE and TABLE_NAME == "master_viz" and QUERY_BACKEND == "bigquery":
+        table_id = f"njc-ezpass.ezpass_data.{STATUS_EVENTS_TABLE}"
+        if status_events_table_exists(table_id):
+            return table_id
+    return None
+
+def get_base_table():
     return f"`njc-ezpass.ezpass_data.{TABLE_NAME}`"
 
+def get_table():
+    """
+    The table the endpoints read. With a status event table, each row's status
+    (and last_updated) comes from its latest event, if it has one, so changes
+    made since the last dbt build are visible.
+    """
+    events_table = get_status_events_table_id()
+    if events_table is None:
+        return get_base_table()
+    return f"""(
+            SELECT t.* REPLACE (
+                COALESCE(e.status, t.status) AS status,
+                IF(e.changed_at > t.last_updated OR t.last_updated IS NULL, e.changed_at, t.last_updated) AS last_updated
+            )
+            FROM {get_base_table()} t
+            LEFT JOIN (
+                SELECT transaction_id, MAX_BY(status, changed_at) AS status, MAX(changed_at) AS changed_at
+                FROM `{events_table}`
+                GROUP BY transaction_id
+            ) e ON e.transaction_id = t.transaction_id
+        )"""
+
+# Pre-aggregated dbt model (viz-master/dashboard_rollup) built right after master_viz.
+# Set DASHBOARD_ROLLUP_TABLE to an empty string to query the fact table instead.
+ROLLUP_TABLE = os.getenv("DASHBOARD_ROLLUP_TABLE", "dashboard_rollup")
+
+def get_rollup_table():
+    """Rollup table for the current TABLE_NAME, or None if there is none."""
+    if ROLLUP_TABLE and TABLE_NAME == "master_viz":
+        return f"`njc-ezpass.ezpass_data.{ROLLUP_TABLE}`"
+    return None
+
+# N-gram lookup table (dbt viz-master/search_ngrams) used for substring search.
+# Set SEARCH_INDEX_TABLE to an empty string to fall back to LIKE scans.
+SEARCH_INDEX_TABLE = os.getenv("SEARCH_INDEX_TABLE", "search_ngrams")
+
+def get_search_index_table():
+    """Search index for the current TABLE_NAME, or None if there is none."""
+    if SEARCH_INDEX_TABLE and TABLE_NAME == "master_viz":
+        return f"`njc-ezpass.ezpass_data.{SEARCH_INDEX_TABLE}`"
+    return None
+
+# Dashboard aggregates only change when the dbt pipeline rebuilds the table,
+# so successful responses are cached per endpoint + table + query parameters.
+query_cache = QueryCache(
+    maxsize=int(os.getenv("CACHE_MAX_ENTRIES", 256)),
+    ttl=int(os.getenv("CACHE_TTL_SECONDS", 300))
+)
+
+def cached_endpoint(view):
+    """Serve a route from query_cache, storing only 200 responses."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, TABLE_NAME, tuple(sorted(request.args.items(multi=True))))
+        body = query_cache.get(key)
+        if body is not None:
+            response = app.response_class(body, mimetype="application/json")
+            response.headers["X-Cache"] = "HIT"
+            return response
+
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            query_cache.set(key, response.get_data())
+            response.headers["X-Cache"] = "MISS"
+        return response
+    return wrapper
+
+# Table last_modified lookups are metadata calls (no query job) but still a
+# round trip, so they are remembered briefly per worker
+table_versions = QueryCache(maxsize=16, ttl=int(os.getenv("TABLE_VERSION_TTL_SECONDS", 30)))
+
+def table_version():
+    """last_modified of the tables behind the endpoints, or None if unavailable."""
+    key = (TABLE_NAME, ROLLUP_TABLE)
+    version = table_versions.get(key)
+    if version is not None:
+        return version
+    if not hasattr(client, "get_table"):
+        return None
+
+    table_ids = [f"njc-ezpass.ezpass_data.{TABLE_NAME}"]
+    if get_rollup_table():
+        table_ids.append(f"njc-ezpass.ezpass_data.{ROLLUP_TABLE}")
+    try:
+        stamps = [str(client.get_table(table_id).modified) for table_id in table_ids]
+        events_table_id = get_status_events_table_id()
+        if events_table_id:
+            # Streaming inserts don't move last_modified; the row counts do
+            events = client.get_table(events_table_id)
+            buffered = getattr(events.streaming_buffer, "estimated_rows", 0) if events.streaming_buffer else 0
+            stamps.append(f"{events.num_rows}+{buffered}")
+        version = "|".join(stamps)
+    except Exception as e:
+        print(f"Error fetching table version: {str(e)}")
+        return None
+    table_versions.set(key, version)
+    return version
+
+# Column lists only change when dbt rebuilds the table
+table_schemas = QueryCache(maxsize=16, ttl=int(os.getenv("TABLE_SCHEMA_TTL_SECONDS", 3600)))
+
+def table_columns():
+    """Column names of the current table (for `fields=`), or None if unavailable."""
+    columns = table_schemas.get(TABLE_NAME)
+    if columns is not None:
+        return columns
+    try:
+        if hasattr(client, "get_table"):
+            schema = client.get_table(f"njc-ezpass.ezpass_data.{TABLE_NAME}").schema
+        else:
+            # Backends without table metadata: an empty result still has a schema
+            schema = execute_query(f"SELECT * FROM {get_base_table()} LIMIT 0").schema
+        columns = frozenset(field.name for field in schema)
+    except Exception as e:
+        print(f"Error fetching table schema: {str(e)}")
+        return None
+    if not columns:
+        return None
+    table_schemas.set(TABLE_NAME, columns)
+    return columns
+
+# Default dashboard payloads computed by /api/_prewarm after a pipeline run,
+# keyed to the table version they were built from, so they live until the
+# next rebuild (or status change) instead of the query_cache TTL
+prewarmed = QueryCache(
+    maxsize=int(os.getenv("PREWARM_MAX_ENTRIES", 64)),
+    ttl=int(os.getenv("PREWARM_TTL_SECONDS", 86400))
+)
+
+def payload_key(version):
+    """Endpoint, table version and parameters a response depends on."""
+    # The default date window moves daily, so the key does too
+    return (
+        request.endpoint, TABLE_NAME, version, default_window_start(),
+        tuple(sorted(request.args.items(multi=True)))
+    )
+
+def conditional_endpoint(view):
+    """
+    Strong ETag from the table version plus endpoint and query parameters.
+    A matching If-None-Match gets 304 Not Modified without running the view,
+    and a payload prewarmed for this version is served without a query.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = table_version()
+        if version is None:
+            return view(*args, **kwargs)
+
+        key = payload_key(version)
+        etag = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        # Compressed representations carry an "-<encoding>" suffix; the 304
+        # must repeat the exact tag the client holds so caches can match it
+        for tag in request.if_none_match.as_set():
+            if tag.split("-")[0] == etag:
+                response = app.response_class(status=304)
+                response.set_etag(tag)
+                response.vary.add("Accept-Encoding")
+                return response
+
+        body = prewarmed.get(key)
+        if body is not None:
+            response = app.response_class(body, mimetype="application/json")
+            response.headers["X-Cache"] = "HIT"
+        else:
+            response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
+    return wrapper
+
+# Default budget of every BigQuery job (see query_budget.py); 0 means no limit
+QUERY_MAX_BYTES_BILLED = int(os.getenv("QUERY_MAX_BYTES_BILLED", 20 * 1024 ** 3))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", 30))
+# Dry-run the queries of endpoints marked dry_run before running them
+QUERY_DRY_RUN = os.getenv("QUERY_DRY_RUN", "true").lower() == "true"
+# Retry-After of a 503 for a query that ran out of time or found no job slot
+QUERY_RETRY_AFTER_SECONDS = int(os.getenv("QUERY_RETRY_AFTER_SECONDS", 30))
+
+# Endpoints whose cost depends on user input: wildcard searches, full
+# exports and the scatter sample. Everything else gets the defaults
+QUERY_BUDGETS = {
+    "all_transactions": QueryBudget(dry_run=True),
+    "transactions_count": QueryBudget(dry_run=True),
+    "scatter_chart": QueryBudget(dry_run=True),
+    "export_transactions": QueryBudget(
+        max_bytes_billed=5 * QUERY_MAX_BYTES_BILLED, timeout_seconds=10 * QUERY_TIMEOUT_SECONDS, dry_run=True
+    )
+}
+
+def current_budget():
+    """(max bytes billed, timeout seconds, dry run) for the endpoint being served."""
+    budget = QUERY_BUDGETS.get(request.endpoint) if has_request_context() else None
+    budget = budget or QueryBudget()
+    return (
+        QUERY_MAX_BYTES_BILLED if budget.max_bytes_billed is None else budget.max_bytes_billed,
+        QUERY_TIMEOUT_SECONDS if budget.timeout_seconds is None else budget.timeout_seconds,
+        budget.dry_run and QUERY_DRY_RUN and QUERY_BACKEND == "bigquery"
+    )
+
+def note_query_error(error):
+    """Remember a budget or admission failure so the response becomes a 429/503 (see query_budget_status)."""
+    status = 503 if isinstance(error, AdmissionRejected) else error_status(error)
+    if status and has_request_context():
+        g.query_budget_status = status
+
+@app.after_request
+def query_budget_status(response):
+    """Views answer every query failure with 500; budget and admission failures get their own status."""
+    status = g.pop("query_budget_status", None)
+    if status and response.status_code == 500:
+        response.status_code = status
+        if status == 503:
+            response.headers["Retry-After"] = str(QUERY_RETRY_AFTER_SECONDS)
+    return response
+
+def start_query(query, job_config=None):
+    """
+    Submit a query job within the endpoint's budget and wait until it is
+    done (polled from the event loop in ASGI mode).
+    """
+    max_bytes_billed, timeout_seconds, dry_run = current_budget()
+    job_config = apply_budget(job_config or bigquery.QueryJobConfig(), max_bytes_billed, timeout_seconds)
+    try:
+        if dry_run:
+            estimate = client.query(query, job_config=bigquery.QueryJobConfig(
+                dry_run=True, query_parameters=job_config.query_parameters
+            ))
+            check_estimate(estimate.total_bytes_processed, max_bytes_billed)
+        job = client.query(query, job_config=job_config)
+        wait_for_job(job)
+    except Exception as e:
+        note_query_error(e)
+        raise
+    return job
+
+# BigQuery job slots per worker process (see admission.py): route classes
+# with their priority (lower is admitted first) and concurrent job limit
+ADMISSION_CLASSES = {
+    "interactive": (0, int(os.getenv("ADMISSION_INTERACTIVE_LIMIT", 16))),
+    "standard": (1, int(os.getenv("ADMISSION_STANDARD_LIMIT", 8))),
+    "heavy": (2, int(os.getenv("ADMISSION_HEAVY_LIMIT", 4)))
+}
+# List, detail and status views first, full scans and charts last;
+# unlisted endpoints and background work (alert feed, status writer) are standard
+ROUTE_CLASSES = {
+    "all_transactions": "interactive",
+    "transaction_detail": "interactive",
+    "transactions_count": "interactive",
+    "alerts": "interactive",
+    "recent_flagged": "interactive",
+    "update_status": "interactive",
+    "bulk_update_status": "interactive",
+    "category_chart": "heavy",
+    "severity_chart": "heavy",
+    "monthly_chart": "heavy",
+    "timeseries_chart": "heavy",
+    "scatter_chart": "heavy",
+    "export_transactions": "heavy"
+}
+# ADMISSION_MAX_CONCURRENT=0 turns admission control off
+admission = AdmissionController(
+    ADMISSION_CLASSES,
+    max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", 16)),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", 64)),
+    max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 10))
+)
+
+@contextmanager
+def job_slot():
+    """Hold one of the endpoint's job slots while a query runs; AdmissionRejected becomes a 503."""
+    if not admission.enabled:
+        yield
+        return
+    endpoint = request.endpoint if has_request_context() else None
+    route_class = ROUTE_CLASSES.get(endpoint, "standard")
+    try:
+        waited = admission.acquire(route_class)
+    except AdmissionRejected as e:
+        note_query_error(e)
+        raise
+    telemetry.record_admission_wait(waited)
+    try:
+        yield
+    finally:
+        admission.release(route_class)
+
+def job_result(job, **result_kwargs):
+    """job.result(), noting a budget failure the job ended with."""
+    try:
+        return job.result(**result_kwargs)
+    except Exception as e:
+        note_query_error(e)
+        raise
+
+def execute_query(query, job_config=None, **result_kwargs):
+    with job_slot():
+        job = start_query(query, job_config)
+        results = job_result(job, **result_kwargs)
+    telemetry.record_job(job)
+    return results
+
+# Identical reads already running in this process share one job
+# (see single_flight.py); QUERY_COALESCING=false runs every one
+QUERY_COALESCING = os.getenv("QUERY_COALESCING", "true").lower() == "true"
+in_flight_queries = SingleFlight()
+
+def coalescing_key(query, job_config):
+    """Query text without indentation or blank lines, plus the full job configuration."""
+    sql = "\n".join(line.strip() for line in query.splitlines() if line.strip())
+    config = json.dumps(job_config.to_api_repr(), sort_keys=True, default=str) if job_config is not None else None
+    return sql, config
+
+def run_query(query, job_config=None, coalesce=True, **result_kwargs):
+    """
+    Rows of a query; every endpoint query goes through here.
+    Plain reads are coalesced with an identical one in flight unless
+    coalesce=False (reads that must see this request's own writes).
+    """
+    statement = query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+    if not (QUERY_COALESCING and coalesce and not result_kwargs and statement in ("SELECT", "WITH")):
+        return execute_query(query, job_config, **result_kwargs)
+
+    rows, shared = in_flight_queries.do(
+        coalescing_key(query, job_config),
+        lambda: list(execute_query(query, job_config))
+    )
+    if shared:
+        telemetry.record_coalesced()
+    # Every caller gets its own iterator over the shared rows
+    return iter(rows)
+
+# List and alert views cover the last DEFAULT_WINDOW_DAYS days of transaction_date
+# unless start_date/end_date say otherwise; 0 means all history
+DEFAULT_WINDOW_DAYS = int(os.getenv("DEFAULT_WINDOW_DAYS", 90))
+
+def default_window_start():
+    if DEFAULT_WINDOW_DAYS <= 0:
+        return None
+    # Same day as BigQuery's CURRENT_DATE(), which is UTC
+    return datetime.now(timezone.utc).date() - timedelta(days=DEFAULT_WINDOW_DAYS)
+
+def window_payload(start_date, end_date):
+    """The effective transaction_date window, reported with every windowed response."""
+    return {
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None
+    }
+
+def and_conditions(conditions):
+    """window_conditions() SQL to append to an existing WHERE clause."""
+    return "".join(f"\n                AND {condition}" for condition in conditions)
+
+def invalidate_caches():
+    """Forget cached payloads and table versions after writing to the table."""
+    query_cache.invalidate()
+    table_versions.invalidate()
+    count_cache.invalidate()
+    result_tables.invalidate()
+    prewarmed.invalidate()
+
+def encode_cursor(row):
+    """Opaque keyset cursor for the (transaction_date, transaction_id) of a row."""
+    transaction_date = row.get("transaction_date")
+    payload = [str(transaction_date) if transaction_date is not None else None, str(row.get("transaction_id"))]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        transaction_date, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        # transaction_date is nullable; NULL-date rows are paged after the dated ones
+        if transaction_date is None:
+            return None, str(transaction_id)
+        return date.fromisoformat(transaction_date), str(transaction_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+# Offset pages are read from one materialized listing per table version and
+# filters: its first request sorts up to RESULT_REUSE_MAX_ROWS rows into the
+# job's destination table (kept by BigQuery for about a day), and later pages
+# list_rows() it instead of running a job. 0 runs a job for every page.
+RESULT_REUSE_MAX_ROWS = int(os.getenv("RESULT_REUSE_MAX_ROWS", 10000))
+result_tables = QueryCache(
+    maxsize=int(os.getenv("RESULT_REUSE_MAX_ENTRIES", 256)),
+    ttl=int(os.getenv("RESULT_REUSE_TTL_SECONDS", 600))
+)
+
+def reusable_page(offset, limit):
+    """Whether an offset page can come from a materialized listing."""
+    return 0 < offset + limit <= RESULT_REUSE_MAX_ROWS and hasattr(client, "list_rows")
+
+def materialized_page(filters, fields, offset, limit, with_total=False):
+    """
+    Rows offset..offset+limit of the listing for these filters (with
+    total_count if with_total). Reads the remembered destination table when
+    there is one, otherwise runs the listing and remembers where its result
+    went, with the result's schema: list_rows() on a bare table reference
+    would fetch the table's metadata first, a second round trip per page.
+    """
+    key = (TABLE_NAME, table_version(), filters, fields, with_total)
+    result_table = result_tables.get(key)
+    if result_table is not None:
+        destination, schema = result_table
+        try:
+            rows = list(client.list_rows(destination, selected_fields=schema, start_index=offset, max_results=limit))
+            telemetry.record_result_read()
+            return rows
+        except NotFound:
+            # Anonymous result tables expire; run the listing again
+            result_tables.delete(key)
+
+    def materialize():
+        query, query_parameters = listing_query(
+            get_table(), TABLE_NAME, filters, RESULT_REUSE_MAX_ROWS, with_total=with_total,
+            search_index=get_search_index_table(), fields=fields
+        )
+        with job_slot():
+            job = start_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
+            results = job_result(job, start_index=offset, max_results=limit)
+            rows = list(results)
+        telemetry.record_job(job)
+        schema = getattr(results, "schema", None)
+        if job.destination is not None and schema:
+            result_tables.set(key, (job.destination, list(schema)))
+        return rows
+
+    rows, shared = in_flight_queries.do(("materialized_page", key, offset, limit), materialize)
+    if shared:
+        telemetry.record_coalesced()
+    return rows
 
 #Get all transactions with pagination
 @app.route("/api/transactions")
+@conditional_endpoint
 def all_transactions():
     try:
         # Get pagination parameters
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))  # Default 50 rows per page
         offset = (page - 1) * limit
+        # include_total=true returns the filtered total from the same job
+        with_total = request.args.get('include_total', '').lower() == 'true'
+
+        # Keyset pagination: present (even empty) `cursor` switches to seek mode
+        cursor = request.args.get('cursor')
+        decoded_cursor = None
+        if cursor:
+            try:
+                decoded_cursor = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({"data": [], "error": str(e)}), 400
         
         # Get search and filter parameters
-        search = request.args.get('search', '').strip().replace("'", "''")  # Escape single quotes
-        status_filter = request.args.get('status', '').strip().replace("'", "''")
-        category_filter = request.args.get('category', '').strip().replace("'", "''")
-        
-        # Build WHERE clause
-        where_conditions = []
-        
-        if search:
-            # Handle NULL values properly in BigQuery using COALESCE
-            # Search condition depends on table type
-            if TABLE_NAME == "master_viz":
-                where_conditions.append(f"(LOWER(COALESCE(CAST(transaction_id AS STRING), '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(tag_plate_number, '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(CAST(ml_predicted_category AS STRING), '')) LIKE LOWER('%{search}%'))")
-            else:
-                # gold_automation table
-                where_conditions.append(f"(LOWER(COALESCE(CAST(transaction_id AS STRING), '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(tag_plate_number, '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(CAST(threat_severity AS STRING), '')) LIKE LOWER('%{search}%'))")
-        
-        if status_filter and status_filter != 'all':
-            where_conditions.append(f"status = '{status_filter}'")
+        try:
+            filters = parse_filters(request.args, default_window_start())
+            # Only the columns the list shows, unless `fields` asks for others
+            fields = parse_fields(request.args.get('fields'), table_columns(), LISTING_FIELDS)
+        except ValueError as e:
+            return jsonify({"data": [], "error": str(e)}), 400
+
+        if cursor is not None:
+            # Fetch one extra row to know whether another page exists
+            query, query_parameters = listing_query(
+                get_table(), TABLE_NAME, filters, limit + 1, cursor=decoded_cursor, keyset=True,
+                search_index=get_search_index_table(), fields=fields
+            )
+            job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+            rows = list(run_query(query, job_config))
+            next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+            return jsonify({
+                "data": rows[:limit], "limit": limit, "next_cursor": next_cursor,
+                "window": window_payload(filters.start_date, filters.end_date)
+            })
         
-        if category_filter and category_filter != 'all':
-            if TABLE_NAME == "master_viz":
-                where_conditions.append(f"LOWER(ml_predicted_category) = LOWER('{category_filter}')")
+        if reusable_page(offset, limit):
+            rows = materialized_page(filters, fields, offset, limit, with_total)
+        else:
+            # Build query with pagination
+            query, query_parameters = listing_query(
+                get_table(), TABLE_NAME, filters, limit, offset=offset, with_total=with_total,
+                search_index=get_search_index_table(), fields=fields
+            )
+            job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+
+            # Rows go to the JSON provider as they are, no per-row dict copy
+            rows = list(run_query(query, job_config))
+        payload = {
+            "data": rows, "page": page, "limit": limit,
+            "window": window_payload(filters.start_date, filters.end_date)
+        }
+        if with_total:
+            # An empty page carries no total_count, fall back to a count job
+            if rows:
+                payload["total"] = int(rows[0]["total_count"])
             else:
-                where_conditions.append(f"LOWER(threat_severity) = LOWER('{category_filter}')")
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-        
-        # Build query with pagination
-        query = f"""
-        SELECT * 
-        FROM {get_table()}
-        {where_clause}
-        ORDER BY transaction_date DESC
-        LIMIT {limit}
-        OFFSET {offset}
-        """
-        
-        results = client.query(query).result()
-        rows = [dict(row) for row in results]
-        return jsonify({"data": rows, "page": page, "limit": limit})
+                payload["total"] = exact_total(filters)
+            payload["data"] = [{key: value for key, value in row.items() if key != "total_count"} for row in rows]
+        return jsonify(payload)
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
         print(f"Error fetching transactions: {str(e)}")
-        print(f"Query: {query}")
+        print(f"Query: {query if 'query' in locals() else 'N/A'}")
         print(f"Traceback: {error_trace}")
         return jsonify({"data": [], "error": str(e), "query": query if 'query' in locals() else "N/A"}), 500
 
+# Totals per table version and filter set, for approx=true counts; cleared
+# on status writes, and the TTL bounds staleness when there is no version
+count_cache = QueryCache(
+    maxsize=int(os.getenv("COUNT_CACHE_MAX_ENTRIES", 1024)),
+    ttl=int(os.getenv("COUNT_CACHE_TTL_SECONDS", 3600))
+)
+
+def exact_total(filters):
+    """COUNT(*) of the rows matching the filters, as the listing would page them."""
+    query, query_parameters = count_query(get_table(), TABLE_NAME, filters, get_search_index_table())
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+    return int(dict(next(iter(run_query(query, job_config))))["total"])
+
+def approximate_total(filters):
+    """
+    (total, source) without counting the fact table: table metadata when
+    nothing is filtered, the rollup when only status, category and dates
+    are. None when a search term needs the real count.
+    """
+    if filters.search:
+        return None
+    if not any((filters.status, filters.category, filters.start_date, filters.end_date)) and hasattr(client, "get_table"):
+        try:
+            return int(client.get_table(f"njc-ezpass.ezpass_data.{TABLE_NAME}").num_rows), "metadata"
+        except Exception as e:
+            print(f"Error fetching table row count: {str(e)}")
+    if get_rollup_table():
+        query, query_parameters = rollup_count_query(get_rollup_table(), filters)
+        rows = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
+        return int(dict(next(iter(rows)))["total"]), "rollup"
+    return None
+
 #Get total count of transactions (for pagination)
 @app.route("/api/transactions/count")
+@conditional_endpoint
 def transactions_count():
+    # Get filter parameters (same as all_transactions)
     try:
-        # Get filter parameters (same as all_transactions)
-        search = request.args.get('search', '').strip().replace("'", "''")  # Escape single quotes
-        status_filter = request.args.get('status', '').strip().replace("'", "''")
-        category_filter = request.args.get('category', '').strip().replace("'", "''")
-        
-        # Build WHERE clause (same logic as all_transactions)
-        where_conditions = []
-        
-        if search:
-            # Handle NULL values properly in BigQuery using COALESCE
-            # Search condition depends on table type
-            if TABLE_NAME == "master_viz":
-                where_conditions.append(f"(LOWER(COALESCE(CAST(transaction_id AS STRING), '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(tag_plate_number, '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(CAST(ml_predicted_category AS STRING), '')) LIKE LOWER('%{search}%'))")
-            else:
-                # gold_automation table
-                where_conditions.append(f"(LOWER(COALESCE(CAST(transaction_id AS STRING), '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(tag_plate_number, '')) LIKE LOWER('%{search}%') OR LOWER(COALESCE(CAST(threat_severity AS STRING), '')) LIKE LOWER('%{search}%'))")
-        
-        if status_filter and status_filter != 'all':
-            where_conditions.append(f"status = '{status_filter}'")
-        
-        if category_filter and category_filter != 'all':
-            if TABLE_NAME == "master_viz":
-                where_conditions.append(f"LOWER(ml_predicted_category) = LOWER('{category_filter}')")
-            else:
-                where_conditions.append(f"LOWER(threat_severity) = LOWER('{category_filter}')")
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-        
-        query = f"""
-        SELECT COUNT(*) AS total
-        FROM {get_table()}
-        {where_clause}
-        """
-        
-        results = client.query(query).result()
-        total = dict(next(results))["total"]
-        return jsonify({"total": int(total)})
+        filters = parse_filters(request.args, default_window_start())
+    except ValueError as e:
+        return jsonify({"total": 0, "error": str(e)}), 400
+
+    # approx=true is enough for "page X of ~Y": metadata, rollup or a cached count
+    approx = request.args.get('approx', '').lower() == 'true'
+    window = window_payload(filters.start_date, filters.end_date)
+    key = (TABLE_NAME, table_version(), filters)
+
+    try:
+        if approx:
+            cached = count_cache.get(key)
+            hit = cached is not None
+            if not hit:
+                cached = approximate_total(filters) or (exact_total(filters), "query")
+                count_cache.set(key, cached)
+            total, source = cached
+            response = jsonify({"total": total, "approximate": True, "source": source, "window": window})
+            response.headers["X-Cache"] = "HIT" if hit else "MISS"
+            return response
+
+        total = exact_total(filters)
+        # Later approx=true requests for the same filters reuse it
+        count_cache.set(key, (total, "query"))
+        return jsonify({"total": total, "window": window})
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
         print(f"Error fetching transaction count: {str(e)}")
-        print(f"Query: {query}")
         print(f"Traceback: {error_trace}")
-        return jsonify({"total": 0, "error": str(e), "query": query if 'query' in locals() else "N/A"}), 500
+        return jsonify({"total": 0, "error": str(e)}), 500
+
+#Stream every transaction matching the filters as CSV or NDJSON
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 10000))
+
+def export_csv(results):
+    """Yield a header line, then one CSV chunk per BigQuery result page."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = [field.name for field in results.schema]
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for page in results.pages:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in page:
+            writer.writerow(["" if row[column] is None else row[column] for column in columns])
+        yield buffer.getvalue()
+
+def export_ndjson(results):
+    """Yield one NDJSON chunk per BigQuery result page."""
+    for page in results.pages:
+        yield "".join(json.dumps(dict(row), default=str) + "\n" for row in page)
+
+@app.route("/api/transactions/export")
+def export_transactions():
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format, expected one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    try:
+        # Same default window as the listing it exports
+        filters = parse_filters(request.args, default_window_start())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # order=newest sorts the export; unordered exports start streaming sooner
+        ordered = request.args.get('order', '').lower() == 'newest'
+        query, query_parameters = export_query(get_table(), TABLE_NAME, filters, get_search_index_table(), ordered)
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+        # Waits for the job only; rows are fetched page by page while streaming
+        results = run_query(query, job_config, page_size=EXPORT_PAGE_SIZE)
+    except Exception as e:
+        print(f"Error exporting transactions: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+    generate = export_csv if export_format == "csv" else export_ndjson
+    return Response(
+        stream_with_context(generate(results)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=transactions.{export_format}",
+            # The body has no room for it, so the window goes in headers ('' = unbounded)
+            "X-Window-Start-Date": str(filters.start_date or ""),
+            "X-Window-End-Date": str(filters.end_date or "")
+        }
+    )
+
 
 #Get flagged or investigating transactions (Recent Alerts)
 @app.route("/api/transactions/alerts")
+@conditional_endpoint
 def alerts():
     try:
+        try:
+            # Alert-card columns unless `fields` asks for others
+            fields = parse_fields(request.args.get('fields'), table_columns(), ALERT_FIELDS)
+            window = parse_date_window(request.args, default_window_start())
+        except ValueError as e:
+            return jsonify({"data": [], "error": str(e)}), 400
+        conditions, query_parameters = window_conditions(*window)
+
         if TABLE_NAME == "master_viz":
             query = f"""
-                SELECT * 
+                SELECT {select_list(fields)}
                 FROM {get_table()} 
-                WHERE is_anomaly = 1
+                WHERE is_anomaly = 1{and_conditions(conditions)}
                 ORDER BY transaction_date DESC
                 LIMIT 100
             """
         elif TABLE_NAME == "gold_automation":
             query = f"""
-                SELECT * 
+                SELECT {select_list(fields)}
                 FROM {get_table()} 
-                WHERE flag_fraud = TRUE
+                WHERE flag_fraud = TRUE{and_conditions(conditions)}
                 ORDER BY transaction_date DESC
                 LIMIT 100
             """
         else:
             return jsonify({"error": "Unsupported table"}), 400
 
-        results = client.query(query).result()
-        rows = [dict(row) for row in results]
-        return jsonify({"data": rows})
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
+        return jsonify({"data": list(results), "window": window_payload(*window)})
 
     except Exception as e:
         print(f"Error fetching alerts: {str(e)}")
         return jsonify({"data": [], "error": str(e)}), 500
 
 
+def flagged_row(row):
+    """Shape of a flagged transaction on the homepage card and in the alert stream."""
+    # Map category column depending on table
+    category = row.get('ml_predicted_category') if TABLE_NAME == "master_viz" else row.get('threat_severity')
+    if not category:
+        category = 'Anomaly Detected'
+
+    return {
+        'id': row.get('transaction_id'),
+        'transaction_id': row.get('transaction_id'),
+        'transaction_date': str(row.get('transaction_date')) if row.get('transaction_date') else None,
+        'tag_plate_number': row.get('tag_plate_number'),
+        'tagPlate': row.get('tag_plate_number'),
+        'agency': row.get('agency'),
+        'amount': float(row.get('amount')) if row.get('amount') is not None else 0.0,
+        'status': row.get('status'),
+        'category': category,
+        'is_anomaly': bool(row.get('is_anomaly') if TABLE_NAME == "master_viz" else row.get('flag_fraud'))
+    }
+
+
+#Full row for one transaction (lists and alerts return a few columns)
+@app.route("/api/transactions/<transaction_id>")
+@conditional_endpoint
+def transaction_detail(transaction_id):
+    try:
+        # The row's transaction_date, when the caller has it, prunes to one partition
+        try:
+            raw_date = request.args.get("transaction_date")
+            transaction_date = date.fromisoformat(raw_date) if raw_date else None
+        except ValueError:
+            return jsonify({"error": "Invalid transaction_date, expected YYYY-MM-DD"}), 400
+        try:
+            # Otherwise a start_date/end_date window bounds the partitions searched
+            window = parse_date_window(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        conditions, query_parameters = window_conditions(*window)
+        query_parameters.append(bigquery.ScalarQueryParameter("transaction_id", "STRING", transaction_id))
+        if transaction_date is not None:
+            conditions.append("transaction_date = @transaction_date")
+            query_parameters.append(bigquery.ScalarQueryParameter("transaction_date", "DATE", transaction_date))
+
+        query = f"""
+            SELECT *
+            FROM {get_table()}
+            WHERE CAST(transaction_id AS STRING) = @transaction_id{and_conditions(conditions)}
+            LIMIT 1
+        """
+        rows = list(run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters)))
+        if not rows:
+            return jsonify({"error": "Transaction not found"}), 404
+        return jsonify({"data": rows[0], "window": window_payload(*window)})
+
+    except Exception as e:
+        print(f"Error fetching transaction {transaction_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 #Get recent flagged transactions for homepage card
 @app.route("/api/transactions/recent-flagged")
+@conditional_endpoint
 def recent_flagged():
     try:
+        try:
+            window = parse_date_window(request.args, default_window_start())
+        except ValueError as e:
+            return jsonify({"data": [], "error": str(e)}), 400
+        conditions, query_parameters = window_conditions(*window)
+
         if TABLE_NAME == "master_viz":
             query = f"""
                 SELECT 
@@ -188,7 +890,7 @@ def recent_flagged():
                     ml_predicted_category,
                     is_anomaly
                 FROM {get_table()} 
-                WHERE (status = 'Needs Review' OR is_anomaly = 1)
+                WHERE (status = 'Needs Review' OR is_anomaly = 1){and_conditions(conditions)}
                 ORDER BY transaction_date DESC
                 LIMIT 3
             """
@@ -204,49 +906,173 @@ def recent_flagged():
                     threat_severity,
                     flag_fraud
                 FROM {get_table()} 
-                WHERE (status = 'Needs Review' OR flag_fraud = TRUE)
+                WHERE (status = 'Needs Review' OR flag_fraud = TRUE){and_conditions(conditions)}
                 ORDER BY transaction_date DESC
                 LIMIT 3
             """
         else:
             return jsonify({"error": "Unsupported table"}), 400
 
-        results = client.query(query).result()
-        rows = []
-
-        for row in results:
-            status = row.get('status')
-
-            # Map category column depending on table
-            category = row.get('ml_predicted_category') if TABLE_NAME == "master_viz" else row.get('threat_severity')
-            if not category:
-                category = 'Anomaly Detected'
-
-            rows.append({
-                'id': row.get('transaction_id'),
-                'transaction_id': row.get('transaction_id'),
-                'transaction_date': str(row.get('transaction_date')) if row.get('transaction_date') else None,
-                'tag_plate_number': row.get('tag_plate_number'),
-                'tagPlate': row.get('tag_plate_number'),
-                'agency': row.get('agency'),
-                'amount': float(row.get('amount')) if row.get('amount') is not None else 0.0,
-                'status': status,
-                'category': category,
-                'is_anomaly': bool(row.get('is_anomaly') if TABLE_NAME == "master_viz" else row.get('flag_fraud'))
-            })
-
-        return jsonify({"data": rows})
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
+        return jsonify({"data": [flagged_row(row) for row in results], "window": window_payload(*window)})
 
     except Exception as e:
         print(f"Error fetching recent flagged transactions: {str(e)}")
         return jsonify({"data": [], "error": str(e)}), 500
 
 
+# Flagged-transaction columns and conditions per table, for the alert stream
+ALERT_STREAM_QUERIES = {
+    "master_viz": {
+        "columns": "transaction_id, transaction_date, tag_plate_number, agency, amount, status, ml_predicted_category, is_anomaly",
+        "condition": "(status = 'Needs Review' OR is_anomaly = 1)",
+        # Status updates touch last_updated, model runs prediction_timestamp
+        "changed_at": ("last_updated", "prediction_timestamp")
+    },
+    "gold_automation": {
+        "columns": "transaction_id, transaction_date, tag_plate_number, agency, amount, status, threat_severity, flag_fraud",
+        "condition": "(status = 'Needs Review' OR flag_fraud = TRUE)",
+        "changed_at": ("last_updated",)
+    }
+}
+
+# One shared poll per process per interval, however many dashboards are open
+ALERT_STREAM_INTERVAL_SECONDS = float(os.getenv("ALERT_STREAM_INTERVAL_SECONDS", 15))
+ALERT_STREAM_MAX_ROWS = 500
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Position of the feed in (changed_at, transaction_id) order. A model run
+# stamps every row with one prediction_timestamp, so changed_at alone can't
+# tell the rows of a run apart; `pending` means the last poll hit the LIMIT.
+AlertWatermark = namedtuple("AlertWatermark", ["changed_at", "transaction_id", "pending"], defaults=[None, False])
+
+def alert_changed_at():
+    """SQL for when a row last changed, as a TIMESTAMP."""
+    columns = [
+        f"IFNULL(CAST({column} AS TIMESTAMP), TIMESTAMP '1970-01-01')"
+        for column in ALERT_STREAM_QUERIES[TABLE_NAME]["changed_at"]
+    ]
+    return columns[0] if len(columns) == 1 else f"GREATEST({', '.join(columns)})"
+
+def alert_window():
+    """(WHERE clause, parameters) bounding the feed's scans to the default date window."""
+    conditions, query_parameters = window_conditions(default_window_start(), None)
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), query_parameters
+
+def latest_alert_change():
+    """MAX(changed_at) over the window: only the changed_at columns, no row fetch."""
+    where, query_parameters = alert_window()
+    query = f"SELECT MAX({alert_changed_at()}) AS watermark FROM {get_table()} {where}"
+    row = next(iter(run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))), None)
+    return (row["watermark"] if row else None) or EPOCH
+
+def alert_watermark():
+    return AlertWatermark(latest_alert_change())
+
+def poll_alert_changes(watermark):
+    """(serialized alerts event or None, new watermark) for flagged rows changed after watermark."""
+    # Cheap probe first; the rows are only fetched when something changed
+    if not watermark.pending and latest_alert_change() <= watermark.changed_at:
+        return None, watermark
+
+    spec = ALERT_STREAM_QUERIES[TABLE_NAME]
+    where, query_parameters = alert_window()
+    query = f"""
+        SELECT {spec["columns"]}, changed_at
+        FROM (
+            SELECT *, {alert_changed_at()} AS changed_at
+            FROM {get_table()}
+            {where}
+        )
+        WHERE {spec["condition"]}
+          AND (changed_at > @watermark OR (changed_at = @watermark AND transaction_id > @watermark_id))
+        ORDER BY changed_at, transaction_id
+        LIMIT {ALERT_STREAM_MAX_ROWS}
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters + [
+        bigquery.ScalarQueryParameter("watermark", "TIMESTAMP", watermark.changed_at),
+        bigquery.ScalarQueryParameter("watermark_id", "STRING", watermark.transaction_id)
+    ])
+    rows = list(run_query(query, job_config))
+    if not rows:
+        return None, watermark._replace(pending=False)
+    event = f"event: alerts\ndata: {app.json.dumps({'data': [flagged_row(row) for row in rows]})}\n\n"
+    # A full page may have more rows after it, even at the same changed_at
+    return event, AlertWatermark(rows[-1]["changed_at"], rows[-1]["transaction_id"], len(rows) == ALERT_STREAM_MAX_ROWS)
+
+alert_feed = AlertFeed(poll_alert_changes, alert_watermark, interval=ALERT_STREAM_INTERVAL_SECONDS)
+
+#Push new or changed alerts to the dashboard (Server-Sent Events)
+@app.route("/api/alerts/stream")
+def alert_stream():
+    if TABLE_NAME not in ALERT_STREAM_QUERIES:
+        return jsonify({"error": "Unsupported table"}), 400
+
+    subscriber = alert_feed.subscribe()
+
+    def events():
+        try:
+            yield f"retry: {int(ALERT_STREAM_INTERVAL_SECONDS * 1000)}\nevent: ready\ndata: {{}}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=ALERT_STREAM_INTERVAL_SECONDS)
+                except queue.Empty:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                if event is RESYNC:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    yield event
+        finally:
+            alert_feed.unsubscribe(subscriber)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 #Aggregated metrics for dashboard cards
 @app.route("/api/metrics")
+@conditional_endpoint
+@cached_endpoint
 def metrics():
+    # Aggregates cover all history unless start_date/end_date narrow them
     try:
-        if TABLE_NAME == "master_viz":
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    conditions, query_parameters = window_conditions(*window)
+    where_window = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    try:
+        if get_rollup_table():
+            query = f"""
+                SELECT
+                    SUM(transaction_count) AS total_transactions,
+                    SUM(CASE WHEN is_anomaly = 1 THEN transaction_count ELSE 0 END) AS total_flagged,
+                    SUM(CASE WHEN is_anomaly = 1 THEN total_amount ELSE 0 END) AS total_amount,
+                    SUM(CASE 
+                            WHEN is_anomaly = 1 
+                                 AND EXTRACT(YEAR FROM transaction_date) = EXTRACT(YEAR FROM CURRENT_DATE())
+                            THEN total_amount 
+                            ELSE 0 
+                        END) AS potential_loss_ytd,
+                    SUM(CASE WHEN is_anomaly = 1 
+                             AND EXTRACT(YEAR FROM transaction_date) = EXTRACT(YEAR FROM CURRENT_DATE()) THEN transaction_count ELSE 0 END) AS total_alerts_ytd,
+                    SUM(CASE 
+                            WHEN risk_category IN ('Critical Risk', 'High Risk')
+                                 AND EXTRACT(YEAR FROM transaction_date) = EXTRACT(YEAR FROM CURRENT_DATE())
+                                 AND EXTRACT(MONTH FROM transaction_date) = EXTRACT(MONTH FROM CURRENT_DATE())
+                            THEN transaction_count 
+                            ELSE 0 
+                        END) AS detected_frauds_current_month
+                FROM {get_rollup_table()}
+                WHERE rollup_type = 'total'{and_conditions(conditions)}
+            """
+        elif TABLE_NAME == "master_viz":
             query = f"""
                 SELECT
                     COUNT(*) AS total_transactions,
@@ -268,6 +1094,7 @@ def metrics():
                             ELSE 0 
                         END) AS detected_frauds_current_month
                 FROM {get_table()}
+                {where_window}
             """
         elif TABLE_NAME == "gold_automation":
             query = f"""
@@ -291,19 +1118,21 @@ def metrics():
                             ELSE 0 
                         END) AS detected_frauds_current_month
                 FROM {get_table()}
+                {where_window}
             """
         else:
             return jsonify({"error": "Unsupported table"}), 400
 
-        results = client.query(query).result()
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
         metrics = dict(next(results))
         return jsonify({
-            "total_transactions": int(metrics.get("total_transactions", 0)),
-            "total_flagged": int(metrics.get("total_flagged", 0)),
-            "total_amount": float(metrics.get("total_amount", 0)),
-            "total_alerts_ytd": int(metrics.get("total_alerts_ytd", 0)),
-            "detected_frauds_current_month": int(metrics.get("detected_frauds_current_month", 0)),
-            "potential_loss_ytd": float(metrics.get("potential_loss_ytd", 0))
+            "total_transactions": int(metrics.get("total_transactions") or 0),
+            "total_flagged": int(metrics.get("total_flagged") or 0),
+            "total_amount": float(metrics.get("total_amount") or 0),
+            "total_alerts_ytd": int(metrics.get("total_alerts_ytd") or 0),
+            "detected_frauds_current_month": int(metrics.get("detected_frauds_current_month") or 0),
+            "potential_loss_ytd": float(metrics.get("potential_loss_ytd") or 0),
+            "window": window_payload(*window)
         })
 
     except Exception as e:
@@ -320,10 +1149,29 @@ def metrics():
 
 #Fraud by Category for chart
 @app.route("/api/charts/category")
+@conditional_endpoint
+@cached_endpoint
 def category_chart():
+    # Aggregates cover all history unless start_date/end_date narrow them
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e), "data": []}), 400
+    conditions, query_parameters = window_conditions(*window)
+
+    # Rollup version: per-flag rows are already unpivoted by dbt
+    if get_rollup_table():
+        query = f"""
+            SELECT flag_label AS category, SUM(transaction_count) AS count
+            FROM {get_rollup_table()}
+            WHERE rollup_type = 'flag'
+                AND is_anomaly = 1{and_conditions(conditions)}
+            GROUP BY category
+            ORDER BY count DESC
+        """
 
     # MASTER_VIZ VERSION (your original logic)
-    if TABLE_NAME == "master_viz":
+    elif TABLE_NAME == "master_viz":
         query = f"""
             WITH unpivoted AS (
                 SELECT
@@ -340,7 +1188,7 @@ def category_chart():
                     STRUCT('Driver Spend Spike' AS flag_label, flag_driver_spend_spike AS flag_value)
                 ]) AS f
                 WHERE is_anomaly = 1
-                    AND f.flag_value IS TRUE
+                    AND f.flag_value IS TRUE{and_conditions(conditions)}
             )
             SELECT category, COUNT(*) AS count
             FROM unpivoted
@@ -364,7 +1212,7 @@ def category_chart():
                     STRUCT('Holiday' AS flag_label, flag_is_holiday AS flag_value)
                 ]) AS f
                 WHERE flag_fraud = TRUE
-                    AND f.flag_value IS TRUE
+                    AND f.flag_value IS TRUE{and_conditions(conditions)}
             )
             SELECT category, COUNT(*) AS count
             FROM unpivoted
@@ -377,9 +1225,9 @@ def category_chart():
 
     # Run the query
     try:
-        results = client.query(query).result()
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
         data = [{"category": row["category"], "count": row["count"]} for row in results]
-        return jsonify({"data": data})
+        return jsonify({"data": data, "window": window_payload(*window)})
     except Exception as e:
         print("BACKEND ERROR:", e)
         return jsonify({"error": str(e), "data": []}), 500
@@ -388,16 +1236,37 @@ def category_chart():
 
 #Threat Severity for chart
 @app.route("/api/charts/severity")
+@conditional_endpoint
+@cached_endpoint
 def severity_chart():
+    # Aggregates cover all history unless start_date/end_date narrow them
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e), "data": []}), 400
+    conditions, query_parameters = window_conditions(*window)
+
+    # Rollup version
+    if get_rollup_table():
+        query = f"""
+            SELECT 
+                risk_category AS severity,
+                SUM(transaction_count) AS count
+            FROM {get_rollup_table()}
+            WHERE rollup_type = 'total'
+                AND risk_category IS NOT NULL{and_conditions(conditions)}
+            GROUP BY risk_category
+            ORDER BY count DESC
+        """
 
     # MASTER_VIZ version (original behavior)
-    if TABLE_NAME == "master_viz":
+    elif TABLE_NAME == "master_viz":
         query = f"""
             SELECT 
                 ml_predicted_category AS severity,
                 COUNT(*) AS count
             FROM {get_table()}
-            WHERE ml_predicted_category IS NOT NULL
+            WHERE ml_predicted_category IS NOT NULL{and_conditions(conditions)}
             GROUP BY ml_predicted_category
             ORDER BY count DESC
         """
@@ -409,7 +1278,7 @@ def severity_chart():
                 threat_severity AS severity,
                 COUNT(*) AS count
             FROM {get_table()}
-            WHERE threat_severity IS NOT NULL
+            WHERE threat_severity IS NOT NULL{and_conditions(conditions)}
             GROUP BY threat_severity
             ORDER BY count DESC
         """
@@ -419,9 +1288,9 @@ def severity_chart():
 
     # Run query
     try:
-        results = client.query(query).result()
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
         data = [{"severity": row["severity"], "count": row["count"]} for row in results]
-        return jsonify({"data": data})
+        return jsonify({"data": data, "window": window_payload(*window)})
     except Exception as e:
         print("BACKEND ERROR:", e)
         return jsonify({"error": str(e), "data": []}), 500
@@ -430,11 +1299,37 @@ def severity_chart():
 
 #Monthly transaction analysis for bar chart
 @app.route("/api/charts/monthly")
+@conditional_endpoint
+@cached_endpoint
 def monthly_chart():
+    # Aggregates cover all history unless start_date/end_date narrow them
     try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e), "data": []}), 400
+    conditions, query_parameters = window_conditions(*window)
+
+    try:
+
+        # Rollup logic
+        if get_rollup_table():
+            query = f"""
+                SELECT 
+                    FORMAT_DATE('%b %Y', transaction_date) AS month,
+                    EXTRACT(YEAR FROM transaction_date) AS year,
+                    EXTRACT(MONTH FROM transaction_date) AS month_num,
+                    SUM(transaction_count) AS total_transactions,
+                    SUM(CASE WHEN is_anomaly = 1 THEN transaction_count ELSE 0 END) AS fraud_alerts
+                FROM {get_rollup_table()}
+                WHERE rollup_type = 'total'
+                    AND transaction_date IS NOT NULL{and_conditions(conditions)}
+                GROUP BY year, month_num, month
+                ORDER BY year DESC, month_num DESC
+                LIMIT 12
+            """
 
         # MASTER_VIZ logic
-        if TABLE_NAME == "master_viz":
+        elif TABLE_NAME == "master_viz":
             query = f"""
                 SELECT 
                     FORMAT_DATE('%b %Y', DATE(transaction_date)) AS month,
@@ -443,7 +1338,7 @@ def monthly_chart():
                     COUNT(*) AS total_transactions,
                     SUM(CASE WHEN is_anomaly = 1 THEN 1 ELSE 0 END) AS fraud_alerts
                 FROM {get_table()}
-                WHERE transaction_date IS NOT NULL
+                WHERE transaction_date IS NOT NULL{and_conditions(conditions)}
                 GROUP BY year, month_num, month
                 ORDER BY year DESC, month_num DESC
                 LIMIT 12
@@ -459,7 +1354,7 @@ def monthly_chart():
                     COUNT(*) AS total_transactions,
                     SUM(CASE WHEN flag_fraud = TRUE THEN 1 ELSE 0 END) AS fraud_alerts
                 FROM {get_table()}
-                WHERE transaction_date IS NOT NULL
+                WHERE transaction_date IS NOT NULL{and_conditions(conditions)}
                 GROUP BY year, month_num, month
                 ORDER BY year DESC, month_num DESC
                 LIMIT 12
@@ -469,7 +1364,7 @@ def monthly_chart():
             return jsonify({"error": "Unsupported table"}), 400
 
         # Execute query
-        results = client.query(query).result()
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
         
         data = [{
             "month": row["month"],
@@ -482,55 +1377,153 @@ def monthly_chart():
         # Reverse to show oldest first if desired
         data.reverse()
 
-        return jsonify({"data": data})
+        return jsonify({"data": data, "window": window_payload(*window)})
 
     except Exception as e:
         print(f"Error fetching monthly chart data: {str(e)}")
         return jsonify({"data": [], "error": str(e)}), 500
 
 #Scatter plot data for ml_anomaly_score vs amount
+SCATTER_MODES = ("points", "grid", "hexbin")
+SCATTER_MAX_POINTS = int(os.getenv("SCATTER_MAX_POINTS", 5000))
+# Points are drawn from transactions on or after this date unless start_date says otherwise
+SCATTER_DEFAULT_START = date(2024, 1, 1)
+
+def scatter_binned_query(points_query, mode, bins):
+    """
+    Aggregate scatter points into 2D bins inside BigQuery.
+    `grid` uses a bins x bins rectangular grid; `hexbin` uses the usual
+    two-lattice hexagon assignment (as in matplotlib's hexbin).
+    Both return bin centres in data units plus a count per risk level.
+    """
+    if mode == "grid":
+        x_center = "x_min + (LEAST(CAST(FLOOR(x) AS INT64), @bins - 1) + 0.5) * sx"
+        y_center = "y_min + (LEAST(CAST(FLOOR(y) AS INT64), @bins - 1) + 0.5) * sy"
+        y_cells = "@bins"
+    else:
+        x_center = "x_min + IF(d1 < d2, ROUND(x), FLOOR(x) + 0.5) * sx"
+        y_center = "y_min + IF(d1 < d2, ROUND(y), FLOOR(y) + 0.5) * sy"
+        y_cells = "GREATEST(1, CAST(FLOOR(@bins / SQRT(3)) AS INT64))"
+
+    return f"""
+        WITH points AS ({points_query}),
+        bounds AS (
+            SELECT
+                MIN(amount) AS x_min,
+                MIN(ml_anomaly_score) AS y_min,
+                IFNULL(NULLIF(MAX(amount) - MIN(amount), 0), 1) / @bins AS sx,
+                IFNULL(NULLIF(MAX(ml_anomaly_score) - MIN(ml_anomaly_score), 0), 1) / {y_cells} AS sy
+            FROM points
+        ),
+        scaled AS (
+            SELECT
+                p.risk_level, b.x_min, b.y_min, b.sx, b.sy,
+                (p.amount - b.x_min) / b.sx AS x,
+                (p.ml_anomaly_score - b.y_min) / b.sy AS y
+            FROM points p CROSS JOIN bounds b
+        ),
+        located AS (
+            SELECT
+                *,
+                POW(x - ROUND(x), 2) + 3 * POW(y - ROUND(y), 2) AS d1,
+                POW(x - FLOOR(x) - 0.5, 2) + 3 * POW(y - FLOOR(y) - 0.5, 2) AS d2
+            FROM scaled
+        )
+        SELECT
+            {x_center} AS amount,
+            {y_center} AS ml_anomaly_score,
+            risk_level,
+            COUNT(*) AS count
+        FROM located
+        GROUP BY amount, ml_anomaly_score, risk_level
+    """
+
 @app.route("/api/charts/scatter")
+@conditional_endpoint
 def scatter_chart():
     try:
+        mode = request.args.get('mode', 'points')
+        if mode not in SCATTER_MODES:
+            return jsonify({"data": [], "error": f"Unsupported mode, expected one of {', '.join(SCATTER_MODES)}"}), 400
+        try:
+            # max_points is capped by SCATTER_MAX_POINTS, bins by 200
+            max_points = min(max(int(request.args.get('max_points', SCATTER_MAX_POINTS)), 1), SCATTER_MAX_POINTS)
+            bins = min(max(int(request.args.get('bins', 50)), 1), 200)
+        except ValueError:
+            return jsonify({"data": [], "error": "max_points and bins must be integers"}), 400
+        try:
+            window = parse_date_window(request.args, SCATTER_DEFAULT_START)
+        except ValueError as e:
+            return jsonify({"data": [], "error": str(e)}), 400
+        conditions, window_parameters = window_conditions(*window)
 
         if TABLE_NAME == "master_viz":
-            query = f"""
+            points_query = f"""
                 SELECT 
+                    transaction_id,
                     amount,
                     ml_predicted_score AS ml_anomaly_score,
                     ml_predicted_category AS risk_level
                 FROM {get_table()}
-                WHERE DATE(transaction_date) >= '2024-01-01'
-                    AND amount IS NOT NULL
+                WHERE amount IS NOT NULL
                     AND ml_predicted_score IS NOT NULL
-                    AND ml_predicted_category IS NOT NULL
+                    AND ml_predicted_category IS NOT NULL{and_conditions(conditions)}
             """
 
         elif TABLE_NAME == "gold_automation":
-            query = f"""
+            points_query = f"""
                 SELECT 
+                    transaction_id,
                     amount,
                     rule_based_score AS ml_anomaly_score,
                     threat_severity AS risk_level
                 FROM {get_table()}
-                WHERE DATE(transaction_date) >= '2024-01-01'
-                    AND amount IS NOT NULL
+                WHERE amount IS NOT NULL
                     AND rule_based_score IS NOT NULL
-                    AND threat_severity IS NOT NULL
+                    AND threat_severity IS NOT NULL{and_conditions(conditions)}
             """
 
         else:
             return jsonify({"error": "Unsupported table"}), 400
 
-        results = client.query(query).result()
+        if mode == "points":
+            # Stratified sample: every risk level gets an equal share of max_points,
+            # so small strata such as Critical Risk are kept in full. Ordering by a
+            # fingerprint keeps the sample stable between requests.
+            query = f"""
+                WITH points AS ({points_query}),
+                ranked AS (
+                    SELECT
+                        amount,
+                        ml_anomaly_score,
+                        risk_level,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY risk_level
+                            ORDER BY FARM_FINGERPRINT(CAST(transaction_id AS STRING))
+                        ) AS stratum_rank,
+                        COUNT(DISTINCT risk_level) OVER () AS strata
+                    FROM points
+                )
+                SELECT amount, ml_anomaly_score, risk_level
+                FROM ranked
+                WHERE stratum_rank <= GREATEST(DIV(@max_points, strata), 1)
+            """
+            query_parameters = [bigquery.ScalarQueryParameter("max_points", "INT64", max_points)]
+        else:
+            query = scatter_binned_query(points_query, mode, bins)
+            query_parameters = [bigquery.ScalarQueryParameter("bins", "INT64", bins)]
+
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters + window_parameters)
+        results = run_query(query, job_config)
 
         data = [{
             "amount": float(row["amount"]) if row["amount"] is not None else None,
             "ml_anomaly_score": float(row["ml_anomaly_score"]) if row["ml_anomaly_score"] is not None else None,
-            "risk_level": row["risk_level"]
+            "risk_level": row["risk_level"],
+            **({"count": int(row["count"])} if mode != "points" else {})
         } for row in results]
 
-        return jsonify({"data": data})
+        return jsonify({"data": data, "mode": mode, "window": window_payload(*window)})
 
     except Exception as e:
         print(f"Error fetching scatter chart data: {str(e)}")
@@ -539,16 +1532,37 @@ def scatter_chart():
 
 #Time series data for anomaly counts by hour
 @app.route("/api/charts/timeseries")
+@conditional_endpoint
+@cached_endpoint
 def timeseries_chart():
+    # Aggregates cover all history unless start_date/end_date narrow them
     try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e), "data": []}), 400
+    conditions, query_parameters = window_conditions(*window)
 
-        if TABLE_NAME == "master_viz":
+    try:
+
+        if get_rollup_table():
+            query = f"""
+                SELECT 
+                    hour,
+                    SUM(transaction_count) AS fraud_count
+                FROM {get_rollup_table()}
+                WHERE rollup_type = 'total'
+                    AND is_anomaly = 1{and_conditions(conditions)}
+                GROUP BY hour
+                ORDER BY hour
+            """
+
+        elif TABLE_NAME == "master_viz":
             query = f"""
                 SELECT 
                     EXTRACT(HOUR FROM entry_time) AS hour,
                     COUNT(*) AS fraud_count
                 FROM {get_table()}
-                WHERE is_anomaly = 1
+                WHERE is_anomaly = 1{and_conditions(conditions)}
                 GROUP BY hour
                 ORDER BY hour
             """
@@ -559,7 +1573,7 @@ def timeseries_chart():
                     EXTRACT(HOUR FROM entry_time) AS hour,
                     COUNT(*) AS fraud_count
                 FROM {get_table()}
-                WHERE flag_fraud = TRUE
+                WHERE flag_fraud = TRUE{and_conditions(conditions)}
                 GROUP BY hour
                 ORDER BY hour
             """
@@ -567,14 +1581,14 @@ def timeseries_chart():
         else:
             return jsonify({"error": "Unsupported table"}), 400
 
-        results = client.query(query).result()
+        results = run_query(query, bigquery.QueryJobConfig(query_parameters=query_parameters))
 
         data = [{
             "hour": int(row["hour"]),
             "fraud_count": int(row["fraud_count"])
         } for row in results]
 
-        return jsonify({"data": data})
+        return jsonify({"data": data, "window": window_payload(*window)})
 
     except Exception as e:
         print(f"Error fetching timeseries chart data: {str(e)}")
@@ -609,7 +1623,7 @@ def update_status():
             FROM {get_table()}
             WHERE transaction_id = '{transaction_id_escaped}'
         """
-        results = client.query(query).result()
+        results = run_query(query, coalesce=False)
         rows = list(results)
         
         if not rows:
@@ -632,28 +1646,249 @@ def update_status():
                     "allowed": allowed_transitions
                 }), 400
 
-        # Update status - only update last_updated if the column exists
-        if TABLE_NAME == "master_viz":
-            update_query = f"""
-                UPDATE {get_table()}
-                SET status = '{new_status_escaped}', last_updated = CURRENT_TIMESTAMP()
-                WHERE transaction_id = '{transaction_id_escaped}'
-            """
+        if status_queue is not None or get_status_events_table_id():
+            # Only applied if the row still has the status validated above
+            # (coalesced with other updates arriving in the same window, if queued)
+            if status_queue is not None:
+                applied = status_queue.submit(str(transaction_id), new_status, current_status).result()
+            else:
+                applied = str(transaction_id) in append_status_events({str(transaction_id): (new_status, current_status)})
+            if not applied:
+                return jsonify({
+                    "error": "Status changed concurrently",
+                    "current_status": current_status,
+                    "new_status": new_status
+                }), 409
         else:
-            # gold_automation might not have last_updated column
-            update_query = f"""
-                UPDATE {get_table()}
-                SET status = '{new_status_escaped}'
-                WHERE transaction_id = '{transaction_id_escaped}'
-            """
-
-        client.query(update_query).result()
+            # Update status - only update last_updated if the column exists
+            if TABLE_NAME == "master_viz":
+                update_query = f"""
+                    UPDATE {get_base_table()}
+                    SET status = '{new_status_escaped}', last_updated = CURRENT_TIMESTAMP()
+                    WHERE transaction_id = '{transaction_id_escaped}'
+                """
+            else:
+                # gold_automation might not have last_updated column
+                update_query = f"""
+                    UPDATE {get_base_table()}
+                    SET status = '{new_status_escaped}'
+                    WHERE transaction_id = '{transaction_id_escaped}'
+                """
+            run_query(update_query)
+            invalidate_caches()
 
         return jsonify({"success": True})
     except Exception as e:
         print(f"Error updating transaction status: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def merge_statuses(updates):
+    """
+    Apply {transaction_id: (new_status, expected_status)} in a single MERGE job.
+    A row is only updated if its status is still the expected one, so an update
+    validated against a status that has changed since is skipped.
+    Returns the set of transaction ids that were updated.
+    """
+    if TABLE_NAME == "master_viz":
+        set_clause = "status = u.new_status, last_updated = CURRENT_TIMESTAMP()"
+    else:
+        # gold_automation might not have last_updated column
+        set_clause = "status = u.new_status"
+
+    query = f"""
+        MERGE {get_base_table()} t
+        USING (SELECT * FROM UNNEST(@updates)) u
+        ON t.transaction_id = u.transaction_id
+        WHEN MATCHED AND t.status IS NOT DISTINCT FROM u.expected_status THEN
+            UPDATE SET {set_clause}
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ArrayQueryParameter("updates", "STRUCT", [
+            bigquery.StructQueryParameter(
+                None,
+                bigquery.ScalarQueryParameter("transaction_id", "STRING", transaction_id),
+                bigquery.ScalarQueryParameter("new_status", "STRING", new_status),
+                bigquery.ScalarQueryParameter("expected_status", "STRING", expected_status)
+            )
+            for transaction_id, (new_status, expected_status) in updates.items()
+        ])
+    ])
+    job = start_query(query, job_config)
+    job.result()
+    telemetry.record_job(job)
+    invalidate_caches()
+
+    if job.num_dml_affected_rows == len(updates):
+        return set(updates)
+
+    # Some rows were skipped; the ones now holding their new status were applied
+    current = current_statuses(list(updates))
+    return {
+        transaction_id for transaction_id, status in current.items()
+        if status == updates[transaction_id][0]
+    }
+
+def current_statuses(transaction_ids):
+    """{transaction_id: status} as the endpoints read it, for the ids that exist."""
+    query = f"""
+        SELECT transaction_id, status
+        FROM {get_table()}
+        WHERE transaction_id IN UNNEST(@transaction_ids)
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ArrayQueryParameter("transaction_ids", "STRING", list(transaction_ids))
+    ])
+    return {
+        str(row.get("transaction_id")): row.get("status")
+        for row in run_query(query, job_config, coalesce=False)
+    }
+
+# Serializes the status check and the append below within this process
+status_events_lock = threading.Lock()
+
+def append_status_events(updates):
+    """
+    Record {transaction_id: (new_status, expected_status)} as streaming inserts
+    into the status event table: a constant-cost append instead of a DML job
+    that rewrites master_viz partitions. The latest event per transaction wins
+    (see get_table).
+
+    An insert can't be conditional like the MERGE, so the overlaid status is
+    read again right before appending and only updates still expecting it are
+    written; returns the set of transaction ids written. Within a process the
+    check and the append are atomic. Across worker processes two conflicting
+    updates can still both pass the check if they land within one round
+    trip of each other, and the later event wins.
+    """
+    with status_events_lock:
+        current = current_statuses(list(updates))
+        applicable = {
+            transaction_id: update for transaction_id, update in updates.items()
+            if transaction_id in current and current[transaction_id] == update[1]
+        }
+        if not applicable:
+            return set()
+
+        changed_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            {"transaction_id": transaction_id, "status": new_status, "previous_status": previous_status, "changed_at": changed_at}
+            for transaction_id, (new_status, previous_status) in applicable.items()
+        ]
+        # Row ids let BigQuery drop duplicates if the insert is retried
+        errors = client.insert_rows_json(get_status_events_table_id(), rows, row_ids=[uuid.uuid4().hex for _ in rows])
+        if errors:
+            raise RuntimeError(f"Failed to record status events: {errors}")
+    invalidate_caches()
+    return set(applicable)
+
+def write_statuses(updates):
+    """Apply {transaction_id: (new_status, expected_status)}; returns the ids applied."""
+    if get_status_events_table_id():
+        return append_status_events(updates)
+    return merge_statuses(updates)
+
+# Optional write-behind queue for single updates; 0 writes each one immediately
+STATUS_WRITE_WINDOW_MS = int(os.getenv("STATUS_WRITE_WINDOW_MS", 0))
+status_queue = StatusWriteQueue(write_statuses, STATUS_WRITE_WINDOW_MS / 1000) if STATUS_WRITE_WINDOW_MS > 0 else None
+BULK_STATUS_MAX = int(os.getenv("BULK_STATUS_MAX", 1000))
+
+@app.route("/api/transactions/update-status/bulk", methods=["POST"])
+def bulk_update_status():
+    try:
+        data = request.get_json(silent=True) or {}
+        updates = data.get("updates")
+
+        if not isinstance(updates, list) or not updates:
+            return jsonify({"error": "Missing updates"}), 400
+        if len(updates) > BULK_STATUS_MAX:
+            return jsonify({"error": f"At most {BULK_STATUS_MAX} updates per request"}), 400
+
+        # Later entries for the same transaction win
+        requested = {}
+        for update in updates:
+            transaction_id = update.get("transactionId") if isinstance(update, dict) else None
+            new_status = update.get("newStatus") if isinstance(update, dict) else None
+            if not transaction_id or not new_status:
+                return jsonify({"error": "Missing transactionId or newStatus"}), 400
+            requested[str(transaction_id)] = new_status
+
+        # Read every current status in one query
+        current = current_statuses(requested)
+
+        valid = {}
+        errors = []
+        for transaction_id, new_status in requested.items():
+            if transaction_id not in current:
+                errors.append({"transactionId": transaction_id, "error": "Transaction not found"})
+                continue
+
+            # Same rules as update_status: a NULL status may be set to anything
+            current_status = current[transaction_id]
+            allowed_transitions = STATUS_TRANSITIONS.get(current_status, [])
+            if current_status is not None and new_status not in allowed_transitions:
+                errors.append({
+                    "transactionId": transaction_id,
+                    "error": "Invalid status transition",
+                    "current_status": current_status,
+                    "new_status": new_status,
+                    "allowed": allowed_transitions
+                })
+                continue
+
+            valid[transaction_id] = (new_status, current_status)
+
+        applied = write_statuses(valid) if valid else set()
+        for transaction_id, (new_status, current_status) in valid.items():
+            if transaction_id not in applied:
+                errors.append({
+                    "transactionId": transaction_id,
+                    "error": "Status changed concurrently",
+                    "current_status": current_status,
+                    "new_status": new_status
+                })
+        updated = [transaction_id for transaction_id in valid if transaction_id in applied]
+
+        return jsonify({
+            "success": not errors,
+            "updated": updated,
+            "errors": errors
+        }), 200 if updated or not errors else 400
+    except Exception as e:
+        print(f"Error bulk updating transaction statuses: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def warm_up():
+    """
+    Create this process's client and run a trivial query, so credentials,
+    the access token and pooled connections are ready before the first request.
+    """
+    started = time.perf_counter()
+    try:
+        list(run_query("SELECT 1"))
+    except Exception as e:
+        print(f"Error warming up query client: {str(e)}")
+        return
+    telemetry.mark_startup("warm_up", time.perf_counter() - started)
+
+# Warm up in the background at import; gunicorn --preload users should call
+# warm_up() from a post_fork hook instead, as clients are per process
+if os.getenv("BIGQUERY_WARMUP", "false").lower() == "true":
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+#Prometheus text exposition of the per-route telemetry and admission queues
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(telemetry.prometheus() + admission.prometheus(), mimetype="text/plain; version=0.0.4")
+
+#Per-route latency percentiles, BigQuery bytes/slot-ms, cache hits and admission queues
+@app.route("/api/_stats")
+def stats():
+    return jsonify({
+        "routes": telemetry.snapshot(),
+        "startup": telemetry.startup_report(),
+        "admission": admission.snapshot()
+    })
+
 @app.route("/api/table-info")
 def table_info():
     """Return information about the current table being used"""
@@ -663,6 +1898,137 @@ def table_info():
         "is_gold_automation": TABLE_NAME == "gold_automation"
     })
 
+# Sections of the batched dashboard payload and the routes that produce them.
+# Listing sections receive the caller's pagination/filter parameters, the
+# others only its start_date/end_date window.
+DASHBOARD_SECTIONS = {
+    "metrics": ("/api/metrics", False),
+    "monthly": ("/api/charts/monthly", False),
+    "category": ("/api/charts/category", False),
+    "severity": ("/api/charts/severity", False),
+    "table_info": ("/api/table-info", False),
+    "recent_flagged": ("/api/transactions/recent-flagged", False),
+    "transactions": ("/api/transactions", True),
+    "count": ("/api/transactions/count", True)
+}
+LISTING_PARAMS = (
+    "page", "limit", "cursor", "include_total", "search", "match",
+    "status", "category", "start_date", "end_date", "fields"
+)
+WINDOW_PARAMS = ("start_date", "end_date")
+
+dashboard_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DASHBOARD_MAX_WORKERS", 8)),
+    thread_name_prefix="dashboard"
+)
+
+def run_dashboard_section(path, query_string):
+    """Run one dashboard route in its own request context; returns (status, body)."""
+    with app.test_request_context(path, query_string=query_string):
+        endpoint = app.url_map.bind("").match(path)[0]
+        response = app.make_response(app.view_functions[endpoint]())
+        return response.status_code, response.get_json()
+
+#All dashboard widgets in one round trip
+@app.route("/api/dashboard")
+@conditional_endpoint
+def dashboard():
+    listing_args = {key: request.args[key] for key in LISTING_PARAMS if key in request.args}
+    window_args = {key: request.args[key] for key in WINDOW_PARAMS if key in request.args}
+
+    # Submit every section up front so the BigQuery jobs run concurrently
+    futures = {
+        # Sections share the request context (deadline/cancellation in ASGI mode)
+        name: dashboard_executor.submit(
+            contextvars.copy_context().run, run_dashboard_section, path, listing_args if takes_args else window_args
+        )
+        for name, (path, takes_args) in DASHBOARD_SECTIONS.items()
+    }
+
+    payload = {}
+    errors = {}
+    for name, future in futures.items():
+        try:
+            status_code, body = future.result()
+        except Exception as e:
+            status_code, body = 500, {"error": str(e)}
+        payload[name] = body
+        if status_code != 200:
+            errors[name] = (body or {}).get("error", f"HTTP {status_code}")
+
+    # Partial results still come back; failed sections are listed in `errors`
+    payload["errors"] = errors
+    return jsonify(payload)
+
+# Default dashboard requests, with the exact parameters the frontend sends
+PREWARM_REQUESTS = (
+    ("/api/metrics", {}),
+    ("/api/charts/monthly", {}),
+    ("/api/charts/category", {}),
+    ("/api/charts/severity", {}),
+    ("/api/charts/timeseries", {}),
+    ("/api/charts/scatter", {}),
+    ("/api/transactions", {"page": "1", "limit": "50"}),
+    ("/api/transactions/count", {"approx": "true"}),
+    ("/api/transactions/alerts", {}),
+    ("/api/transactions/recent-flagged", {})
+)
+# Shared secret for /api/_prewarm (X-Prewarm-Token). The endpoint drops every
+# cache and starts a round of jobs, so without a token it refuses every call
+PREWARM_TOKEN = os.getenv("PREWARM_TOKEN", "")
+
+def prewarm_payload(path, query_string, version):
+    """Run one default request and keep its 200 body for `version`; returns the status."""
+    with app.test_request_context(path, query_string=query_string):
+        endpoint = app.url_map.bind("").match(path)[0]
+        response = app.make_response(app.view_functions[endpoint]())
+        body = response.get_json()
+        if response.status_code == 200 and isinstance(body, dict) and body.get("errors"):
+            # A partial dashboard; leave it to the next request to retry the failed sections
+            return 500, {"error": "; ".join(f"{name}: {error}" for name, error in body["errors"].items())}
+        if response.status_code == 200:
+            prewarmed.set(payload_key(version), response.get_data())
+        return response.status_code, body
+
+#Precompute the default dashboard payloads for the current table version (called by the pipeline)
+@app.route("/api/_prewarm", methods=["POST"])
+def prewarm():
+    if not PREWARM_TOKEN:
+        return jsonify({"error": "Prewarming is disabled; set PREWARM_TOKEN to enable it"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Prewarm-Token", ""), PREWARM_TOKEN):
+        return jsonify({"error": "Invalid prewarm token"}), 403
+    started = time.perf_counter()
+    # The table was just rebuilt: nothing cached so far describes it
+    invalidate_caches()
+    version = table_version()
+    if version is None:
+        return jsonify({"error": "Table version unavailable; nothing to key prewarmed payloads to"}), 503
+
+    warmed = []
+    errors = {}
+    # /api/dashboard reuses the section payloads, so it runs once they are warm
+    for stage in (PREWARM_REQUESTS, (("/api/dashboard", {}),)):
+        futures = {
+            path: dashboard_executor.submit(contextvars.copy_context().run, prewarm_payload, path, query_string, version)
+            for path, query_string in stage
+        }
+        for path, future in futures.items():
+            try:
+                status_code, body = future.result()
+            except Exception as e:
+                status_code, body = 500, {"error": str(e)}
+            if status_code == 200:
+                warmed.append(path)
+            else:
+                errors[path] = (body or {}).get("error", f"HTTP {status_code}")
+
+    print(f"Prewarmed {len(warmed)} payloads for table version {version} in {time.perf_counter() - started:.1f}s")
+    return jsonify({
+        "table_version": version,
+        "warmed": warmed,
+        "errors": errors
+    }), 200 if not errors else 500
+
 
 
 if __name__ == "__main__":
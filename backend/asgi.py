@@ -0,0 +1,156 @@
+"""ASGI serving mode for the Flask routes in app.py.
+
+Run with any ASGI server, e.g.:
+    uvicorn asgi:application --port 5001
+
+Routes and responses are the same as the WSGI app. The differences are in how
+queries wait (see async_jobs.py): BigQuery jobs are polled from the event
+loop, each request gets ASGI_REQUEST_TIMEOUT_SECONDS, and when the client
+disconnects the request's jobs are cancelled in BigQuery instead of running
+to completion for nobody. Views still run on a thread pool (they are plain
+Flask views), but a parked request thread costs a future, not a blocked HTTP
+call, so ASGI_MAX_THREADS can be far higher than a sync worker count.
+"""
+import asyncio
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+from async_jobs import JobPoller, RequestJobs, current_request
+
+ASGI_MAX_THREADS = int(os.getenv("ASGI_MAX_THREADS", 256))
+ASGI_POLL_WORKERS = int(os.getenv("ASGI_POLL_WORKERS", 8))
+ASGI_REQUEST_TIMEOUT_SECONDS = float(os.getenv("ASGI_REQUEST_TIMEOUT_SECONDS", 60))
+
+request_executor = ThreadPoolExecutor(max_workers=ASGI_MAX_THREADS, thread_name_prefix="asgi")
+poller = None
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope."""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body))
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def start_wsgi(environ):
+    """Run the Flask app up to its body; returns (status, headers, chunk iterator, iterable)."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"], started["headers"] = status, headers
+
+    iterable = app.wsgi_app(environ, start_response)
+    return started["status"], started["headers"], iter(iterable), iterable
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def lifespan(receive, send):
+    global poller
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            poller = JobPoller(asyncio.get_running_loop(), ASGI_POLL_WORKERS)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if poller is not None:
+                poller.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    global poller
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    loop = asyncio.get_running_loop()
+    if poller is None:
+        # Servers started without lifespan support
+        poller = JobPoller(loop, ASGI_POLL_WORKERS)
+
+    body = await read_body(receive)
+    if body is None:
+        return
+
+    request_jobs = RequestJobs(poller, loop.time() + ASGI_REQUEST_TIMEOUT_SECONDS)
+    context = contextvars.copy_context()
+    context.run(current_request.set, request_jobs)
+
+    def run_in_request(function, *args):
+        return loop.run_in_executor(request_executor, context.run, function, *args)
+
+    disconnected = asyncio.ensure_future(receive())
+    iterable = None
+    try:
+        started = run_in_request(start_wsgi, build_environ(scope, body))
+        await asyncio.wait({started, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if not started.done():
+            # Client gone while the view was waiting on BigQuery
+            await request_jobs.cancel()
+            await asyncio.gather(started, return_exceptions=True)
+            return
+
+        status, headers, chunks, iterable = started.result()
+        await send({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        })
+        # Chunk by chunk, so streamed exports and event feeds stay streamed
+        while True:
+            chunk = run_in_request(next, chunks, None)
+            await asyncio.wait({chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not chunk.done():
+                await request_jobs.cancel()
+                await asyncio.gather(chunk, return_exceptions=True)
+                return
+            data = chunk.result()
+            if data is None:
+                break
+            await send({"type": "http.response.body", "body": data, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        disconnected.cancel()
+        if iterable is not None and hasattr(iterable, "close"):
+            await run_in_request(iterable.close)
@@ -0,0 +1,103 @@
+"""Non-blocking BigQuery job waits for the ASGI serving mode (see asgi.py).
+
+Under the WSGI app every query blocks its worker inside `job.result()` until
+BigQuery finishes. In ASGI mode the event loop polls every in-flight job
+instead: the request thread submits its job and parks on a future while one
+coroutine per job checks `job.done()` with backoff on a small shared pool, so
+a process can have hundreds of jobs in flight at the cost of a few threads
+doing HTTP. Each request has a deadline, and every job it started is
+cancelled in BigQuery when the deadline passes or the client disconnects.
+
+Outside ASGI mode (no RequestJobs in context) wait_for_job is a no-op and the
+caller's `job.result()` waits as before.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+class QueryDeadlineExceeded(Exception):
+    pass
+
+
+class RequestJobs:
+    """The BigQuery jobs started by one request, plus its deadline."""
+
+    def __init__(self, poller, deadline):
+        self.poller = poller
+        self.deadline = deadline
+        self.cancelled = False
+        self._jobs = []
+        self._waits = set()
+        self._lock = threading.Lock()
+
+    def track(self, job, wait):
+        with self._lock:
+            self._jobs.append(job)
+            self._waits.add(wait)
+            if self.cancelled:
+                wait.cancel()
+
+    def untrack(self, wait):
+        with self._lock:
+            self._waits.discard(wait)
+
+    async def cancel(self):
+        """Stop waiting and cancel every unfinished job (client went away)."""
+        with self._lock:
+            self.cancelled = True
+            waits, jobs = list(self._waits), list(self._jobs)
+        for wait in waits:
+            wait.cancel()
+        await asyncio.gather(*(
+            self.poller.loop.run_in_executor(self.poller.executor, self.poller.cancel_job, job) for job in jobs
+        ))
+
+
+class JobPoller:
+    """Polls job state from one event loop for every request thread."""
+
+    def __init__(self, loop, poll_workers=8, initial_interval=0.05, max_interval=1.0):
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=poll_workers, thread_name_prefix="bq-poll")
+        self._initial_interval = initial_interval
+        self._max_interval = max_interval
+
+    async def wait(self, job, deadline):
+        interval = self._initial_interval
+        while not await self.loop.run_in_executor(self.executor, job.done):
+            if self.loop.time() + interval > deadline:
+                await self.loop.run_in_executor(self.executor, self.cancel_job, job)
+                raise QueryDeadlineExceeded(f"Query {getattr(job, 'job_id', '')} exceeded the request deadline")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self._max_interval)
+
+    def cancel_job(self, job):
+        try:
+            if not job.done():
+                job.cancel()
+        except Exception as e:
+            print(f"Error cancelling job {getattr(job, 'job_id', '')}: {str(e)}")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def wait_for_job(job):
+    """
+    Block the calling request thread until `job` is done, polling from the
+    event loop. Raises QueryDeadlineExceeded or CancelledError.
+    """
+    request_jobs = current_request.get()
+    if request_jobs is None or not hasattr(job, "done"):
+        return
+    poller = request_jobs.poller
+    wait = asyncio.run_coroutine_threadsafe(poller.wait(job, request_jobs.deadline), poller.loop)
+    request_jobs.track(job, wait)
+    try:
+        wait.result()
+    finally:
+        request_jobs.untrack(wait)
@@ -0,0 +1,91 @@
+"""Concurrency benchmark: sync WSGI workers vs the ASGI serving mode.
+
+Both modes serve /api/transactions/alerts from a stand-in BigQuery client
+(fake_bigquery.py) whose jobs take --latency seconds, so the numbers show how many slow queries
+each mode can keep in flight, not BigQuery itself. The sync run gives the
+Flask app --sync-workers threads (think gunicorn sync workers); the ASGI run
+uses one event loop.
+
+Run from backend/:
+    python benchmarks/concurrency.py --requests 400 --concurrency 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+import asgi  # noqa: E402
+from fake_bigquery import FakeBigQueryClient  # noqa: E402
+
+ROUTE = "/api/transactions/alerts"
+
+
+def summarize(mode, latencies, elapsed):
+    latencies = sorted(latencies)
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    print(f"{mode:>5}: {len(latencies) / elapsed:8.1f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms")
+
+
+def run_sync(requests, concurrency, workers):
+    flask_client = app_module.app.test_client()
+    slots = ThreadPoolExecutor(max_workers=workers)
+
+    def one_request():
+        started = time.perf_counter()
+        # A request holds a worker for its whole duration
+        slots.submit(flask_client.get, ROUTE).result()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        latencies = list(clients.map(lambda _: one_request(), range(requests)))
+    summarize("sync", latencies, time.perf_counter() - started)
+
+
+async def run_asgi(requests, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with limit:
+            started = time.perf_counter()
+            received = [{"type": "http.request", "body": b"", "more_body": False}]
+
+            async def receive():
+                if received:
+                    return received.pop()
+                await asyncio.Event().wait()
+
+            async def send(message):
+                pass
+
+            scope = {"type": "http", "method": "GET", "path": ROUTE, "query_string": b"", "headers": []}
+            await asgi.application(scope, receive, send)
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(requests)))
+    summarize("asgi", latencies, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per BigQuery job")
+    parser.add_argument("--sync-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    app_module.client = FakeBigQueryClient(latency=args.latency)
+    app_module.TABLE_NAME = "master_viz"
+    app_module.table_version = lambda: None
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.latency}s per query")
+    run_sync(args.requests, args.concurrency, args.sync_workers)
+    asyncio.run(run_asgi(args.requests, args.concurrency))
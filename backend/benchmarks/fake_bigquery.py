@@ -0,0 +1,267 @@
+"""Stand-in BigQuery client for the benchmarks.
+
+FakeBigQueryClient answers every query the routes in app.py run with
+synthetic master_viz rows, after a configurable per-job latency. It does not
+execute SQL; it only looks at the query text to decide which columns and how
+many rows to return:
+
+- `SELECT *` returns full master_viz rows; otherwise a row holds the
+  master_viz and rollup columns the query mentions plus its `AS alias`
+  columns.
+- A LIMIT (literal or @limit) caps the rows at the limit, a GROUP BY returns a
+  dozen groups, a plain aggregate returns one row, anything else `page_size`.
+- Lookups by transaction_id return those ids, in status "Needs Review".
+- DML jobs return no rows and report every targeted row as affected;
+  streaming inserts always succeed.
+- Dry runs return at once, with an estimate and no rows.
+- Every query job has a destination table that list_rows() can page
+  through without a job, like BigQuery's anonymous result tables.
+
+Rows come from a pool generated once up front, so the numbers measure the
+API (query building, serialization, caching, concurrency), not the fake.
+"""
+import itertools
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+AGENCIES = ["NJTA", "PANYNJ", "MTA", "DRPA", "SJTA", "NYSTA"]
+STATUSES = ["Needs Review", "Investigating", "Resolved - Fraud", "Resolved - Not Fraud", "No Action Required"]
+CATEGORIES = ["Impossible Travel", "Rapid Succession", "Overlapping Journey", "Amount Anomaly", "Vehicle Mismatch", "No Risk"]
+RISK_LEVELS = ["Critical Risk", "High Risk", "Medium Risk", "Low Risk", "No Risk"]
+VEHICLE_TYPES = ["Passenger Car", "Truck", "Bus", "Motorcycle"]
+
+# Column name -> generator(rng, index), in master_viz order
+MASTER_VIZ_COLUMNS = {
+    "transaction_id": lambda rng, i: f"TXN{i:010d}",
+    "transaction_date": lambda rng, i: date(2026, 1, 1) - timedelta(days=i % 365),
+    "posting_date": lambda rng, i: date(2026, 1, 2) - timedelta(days=i % 365),
+    "tag_plate_number": lambda rng, i: f"{rng.randrange(10**9):09d}",
+    "is_anomaly": lambda rng, i: int(rng.random() < 0.08),
+    "ml_anomaly_score": lambda rng, i: round(rng.uniform(-0.3, 0.3), 6),
+    "prediction_timestamp": lambda rng, i: datetime(2026, 1, 1, tzinfo=timezone.utc) - timedelta(minutes=i),
+    "anomaly_category": lambda rng, i: rng.choice(CATEGORIES),
+    "ml_predicted_category": lambda rng, i: rng.choice(CATEGORIES),
+    "status": lambda rng, i: rng.choice(STATUSES),
+    "agency": lambda rng, i: rng.choice(AGENCIES),
+    "agency_name": lambda rng, i: f"{rng.choice(AGENCIES)} Toll Authority",
+    "state_name": lambda rng, i: rng.choice(["New Jersey", "New York", "Pennsylvania", "Delaware"]),
+    "entry_plaza": lambda rng, i: str(rng.randrange(1, 30)),
+    "exit_plaza": lambda rng, i: str(rng.randrange(1, 30)),
+    "route_name": lambda rng, i: rng.choice(["Turnpike", "Parkway", "Atlantic City Expressway"]),
+    "entry_time": lambda rng, i: datetime(2026, 1, 1, tzinfo=timezone.utc) - timedelta(minutes=7 * i),
+    "exit_time": lambda rng, i: datetime(2026, 1, 1, tzinfo=timezone.utc) - timedelta(minutes=7 * i - 25),
+    "vehicle_type_name": lambda rng, i: rng.choice(VEHICLE_TYPES),
+    "amount": lambda rng, i: round(rng.lognormvariate(1.5, 0.8), 2),
+    "distance_miles": lambda rng, i: round(rng.uniform(1, 120), 1),
+    "travel_time_minutes": lambda rng, i: round(rng.uniform(2, 150), 1),
+    "speed_mph": lambda rng, i: round(rng.uniform(15, 95), 1),
+    "is_impossible_travel": lambda rng, i: rng.random() < 0.02,
+    "is_rapid_succession": lambda rng, i: rng.random() < 0.03,
+    "driver_amount_modified_z_score": lambda rng, i: round(rng.gauss(0, 1.5), 3),
+    "route_amount_avg": lambda rng, i: round(rng.uniform(2, 20), 2),
+    "risk_level": lambda rng, i: rng.choice(RISK_LEVELS),
+    "threat_severity": lambda rng, i: rng.choice(RISK_LEVELS),
+    "flag_fraud": lambda rng, i: rng.random() < 0.08,
+    "last_updated": lambda rng, i: datetime(2026, 1, 1, tzinfo=timezone.utc) - timedelta(minutes=3 * i)
+}
+
+# Aggregate aliases whose values are not plain counts
+ALIAS_VALUES = {
+    "category": lambda rng, i: CATEGORIES[i % len(CATEGORIES)],
+    "severity": lambda rng, i: RISK_LEVELS[i % len(RISK_LEVELS)],
+    "month": lambda rng, i: f"2025-{i % 12 + 1:02d}",
+    "year": lambda rng, i: 2025,
+    "month_num": lambda rng, i: i % 12 + 1,
+    "hour": lambda rng, i: i % 24,
+    "watermark": lambda rng, i: datetime(2026, 1, 1, tzinfo=timezone.utc),
+    "changed_at": lambda rng, i: datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i)
+}
+AMOUNT_ALIASES = re.compile(r"amount|loss|score|avg")
+TYPE_NAMES = {"STRING", "INT64", "FLOAT64", "NUMERIC", "BOOL", "DATE", "DATETIME", "TIMESTAMP"}
+GROUPS = 12
+
+
+def _alias_value(name, rng, index):
+    if name in ALIAS_VALUES:
+        return ALIAS_VALUES[name](rng, index)
+    if name in MASTER_VIZ_COLUMNS:
+        return MASTER_VIZ_COLUMNS[name](rng, index)
+    if AMOUNT_ALIASES.search(name):
+        return round(rng.uniform(10, 50000), 2)
+    return rng.randrange(1, 5000)
+
+
+def _slice(rows, start_index, max_results):
+    start = start_index or 0
+    return rows[start:] if max_results is None else rows[start:start + max_results]
+
+
+def _parameters(job_config):
+    parameters = {}
+    for parameter in getattr(job_config, "query_parameters", None) or []:
+        parameters[parameter.name] = getattr(parameter, "value", getattr(parameter, "values", None))
+    return parameters
+
+
+class FakeRowIterator:
+    """RowIterator look-alike: iterable, with schema, pages and total_rows."""
+
+    def __init__(self, rows, page_size=None):
+        self._rows = rows
+        self._iterator = iter(rows)
+        self._page_size = page_size or len(rows) or 1
+        self.total_rows = len(rows)
+        self.schema = [SimpleNamespace(name=name) for name in (rows[0] if rows else {})]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    @property
+    def pages(self):
+        for start in range(0, len(self._rows), self._page_size):
+            yield self._rows[start:start + self._page_size]
+
+
+class FakeJob:
+    """QueryJob look-alike: done()/cancel() for the ASGI poller, a blocking result()."""
+
+    _ids = itertools.count()
+
+    def __init__(self, rows, latency, affected_rows=None):
+        self.job_id = f"fake-{next(self._ids)}"
+        self.destination = f"fake-project._anonymous.{self.job_id}"
+        self._rows = rows
+        self._finishes_at = time.monotonic() + latency
+        self.total_bytes_processed = 512 * len(rows)
+        self.total_bytes_billed = max(10 * 1024 * 1024, self.total_bytes_processed)
+        self.cache_hit = False
+        self.slot_millis = int(latency * 1000)
+        self.num_dml_affected_rows = affected_rows
+
+    def done(self):
+        return time.monotonic() >= self._finishes_at
+
+    def cancel(self):
+        self._finishes_at = 0
+        return True
+
+    def result(self, max_results=None, page_size=None, start_index=None, **kwargs):
+        # Blocking wait, like google-cloud-bigquery's QueryJob.result()
+        time.sleep(max(self._finishes_at - time.monotonic(), 0))
+        return FakeRowIterator(_slice(self._rows, start_index, max_results), page_size)
+
+
+class FakeBigQueryClient:
+    def __init__(self, latency=0.1, jitter=0.0, page_size=100, pool_size=5000, seed=0):
+        """
+        Jobs take `latency` seconds plus up to `jitter` more; row queries
+        return `page_size` rows unless the query's LIMIT is smaller.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.queries = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pool = [
+            {name: generate(self._rng, index) for name, generate in MASTER_VIZ_COLUMNS.items()}
+            for index in range(max(pool_size, page_size))
+        ]
+        self._offset = 0
+        # Destination table -> rows, for list_rows(); only the latest are kept
+        self._results = {}
+        self.list_rows_calls = 0
+        self.dry_runs = 0
+
+    def _next_latency(self):
+        with self._lock:
+            self.queries += 1
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+
+    def _sample(self, count):
+        """`count` consecutive pool rows, rotating so successive queries differ."""
+        with self._lock:
+            start = self._offset
+            self._offset = (self._offset + count) % len(self._pool)
+        return [self._pool[(start + index) % len(self._pool)] for index in range(count)]
+
+    def _row_count(self, query, parameters):
+        limit = re.findall(r"\bLIMIT\s+(\d+|@\w+)", query)
+        if limit:
+            value = limit[-1]
+            value = parameters.get(value[1:]) if value.startswith("@") else int(value)
+            if isinstance(value, int):
+                return min(value, self.page_size)
+        if re.search(r"\bGROUP BY\b", query):
+            return GROUPS
+        if re.search(r"\b(COUNT|SUM|MAX|MIN|AVG)\s*\(", query):
+            return 1
+        return self.page_size
+
+    def _rows(self, query, parameters):
+        ids = parameters.get("transaction_ids") or re.findall(r"transaction_id\s*=\s*'([^']*)'", query)
+        if ids:
+            # Point lookups return the rows asked for
+            return [{"transaction_id": transaction_id, "status": "Needs Review"} for transaction_id in ids]
+
+        count = self._row_count(query, parameters)
+        if re.search(r"SELECT\s+\*\s+FROM\s+(?!UNNEST)", query):
+            return [dict(row) for row in self._sample(count)]
+
+        aliases = [alias for alias in re.findall(r"\bAS\s+([A-Za-z_]\w*)", query) if alias.upper() not in TYPE_NAMES]
+        # Rollup columns (hour, category, ...) are selected without an alias
+        known = list(MASTER_VIZ_COLUMNS) + [name for name in ALIAS_VALUES if name not in MASTER_VIZ_COLUMNS]
+        columns = [name for name in known if re.search(rf"\b{name}\b", query) and name not in aliases]
+        rows = []
+        for index, source in enumerate(self._sample(count)):
+            row = {name: source[name] if name in source else _alias_value(name, self._rng, index) for name in columns}
+            row.update({alias: _alias_value(alias, self._rng, index) for alias in aliases})
+            rows.append(row)
+        return rows
+
+    def query(self, query, job_config=None, **kwargs):
+        if getattr(job_config, "dry_run", False):
+            with self._lock:
+                self.dry_runs += 1
+            job = FakeJob([], 0)
+            job.total_bytes_processed = 512 * self.page_size
+            return job
+        latency = self._next_latency()
+        parameters = _parameters(job_config)
+        statement = query.lstrip().split(None, 1)[0].upper()
+        if statement in ("UPDATE", "MERGE", "INSERT", "DELETE"):
+            updates = parameters.get("updates")
+            return FakeJob([], latency, affected_rows=len(updates) if updates else 1)
+        job = FakeJob(self._rows(query, parameters), latency)
+        with self._lock:
+            self._results[job.destination] = job._rows
+            while len(self._results) > 1024:
+                del self._results[next(iter(self._results))]
+        return job
+
+    def list_rows(self, table, start_index=None, max_results=None, page_size=None, **kwargs):
+        # tabledata.list: a plain read, far cheaper than a job
+        with self._lock:
+            self.list_rows_calls += 1
+            rows = self._results.get(table, [])
+        return FakeRowIterator(_slice(rows, start_index, max_results), page_size)
+
+    def insert_rows_json(self, table_id, rows, **kwargs):
+        time.sleep(self._next_latency())
+        return []
+
+    def get_table(self, table_id):
+        return SimpleNamespace(
+            table_id=table_id,
+            modified=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            num_rows=len(self._pool),
+            streaming_buffer=None,
+            schema=[SimpleNamespace(name=name) for name in MASTER_VIZ_COLUMNS]
+        )
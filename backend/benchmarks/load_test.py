@@ -0,0 +1,180 @@
+"""Load test: every API route against a latency-injecting BigQuery stand-in.
+
+app.client is replaced by FakeBigQueryClient (see fake_bigquery.py), which
+serves synthetic master_viz rows after --latency seconds per job. Each route
+then gets --requests requests at --concurrency, one route at a time, and the
+report shows throughput, p50/p99 latency, mean response size and errors per
+route. Use it to compare serialization, caching and concurrency changes
+offline; --json writes the numbers for diffing between runs.
+
+/api/alerts/stream is left out: it is one long-lived connection per
+dashboard, not a request/response route.
+
+Run from backend/:
+    python benchmarks/load_test.py --requests 200 --concurrency 32 --latency 0.2
+    python benchmarks/load_test.py --mode asgi --no-cache --routes /api/metrics /api/dashboard
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+import asgi  # noqa: E402
+from fake_bigquery import FakeBigQueryClient  # noqa: E402
+
+# (method, path with query string, JSON body)
+ROUTES = [
+    ("GET", "/api/transactions?limit=50", None),
+    ("GET", "/api/transactions?limit=50&search=TXN00000001&status=Needs%20Review", None),
+    ("GET", "/api/transactions?limit=50&page=2", None),
+    ("GET", "/api/transactions/count", None),
+    ("GET", "/api/transactions/count?approx=true&status=Needs%20Review", None),
+    ("GET", "/api/transactions/export?format=csv", None),
+    ("GET", "/api/transactions/export?format=ndjson", None),
+    ("GET", "/api/transactions/alerts", None),
+    ("GET", "/api/transactions/TXN0000000001", None),
+    ("GET", "/api/transactions/recent-flagged", None),
+    ("GET", "/api/metrics", None),
+    ("GET", "/api/charts/category", None),
+    ("GET", "/api/charts/severity", None),
+    ("GET", "/api/charts/monthly", None),
+    ("GET", "/api/charts/scatter", None),
+    ("GET", "/api/charts/scatter?mode=hexbin", None),
+    ("GET", "/api/charts/timeseries", None),
+    ("GET", "/api/dashboard", None),
+    ("GET", "/api/table-info", None),
+    ("POST", "/api/transactions/update-status", {"transactionId": "TXN0000000001", "newStatus": "Investigating"}),
+    ("POST", "/api/transactions/update-status/bulk", {"updates": [
+        {"transactionId": f"TXN{i:010d}", "newStatus": "Resolved - Not Fraud"} for i in range(50)
+    ]}),
+    ("GET", "/metrics", None),
+    ("GET", "/api/_stats", None)
+]
+
+
+def percentile(ordered, quantile):
+    return ordered[min(int(len(ordered) * quantile), len(ordered) - 1)]
+
+
+def summarize(route, results, elapsed):
+    latencies = sorted(latency for latency, _, _ in results)
+    return {
+        "route": route,
+        "requests": len(results),
+        "errors": sum(status >= 400 for _, status, _ in results),
+        "requests_per_second": len(results) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_bytes": sum(size for _, _, size in results) / len(results)
+    }
+
+
+def run_sync(method, path, body, requests, concurrency, workers):
+    """Flask test client behind `workers` threads, like gunicorn sync workers."""
+    flask_client = app_module.app.test_client()
+    slots = ThreadPoolExecutor(max_workers=workers)
+
+    def call():
+        response = flask_client.open(path, method=method, json=body)
+        return response.status_code, len(response.get_data())
+
+    def one_request():
+        started = time.perf_counter()
+        # A request holds a worker for its whole duration
+        status, size = slots.submit(call).result()
+        return time.perf_counter() - started, status, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        results = list(clients.map(lambda _: one_request(), range(requests)))
+    slots.shutdown()
+    return results, time.perf_counter() - started
+
+
+async def run_asgi(method, path, body, requests, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    payload = json.dumps(body).encode() if body is not None else b""
+    route, _, query_string = path.partition("?")
+    headers = [(b"content-type", b"application/json")] if body is not None else []
+
+    async def one_request():
+        async with limit:
+            started = time.perf_counter()
+            received = [{"type": "http.request", "body": payload, "more_body": False}]
+            response = {"status": 0, "size": 0}
+
+            async def receive():
+                if received:
+                    return received.pop()
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                else:
+                    response["size"] += len(message.get("body", b""))
+
+            scope = {"type": "http", "method": method, "path": route,
+                     "query_string": query_string.encode(), "headers": headers}
+            await asgi.application(scope, receive, send)
+            return time.perf_counter() - started, response["status"], response["size"]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one_request() for _ in range(requests)))
+    return results, time.perf_counter() - started
+
+
+def print_report(summaries):
+    print(f"{'route':<72} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'bytes':>9} {'errors':>7}")
+    for summary in summaries:
+        print(f"{summary['route']:<72} {summary['requests_per_second']:9.1f} {summary['p50_ms']:9.1f} "
+              f"{summary['p99_ms']:9.1f} {summary['mean_bytes']:9.0f} {summary['errors']:7d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("sync", "asgi"), default="sync")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sync-workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per BigQuery job")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per job, up to")
+    parser.add_argument("--page-size", type=int, default=100, help="rows per row-returning query")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--routes", nargs="*", help="only routes whose path starts with one of these")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    fake = FakeBigQueryClient(latency=args.latency, jitter=args.jitter, page_size=args.page_size)
+    app_module.client = fake
+    app_module.TABLE_NAME = "master_viz"
+    if args.no_cache:
+        app_module.query_cache.get = lambda key: None
+
+    routes = [route for route in ROUTES if not args.routes or route[1].startswith(tuple(args.routes))]
+    print(f"{args.mode}: {args.requests} requests per route, {args.concurrency} concurrent, "
+          f"{args.latency}s per query, {args.page_size} rows per page")
+
+    summaries = []
+    # One event loop for every route; the ASGI job poller is bound to it
+    loop = asyncio.new_event_loop()
+    for method, path, body in routes:
+        app_module.query_cache.invalidate()
+        if args.mode == "sync":
+            results, elapsed = run_sync(method, path, body, args.requests, args.concurrency, args.sync_workers)
+        else:
+            results, elapsed = loop.run_until_complete(run_asgi(method, path, body, args.requests, args.concurrency))
+        summaries.append(summarize(f"{method} {path}"[:72], results, elapsed))
+    print_report(summaries)
+    print(f"{fake.queries} BigQuery jobs, {fake.dry_runs} dry runs, {fake.list_rows_calls} result-table reads")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "routes": summaries}, f, indent=2)
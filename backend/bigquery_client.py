@@ -0,0 +1,69 @@
+"""Lazily created, per-process query clients.
+
+The client used to be built when app.py was imported: the service-account
+JSON was written to a temp file and a bigquery.Client constructed, so every
+test import and every worker paid for credentials and HTTP setup, and a
+client created before a fork was shared by the forked workers. LazyClient
+builds the client on first use instead, once per process (it notices a fork
+by the pid changing).
+
+BigQuery clients get a keep-alive HTTP session whose connection pool is sized
+for the number of queries a worker runs at once; the requests default of 10
+connections makes dashboard fan-out and ASGI requests queue for a socket.
+"""
+import json
+import os
+import threading
+import time
+
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import bigquery
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+
+
+def create_bigquery_client(key_json, pool_size):
+    """bigquery.Client for a service-account key (JSON string) with a sized connection pool."""
+    credentials = service_account.Credentials.from_service_account_info(
+        json.loads(key_json),
+        scopes=["https://www.googleapis.com/auth/cloud-platform"]
+    )
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return bigquery.Client(project=credentials.project_id, credentials=credentials, _http=session)
+
+
+class LazyClient:
+    """Proxy that creates the real client on first attribute access, once per process."""
+
+    def __init__(self, factory, on_create=None):
+        """`on_create(seconds)` is called after each client is built."""
+        self._factory = factory
+        self._on_create = on_create
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.init_seconds = None
+
+    def get(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    started = time.perf_counter()
+                    self._client = self._factory()
+                    self._pid = os.getpid()
+                    self.init_seconds = time.perf_counter() - started
+                    if self._on_create is not None:
+                        self._on_create(self.init_seconds)
+        return self._client
+
+    @property
+    def initialized(self):
+        return self._client is not None and self._pid == os.getpid()
+
+    def __getattr__(self, name):
+        # Introspection (mock.patch, copy, inspect) must not build a client
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
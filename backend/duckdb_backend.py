@@ -0,0 +1,159 @@
+"""Local DuckDB query backend over a Parquet snapshot of the BigQuery tables.
+
+DuckDBClient implements the small part of the bigquery.Client interface that
+app.py uses (`client.query(sql, job_config=...).result()`), so every endpoint
+runs unchanged against local files. Each `<name>.parquet` file (or
+`<name>/*.parquet` directory) in the data directory becomes a view named
+`<name>`, and the BigQuery-specific bits of our SQL are translated on the fly.
+
+The backend is read-only: status updates need the BigQuery backend.
+
+Create a snapshot with:
+    python duckdb_backend.py snapshot master_viz dashboard_rollup --out data --limit 100000
+"""
+import argparse
+import os
+import re
+import threading
+
+# Functions BigQuery has and DuckDB lacks (or names differently)
+MACROS = [
+    "CREATE OR REPLACE MACRO format_date(fmt, d) AS strftime(d, fmt)",
+    "CREATE OR REPLACE MACRO farm_fingerprint(s) AS hash(s)",
+    "CREATE OR REPLACE MACRO div(a, b) AS a // b"
+]
+
+TABLE_REF = re.compile(r"`[^`]*?\.([A-Za-z0-9_]+)`")
+STRUCT_LITERAL = re.compile(r"STRUCT\(([^()]*)\)")
+ALIASED_UNNEST = re.compile(r"UNNEST\((\[[^\]]*\])\)\s+AS\s+(\w+)")
+IN_UNNEST = re.compile(r"IN\s+UNNEST\((@\w+)\)")
+PARAMETER = re.compile(r"@(\w+)")
+
+
+def _struct_to_duckdb(match):
+    fields = []
+    for field in match.group(1).split(","):
+        expression, _, name = field.strip().rpartition(" AS ")
+        fields.append(f"'{name.strip()}': {expression.strip()}")
+    return "{" + ", ".join(fields) + "}"
+
+
+def translate_sql(sql):
+    """Rewrite the BigQuery dialect used by app.py into DuckDB SQL."""
+    sql = TABLE_REF.sub(r'"\1"', sql)
+    sql = STRUCT_LITERAL.sub(_struct_to_duckdb, sql)
+    # BigQuery exposes the struct through the alias, DuckDB through a column alias
+    sql = ALIASED_UNNEST.sub(r"UNNEST(\1) AS _\2(\2)", sql)
+    sql = IN_UNNEST.sub(r"IN (SELECT UNNEST(\1))", sql)
+    sql = re.sub(r"\bFLOAT64\b", "DOUBLE", sql)
+    return PARAMETER.sub(r"$\1", sql)
+
+
+def _parameter_value(param):
+    if hasattr(param, "struct_values"):
+        return {name: value for name, value in param.struct_values.items()}
+    if hasattr(param, "values"):
+        return [_parameter_value(value) if hasattr(value, "struct_values") else value for value in param.values]
+    return param.value
+
+
+class SchemaField:
+    def __init__(self, name):
+        self.name = name
+
+
+class DuckDBRowIterator:
+    """Iterable of dict rows, with `schema` and `pages` like a BigQuery RowIterator."""
+
+    def __init__(self, cursor, page_size=None):
+        self._cursor = cursor
+        self._page_size = page_size or 10000
+        self.schema = [SchemaField(column[0]) for column in cursor.description or []]
+        self._columns = [field.name for field in self.schema]
+        self._rows = None
+
+    @property
+    def pages(self):
+        while True:
+            batch = self._cursor.fetchmany(self._page_size)
+            if not batch:
+                return
+            yield [dict(zip(self._columns, values)) for values in batch]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._rows is None:
+            self._rows = (row for page in self.pages for row in page)
+        return next(self._rows)
+
+
+class DuckDBQueryJob:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.job_id = None
+
+    def result(self, page_size=None, timeout=None, **kwargs):
+        return DuckDBRowIterator(self._cursor, page_size)
+
+
+class DuckDBClient:
+    def __init__(self, data_dir):
+        import duckdb
+
+        self.data_dir = data_dir
+        self._connection = duckdb.connect()
+        self._lock = threading.Lock()
+        for macro in MACROS:
+            self._connection.execute(macro)
+        self._register_views()
+
+    def _register_views(self):
+        for entry in sorted(os.listdir(self.data_dir)):
+            path = os.path.join(self.data_dir, entry)
+            if entry.endswith(".parquet"):
+                name, source = entry[:-len(".parquet")], path
+            elif os.path.isdir(path):
+                name, source = entry, os.path.join(path, "*.parquet")
+            else:
+                continue
+            source = source.replace("'", "''")
+            self._connection.execute(f"CREATE OR REPLACE VIEW \"{name}\" AS SELECT * FROM read_parquet('{source}')")
+
+    def query(self, query, job_config=None, **kwargs):
+        params = {
+            param.name: _parameter_value(param)
+            for param in (getattr(job_config, "query_parameters", None) or [])
+        }
+        # One cursor per query: DuckDB connections are not safe to share across threads
+        with self._lock:
+            cursor = self._connection.cursor()
+        cursor.execute(translate_sql(query), params or None)
+        return DuckDBQueryJob(cursor)
+
+
+def snapshot(table_names, out_dir, limit=None, dataset="njc-ezpass.ezpass_data"):
+    """Download BigQuery tables to <out_dir>/<table>.parquet (needs pyarrow)."""
+    import pyarrow.parquet as pq
+    from google.cloud import bigquery
+
+    client = bigquery.Client()
+    os.makedirs(out_dir, exist_ok=True)
+    for table_name in table_names:
+        rows = client.list_rows(f"{dataset}.{table_name}", max_results=limit)
+        path = os.path.join(out_dir, f"{table_name}.parquet")
+        pq.write_table(rows.to_arrow(), path)
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DuckDB backend utilities")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    snapshot_parser = subcommands.add_parser("snapshot", help="Download tables as Parquet")
+    snapshot_parser.add_argument("tables", nargs="+")
+    snapshot_parser.add_argument("--out", default="data")
+    snapshot_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    snapshot(args.tables, args.out, args.limit)
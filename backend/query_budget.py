@@ -0,0 +1,61 @@
+"""Per-endpoint BigQuery budgets: bytes billed, run time and dry-run checks.
+
+Every job an endpoint starts carries the endpoint's `maximum_bytes_billed`
+and `job_timeout_ms`, so BigQuery itself refuses a query that would scan
+more than the budget (before billing anything) and cancels one that runs
+too long, in the WSGI and ASGI modes alike. Endpoints whose cost depends on
+user input (wildcard searches, exports, the scatter sample) can also dry-run
+each query first, turning an over-budget query into an error before it
+takes a slot.
+
+The views catch every exception and answer 500; `error_status` tells which
+of those failures were budgets, so app.py can answer 429 (too many bytes:
+narrow the request) or 503 (out of time: retry later) instead.
+"""
+from collections import namedtuple
+
+from async_jobs import QueryDeadlineExceeded
+
+# None means the global default; dry_run checks the estimate before running
+QueryBudget = namedtuple("QueryBudget", ["max_bytes_billed", "timeout_seconds", "dry_run"], defaults=[None, None, False])
+
+# BigQuery error reasons (job errorResult / API errors) for each budget
+BYTES_REASONS = ("bytesBilledLimitExceeded",)
+TIMEOUT_REASONS = ("timeout", "jobTimeout")
+
+
+class QueryBudgetExceeded(Exception):
+    """A dry run estimated more bytes than the endpoint may bill."""
+
+
+def apply_budget(job_config, max_bytes_billed, timeout_seconds):
+    """Set the budget on `job_config` (in place) unless the caller already did; 0 means no limit."""
+    if max_bytes_billed and job_config.maximum_bytes_billed is None:
+        job_config.maximum_bytes_billed = int(max_bytes_billed)
+    if timeout_seconds and job_config.job_timeout_ms is None:
+        job_config.job_timeout_ms = int(timeout_seconds * 1000)
+    return job_config
+
+
+def check_estimate(estimated_bytes, max_bytes_billed):
+    """Raise QueryBudgetExceeded if a dry run's estimate is over the limit."""
+    if not isinstance(estimated_bytes, int) or not max_bytes_billed:
+        return
+    if estimated_bytes > max_bytes_billed:
+        raise QueryBudgetExceeded(
+            f"Query would process {estimated_bytes} bytes, over this endpoint's limit of "
+            f"{int(max_bytes_billed)}; narrow the date range or filters"
+        )
+
+
+def _reasons(error):
+    return {item.get("reason") for item in getattr(error, "errors", None) or [] if isinstance(item, dict)}
+
+
+def error_status(error):
+    """429 for a bytes budget, 503 for a time budget, None for any other failure."""
+    if isinstance(error, QueryBudgetExceeded) or _reasons(error) & set(BYTES_REASONS):
+        return 429
+    if isinstance(error, QueryDeadlineExceeded) or _reasons(error) & set(TIMEOUT_REASONS):
+        return 503
+    return None
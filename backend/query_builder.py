@@ -0,0 +1,390 @@
+"""Parameterized SQL for the transaction listing, count and export endpoints.
+
+User input never ends up in the SQL text: search, status, category, date range,
+cursor and paging values are all bound as query parameters. The SQL therefore depends only
+on the *shape* of the filters (which ones are set), so each shape is compiled
+once and reused, and BigQuery's result cache can hit on repeated requests.
+"""
+import re
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+from google.cloud import bigquery
+
+# Column holding the risk category for each supported table
+CATEGORY_COLUMNS = {
+    "master_viz": "ml_predicted_category",
+    "gold_automation": "threat_severity"
+}
+
+# Risk category values (ml_predicted_category from _pred__quantile, plus the
+# threat_severity levels); the n-gram index only covers ids and plates, so
+# terms matching any of these use the plain scan
+RISK_CATEGORIES = ("critical risk", "high risk", "medium risk", "low risk", "no risk")
+
+NGRAM_SIZE = 3
+
+# Columns the transactions table in App.js renders (master_viz and
+# gold_automation variants); the default projection of /api/transactions
+LISTING_FIELDS = (
+    "transaction_id", "transaction_date", "posting_date", "tag_plate_number", "status",
+    "is_anomaly", "rule_based_score", "ml_predicted_score", "ml_predicted_category",
+    "flag_fraud", "threat_severity", "agency", "agency_name", "route_name", "route_instate",
+    "state_name", "entry_plaza", "entry_plaza_name", "entry_lane", "exit_plaza", "exit_plaza_name",
+    "exit_lane", "entry_time", "exit_time", "vehicle_type_code", "vehicle_type_name", "plan_rate",
+    "fare_type", "amount", "distance_miles", "travel_time_minutes", "speed_mph", "is_impossible_travel",
+    "is_rapid_succession", "travel_time_category", "flag_vehicle_type", "flag_amount_gt_29",
+    "flag_is_out_of_state", "flag_rush_hour", "flag_is_weekend", "flag_is_holiday",
+    "flag_overlapping_journey", "flag_driver_amount_outlier", "flag_route_amount_outlier",
+    "flag_amount_unusually_high", "flag_driver_spend_spike", "prediction_timestamp", "last_updated"
+)
+
+# Columns of an alert card; the default projection of /api/transactions/alerts
+ALERT_FIELDS = (
+    "transaction_id", "transaction_date", "tag_plate_number", "agency", "amount", "status",
+    "ml_predicted_category", "threat_severity", "is_anomaly", "flag_fraud"
+)
+
+# Keyset cursors are built from these, so they are always selected
+CURSOR_FIELDS = ("transaction_date", "transaction_id")
+
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+TransactionFilters = namedtuple(
+    "TransactionFilters", ["search", "status", "category", "start_date", "end_date", "search_mode"],
+    defaults=[None, None, "substring"]
+)
+
+
+def parse_date_window(args, default_start=None):
+    """
+    (start_date, end_date) of the transaction_date window for a request.
+    Both must be ISO dates (YYYY-MM-DD), otherwise ValueError. A missing
+    start_date falls back to `default_start`; start_date=all asks for no
+    lower bound. Either end may be None (unbounded).
+    """
+    def date_value(name, default):
+        raw = args.get(name, '').strip()
+        if raw == 'all':
+            return None
+        if not raw:
+            return default
+        try:
+            return date.fromisoformat(raw)
+        except ValueError:
+            raise ValueError(f"Invalid {name}, expected YYYY-MM-DD")
+
+    start_date = date_value('start_date', default_start)
+    end_date = date_value('end_date', None)
+    if start_date and end_date and start_date > end_date:
+        raise ValueError("start_date must not be after end_date")
+    return start_date, end_date
+
+
+def window_conditions(start_date, end_date):
+    """
+    SQL conditions and query parameters for a transaction_date window.
+    Plain comparisons on the partition column, so BigQuery prunes every
+    partition outside the window (master_viz and dashboard_rollup alike).
+    """
+    conditions, params = [], []
+    if start_date:
+        conditions.append("transaction_date >= @start_date")
+        params.append(bigquery.ScalarQueryParameter("start_date", "DATE", start_date))
+    if end_date:
+        conditions.append("transaction_date <= @end_date")
+        params.append(bigquery.ScalarQueryParameter("end_date", "DATE", end_date))
+    return conditions, params
+
+
+def parse_filters(args, default_start=None):
+    """
+    Normalize search/status/category request args; '' and 'all' mean unset.
+    start_date/end_date are parsed by parse_date_window, with `default_start`.
+    match=exact looks the search term up as a whole transaction_id or plate.
+    """
+    def value(name):
+        raw = args.get(name, '').strip()
+        return raw if raw and raw != 'all' else None
+
+    search_mode = args.get('match', 'substring').strip().lower()
+    if search_mode not in ("substring", "exact"):
+        raise ValueError("Invalid match, expected substring or exact")
+
+    start_date, end_date = parse_date_window(args, default_start)
+    return TransactionFilters(
+        search=value('search'),
+        status=value('status'),
+        category=value('category'),
+        start_date=start_date,
+        end_date=end_date,
+        search_mode=search_mode
+    )
+
+
+def parse_fields(raw, available, default):
+    """
+    Columns to select for a `fields=` request arg: the comma-separated names
+    in `raw`, each of which must be in `available` (the table's columns), or
+    `default` limited to `available` when `raw` is empty. None means every
+    column: `fields=*`, or no schema to build the default from. Unknown
+    names raise ValueError.
+    """
+    raw = (raw or "").strip()
+    if raw == "*":
+        return None
+    if not raw:
+        if available is None:
+            return None
+        return tuple(column for column in default if column in available) or None
+
+    requested = tuple(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    if available is None:
+        # Without a schema, at least never put anything but identifiers in the SQL
+        unknown = [name for name in requested if not FIELD_NAME.match(name)]
+    else:
+        unknown = [name for name in requested if name not in available]
+    if unknown or not requested:
+        raise ValueError(f"Unknown fields: {', '.join(unknown) or raw}")
+    return requested
+
+
+def select_list(fields):
+    return ", ".join(fields) if fields else "*"
+
+
+def ngrams(term):
+    """Distinct lowercase n-grams of a search term, as stored in search_ngrams."""
+    term = term.lower()
+    return sorted({term[i:i + NGRAM_SIZE] for i in range(len(term) - NGRAM_SIZE + 1)})
+
+
+def _search_kind(filters, search_index):
+    """
+    How the search term is matched:
+    exact  - equality on transaction_id / tag_plate_number (clustered columns)
+    ngram  - candidate ids from the search_ngrams index, then the LIKE check
+    like   - LIKE scan over id, plate and category
+    """
+    if not filters.search:
+        return None
+    if filters.search_mode == "exact":
+        return "exact"
+    term = filters.search.lower()
+    if search_index and len(term) >= NGRAM_SIZE and not any(term in category for category in RISK_CATEGORIES):
+        return "ngram"
+    return "like"
+
+
+@lru_cache(maxsize=64)
+def _where_clause(table_name, search_kind, search_index, has_status, has_category, cursor_kind, has_start, has_end):
+    category_column = CATEGORY_COLUMNS.get(table_name, "threat_severity")
+    conditions = []
+
+    if search_kind == "exact":
+        # Plain equality lets BigQuery prune on the tag_plate_number clustering.
+        # Ids are lowercase hex digests and plates uppercase, so try both cases
+        conditions.append(
+            "(transaction_id IN (@search, LOWER(@search)) OR tag_plate_number IN (@search, UPPER(@search)))"
+        )
+
+    elif search_kind == "ngram":
+        # Every n-gram of the term must belong to the transaction; the LIKE
+        # below then only runs on those candidates and removes false positives.
+        # master_viz is not clustered on transaction_id, so the semi-join cuts
+        # rows, not bytes: partitions are only pruned by start_date/end_date
+        conditions.append(f"""transaction_id IN (
+            SELECT transaction_id
+            FROM {search_index}
+            WHERE ngram IN UNNEST(@ngrams)
+            GROUP BY transaction_id
+            HAVING COUNT(DISTINCT ngram) = @ngram_count
+        )""")
+        conditions.append(
+            "(LOWER(COALESCE(CAST(transaction_id AS STRING), '')) LIKE CONCAT('%', @search, '%')"
+            " OR LOWER(COALESCE(tag_plate_number, '')) LIKE CONCAT('%', @search, '%'))"
+        )
+
+    elif search_kind == "like":
+        # Handle NULL values properly in BigQuery using COALESCE
+        conditions.append(
+            "(LOWER(COALESCE(CAST(transaction_id AS STRING), '')) LIKE CONCAT('%', @search, '%')"
+            " OR LOWER(COALESCE(tag_plate_number, '')) LIKE CONCAT('%', @search, '%')"
+            f" OR LOWER(COALESCE(CAST({category_column} AS STRING), '')) LIKE CONCAT('%', @search, '%'))"
+        )
+
+    if has_status:
+        conditions.append("status = @status")
+
+    if has_category:
+        conditions.append(f"LOWER({category_column}) = LOWER(@category)")
+
+    # Plain comparisons on the partition column so BigQuery can prune
+    if has_start:
+        conditions.append("transaction_date >= @start_date")
+
+    if has_end:
+        conditions.append("transaction_date <= @end_date")
+
+    # NULL dates sort last in DESC order, so they follow every dated row
+    if cursor_kind == "date":
+        # Standalone upper bound on the partition column lets BigQuery prune
+        # every newer partition before applying the exact seek predicate
+        conditions.append("(transaction_date <= @cursor_date OR transaction_date IS NULL)")
+        conditions.append(
+            "(transaction_date IS NULL OR transaction_date < @cursor_date OR (transaction_date = @cursor_date"
+            " AND CAST(transaction_id AS STRING) < @cursor_id))"
+        )
+
+    elif cursor_kind == "null":
+        # Already in the trailing NULL-date rows
+        conditions.append("transaction_date IS NULL AND CAST(transaction_id AS STRING) < @cursor_id")
+
+    return "WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+def _filter_parameters(filters, cursor, search_index):
+    params = []
+    search_kind = _search_kind(filters, search_index)
+    if search_kind == "exact":
+        params.append(bigquery.ScalarQueryParameter("search", "STRING", filters.search))
+    elif search_kind:
+        params.append(bigquery.ScalarQueryParameter("search", "STRING", filters.search.lower()))
+    if search_kind == "ngram":
+        term_ngrams = ngrams(filters.search)
+        params.append(bigquery.ArrayQueryParameter("ngrams", "STRING", term_ngrams))
+        params.append(bigquery.ScalarQueryParameter("ngram_count", "INT64", len(term_ngrams)))
+    if filters.status:
+        params.append(bigquery.ScalarQueryParameter("status", "STRING", filters.status))
+    if filters.category:
+        params.append(bigquery.ScalarQueryParameter("category", "STRING", filters.category))
+    params += window_conditions(filters.start_date, filters.end_date)[1]
+    if cursor:
+        cursor_date, cursor_id = cursor
+        if cursor_date is not None:
+            params.append(bigquery.ScalarQueryParameter("cursor_date", "DATE", cursor_date))
+        params.append(bigquery.ScalarQueryParameter("cursor_id", "STRING", cursor_id))
+    return params
+
+
+def _cursor_kind(cursor):
+    if cursor is None:
+        return None
+    return "null" if cursor[0] is None else "date"
+
+
+def _where(table_name, filters, cursor, search_index):
+    search_kind = _search_kind(filters, search_index)
+    return _where_clause(
+        table_name,
+        search_kind,
+        search_index if search_kind == "ngram" else None,
+        filters.status is not None,
+        filters.category is not None,
+        _cursor_kind(cursor),
+        filters.start_date is not None,
+        filters.end_date is not None
+    )
+
+
+@lru_cache(maxsize=64)
+def _listing_template(table, where_clause, keyset, with_total, fields):
+    total_column = ", COUNT(*) OVER() AS total_count" if with_total else ""
+    if keyset:
+        order_and_page = "ORDER BY transaction_date DESC NULLS LAST, CAST(transaction_id AS STRING) DESC\n        LIMIT @limit"
+    else:
+        order_and_page = "ORDER BY transaction_date DESC\n        LIMIT @limit\n        OFFSET @offset"
+    return f"""
+        SELECT {select_list(fields)}{total_column}
+        FROM {table}
+        {where_clause}
+        {order_and_page}
+        """
+
+
+@lru_cache(maxsize=64)
+def _count_template(table, where_clause):
+    return f"""
+        SELECT COUNT(*) AS total
+        FROM {table}
+        {where_clause}
+        """
+
+
+@lru_cache(maxsize=64)
+def _export_template(table, where_clause, ordered):
+    # A global sort over the whole export runs in a single final stage and holds
+    # back the first row until it finishes, so it is only done on request
+    order_by = "ORDER BY transaction_date DESC" if ordered else ""
+    return f"""
+        SELECT *
+        FROM {table}
+        {where_clause}
+        {order_by}
+        """
+
+
+def listing_query(table, table_name, filters, limit, offset=0, cursor=None, keyset=False, with_total=False, search_index=None, fields=None):
+    """
+    SQL and parameters for one page of transactions.
+    With keyset=True rows are ordered by (transaction_date, transaction_id) and
+    `cursor` is the decoded (date, id) to seek past; date is None for rows
+    without a transaction_date, which come after all dated rows. With with_total=True every
+    row carries `total_count`, the size of the filtered set, from the same job.
+    `search_index` is the search_ngrams table to use for substring search, if any.
+    `fields` are the columns to select (see parse_fields); None selects all.
+    """
+    if fields and keyset:
+        fields = fields + tuple(column for column in CURSOR_FIELDS if column not in fields)
+    sql = _listing_template(table, _where(table_name, filters, cursor, search_index), keyset, with_total, fields)
+    params = _filter_parameters(filters, cursor, search_index)
+    params.append(bigquery.ScalarQueryParameter("limit", "INT64", limit))
+    if not keyset:
+        params.append(bigquery.ScalarQueryParameter("offset", "INT64", offset))
+    return sql, params
+
+
+def count_query(table, table_name, filters, search_index=None):
+    """SQL and parameters for the filtered row count."""
+    sql = _count_template(table, _where(table_name, filters, None, search_index))
+    return sql, _filter_parameters(filters, None, search_index)
+
+
+@lru_cache(maxsize=16)
+def _rollup_count_template(rollup_table, has_status, has_category, has_start, has_end):
+    conditions = ["rollup_type = 'total'"]
+    if has_status:
+        conditions.append("status = @status")
+    if has_category:
+        conditions.append("LOWER(risk_category) = LOWER(@category)")
+    if has_start:
+        conditions.append("transaction_date >= @start_date")
+    if has_end:
+        conditions.append("transaction_date <= @end_date")
+    return f"""
+        SELECT IFNULL(SUM(transaction_count), 0) AS total
+        FROM {rollup_table}
+        WHERE {" AND ".join(conditions)}
+        """
+
+
+def rollup_count_query(rollup_table, filters):
+    """
+    SQL and parameters for the filtered row count from dashboard_rollup, or
+    None if the filters need the fact table (a search term). The rollup is
+    as of the last dbt build, so status counts miss newer status changes.
+    """
+    if filters.search:
+        return None
+    sql = _rollup_count_template(
+        rollup_table, filters.status is not None, filters.category is not None,
+        filters.start_date is not None, filters.end_date is not None
+    )
+    return sql, _filter_parameters(filters, None, None)
+
+
+def export_query(table, table_name, filters, search_index=None, ordered=False):
+    """SQL and parameters for every row matching the filters; newest first if `ordered`."""
+    sql = _export_template(table, _where(table_name, filters, None, search_index), ordered)
+    return sql, _filter_parameters(filters, None, search_index)
@@ -0,0 +1,43 @@
+"""In-process read-through cache for dashboard query results.
+
+Entries are bounded by both a TTL and a maximum size; once full, the least
+recently used entry is evicted first. The cache is shared by all request
+threads in a worker process, so every access goes through a lock.
+"""
+import threading
+
+from cachetools import TTLCache
+
+
+class QueryCache:
+    """Thread-safe TTL + LRU cache keyed by arbitrary hashable tuples."""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.enabled = maxsize > 0 and ttl > 0
+        self._cache = TTLCache(maxsize=max(maxsize, 1), ttl=max(ttl, 1))
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after a write to the underlying table."""
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
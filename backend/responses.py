@@ -0,0 +1,86 @@
+"""Response encoding: fast JSON serialization and gzip/brotli compression.
+
+orjson and brotli are pinned in requirements.txt but still imported
+optionally: without them the stock json encoder and gzip are used and the
+payloads carry the same values.
+"""
+import gzip
+from collections.abc import Mapping
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson-backed JSON provider. Dates, datetimes, Decimals etc. still go
+    through Flask's default(), so values serialize as with the stock provider.
+    Query result rows (any mapping) can be passed to jsonify as they are.
+    """
+
+    def default(self, o):
+        # bigquery.Row and other read-only mappings
+        if isinstance(o, Mapping) or (hasattr(o, "keys") and hasattr(o, "items")):
+            return dict(o.items())
+        return super().default(o)
+
+    def _orjson_option(self, indent=None):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # orjson output is always compact; separators add nothing
+        kwargs.pop("separators", None)
+        if orjson is None or set(kwargs) - {"indent"}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option(kwargs.get("indent"))).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def compress_response(response, accept_encoding, min_bytes):
+    """Compress a buffered 2xx response in place with br or gzip if the client accepts it."""
+    if (response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or "Content-Encoding" in response.headers):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+
+    if brotli is not None and "br" in accept_encoding:
+        encoding, body = "br", brotli.compress(data, quality=5)
+    elif "gzip" in accept_encoding:
+        encoding, body = "gzip", gzip.compress(data, compresslevel=6)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+
+    # Each encoding is its own representation, so its strong ETag must differ
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
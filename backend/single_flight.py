@@ -0,0 +1,55 @@
+"""Single-flight coalescing of identical in-flight calls.
+
+When a dashboard opens for a whole team at once, dozens of identical
+requests arrive within the same second. The query cache cannot help until
+the first of them has finished, so each would start its own BigQuery job.
+SingleFlight lets the first caller for a key run the call while later callers
+with the same key wait for its result, so a burst costs one job. Nothing is
+kept once the call returns; that is the query cache's job.
+
+Callers share the leader's outcome, including its exception.
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe: concurrent do() calls with equal keys run `function` once."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """Returns (result, shared); shared is True if another caller ran it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = function()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,74 @@
+"""Write-behind queue that coalesces status updates into one DML job.
+
+Updates submitted within `window_seconds` of the first pending one are
+flushed together. Every update carries the status it was validated against,
+and the flush only applies it if the row still has that status, so two
+conflicting updates to the same transaction cannot both succeed (with the
+status event table, only within one worker process; see
+app.append_status_events). Only the
+first pending update per transaction goes into a batch; later ones wait for
+the next batch and are checked against its outcome.
+
+Every caller gets a Future that resolves to True once its update has been
+written, or False if the row no longer had the expected status, so request
+handlers can still report success or failure synchronously.
+"""
+import threading
+from concurrent.futures import Future
+
+
+class StatusWriteQueue:
+    def __init__(self, flush, window_seconds):
+        """
+        `flush` receives {transaction_id: (new_status, expected_status)} and
+        returns the set of transaction ids it actually updated.
+        """
+        self._flush = flush
+        self._window = window_seconds
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self._window, self.drain)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def submit(self, transaction_id, new_status, expected_status=None):
+        future = Future()
+        with self._lock:
+            self._pending.setdefault(transaction_id, []).append((new_status, expected_status, future))
+            self._schedule()
+        return future
+
+    def drain(self):
+        """Flush the first pending update of every transaction (also called by the timer)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            batch = {}
+            for transaction_id, updates in pending.items():
+                batch[transaction_id] = updates[0]
+                if len(updates) > 1:
+                    self._pending[transaction_id] = updates[1:]
+            if self._pending:
+                self._schedule()
+        if not batch:
+            return
+
+        try:
+            applied = self._flush({
+                transaction_id: (new_status, expected_status)
+                for transaction_id, (new_status, expected_status, _) in batch.items()
+            })
+        except Exception as e:
+            for _, _, future in batch.values():
+                future.set_exception(e)
+            return
+
+        for transaction_id, (_, _, future) in batch.items():
+            future.set_result(transaction_id in applied)
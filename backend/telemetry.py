@@ -0,0 +1,249 @@
+"""Per-route request and BigQuery job telemetry.
+
+For every request this records wall-clock time, JSON serialization time,
+payload size and whether the response came from the query cache. For every
+BigQuery job the request ran, it records the job id, bytes processed and
+billed, cache_hit and slot-ms; a query answered by another request's
+in-flight job (single_flight.py) is counted as coalesced instead, and a page
+read from an earlier job's result table as a result read, and time spent
+waiting for a job slot (admission.py) as admission wait. Totals are kept per
+route, and latency percentiles come from the most recent `window`
+requests of each route.
+
+Numbers are per worker process; scrape every worker (or sum in Prometheus)
+when running several. Streamed responses are timed to their first byte.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+
+from flask import request
+
+# Jobs run by the current request; dashboard sections share their parent's
+current_record = contextvars.ContextVar("current_record", default=None)
+
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+
+# (stats key, Prometheus metric name, type, help)
+COUNTERS = [
+    ("requests", "ezpass_requests_total", "counter", "Requests served"),
+    ("errors", "ezpass_request_errors_total", "counter", "Requests answered with a 5xx status"),
+    ("response_cache_hits", "ezpass_response_cache_hits_total", "counter", "Responses served from the query cache"),
+    ("payload_bytes", "ezpass_response_payload_bytes_total", "counter", "Uncompressed response bytes"),
+    ("serialization_seconds", "ezpass_serialization_seconds_total", "counter", "Time spent encoding JSON"),
+    ("queries", "ezpass_bigquery_jobs_total", "counter", "BigQuery jobs run"),
+    ("coalesced_queries", "ezpass_coalesced_queries_total", "counter", "Queries answered by another request's in-flight job"),
+    ("result_reads", "ezpass_result_reads_total", "counter", "Pages read from an earlier job's result table"),
+    ("admission_wait_seconds", "ezpass_admission_wait_seconds_by_route_total", "counter", "Time spent waiting for a BigQuery job slot"),
+    ("bigquery_cache_hits", "ezpass_bigquery_cache_hits_total", "counter", "BigQuery jobs answered from BigQuery's result cache"),
+    ("bytes_processed", "ezpass_bigquery_bytes_processed_total", "counter", "BigQuery total_bytes_processed"),
+    ("bytes_billed", "ezpass_bigquery_bytes_billed_total", "counter", "BigQuery total_bytes_billed"),
+    ("slot_ms", "ezpass_bigquery_slot_ms_total", "counter", "BigQuery slot milliseconds")
+]
+
+
+def _number(value):
+    """Job statistics are None until known, and other backends may not have them."""
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+class RequestRecord:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.serialization_seconds = 0.0
+        self.jobs = []
+        self.coalesced = 0
+        self.result_reads = 0
+        self.admission_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_job(self, job):
+        job_id = getattr(job, "job_id", None)
+        with self._lock:
+            self.jobs.append({
+                "job_id": job_id if isinstance(job_id, str) else None,
+                "bytes_processed": _number(getattr(job, "total_bytes_processed", None)),
+                "bytes_billed": _number(getattr(job, "total_bytes_billed", None)),
+                "cache_hit": getattr(job, "cache_hit", None) is True,
+                "slot_ms": _number(getattr(job, "slot_millis", None))
+            })
+
+    def add_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def add_result_read(self):
+        with self._lock:
+            self.result_reads += 1
+
+    def add_admission_wait(self, seconds):
+        with self._lock:
+            self.admission_wait_seconds += seconds
+
+
+class RouteStats:
+    def __init__(self, window):
+        self.totals = {key: 0 for key, _, _, _ in COUNTERS}
+        self.latencies = deque(maxlen=window)
+        self.latency_sum = 0.0
+        self.last_jobs = deque(maxlen=5)
+
+
+def _percentile(ordered, quantile):
+    if not ordered:
+        return None
+    return ordered[min(int(len(ordered) * quantile), len(ordered) - 1)]
+
+
+class Telemetry:
+    def __init__(self, window=1024, skip_endpoints=(), started_at=None):
+        self.window = window
+        self.skip_endpoints = set(skip_endpoints)
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self._startup = {}
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        # Time JSON encoding inside jsonify()
+        encode = app.json.response
+
+        def timed_response(*args, **kwargs):
+            started = time.perf_counter()
+            response = encode(*args, **kwargs)
+            record = current_record.get()
+            if record is not None:
+                record.serialization_seconds += time.perf_counter() - started
+            return response
+        app.json.response = timed_response
+
+    def _before_request(self):
+        current_record.set(RequestRecord())
+
+    def _after_request(self, response):
+        record = current_record.get()
+        if record is None or request.endpoint in self.skip_endpoints:
+            return response
+
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        finished = time.perf_counter()
+        elapsed = finished - record.started
+        if "first_response" not in self._startup:
+            self.mark_startup("first_response", finished - self.started_at)
+            print(f"First response {self._startup['first_response']:.3f}s after process start ({route})")
+        payload_bytes = 0 if response.is_streamed else response.content_length or 0
+
+        with self._lock:
+            stats = self._routes.setdefault(route, RouteStats(self.window))
+            totals = stats.totals
+            totals["requests"] += 1
+            totals["errors"] += response.status_code >= 500
+            totals["response_cache_hits"] += response.headers.get("X-Cache") == "HIT"
+            totals["payload_bytes"] += payload_bytes
+            totals["serialization_seconds"] += record.serialization_seconds
+            totals["coalesced_queries"] += record.coalesced
+            totals["result_reads"] += record.result_reads
+            totals["admission_wait_seconds"] += record.admission_wait_seconds
+            for job in record.jobs:
+                totals["queries"] += 1
+                totals["bigquery_cache_hits"] += job["cache_hit"]
+                totals["bytes_processed"] += job["bytes_processed"]
+                totals["bytes_billed"] += job["bytes_billed"]
+                totals["slot_ms"] += job["slot_ms"]
+                stats.last_jobs.append(job)
+            stats.latencies.append(elapsed)
+            stats.latency_sum += elapsed
+        return response
+
+    def _teardown_request(self, exc=None):
+        # Worker threads are reused; don't let the record outlive its request
+        current_record.set(None)
+
+    def mark_startup(self, phase, seconds):
+        """Record how long a startup phase (client_init, warm_up, first_response) took."""
+        with self._lock:
+            self._startup.setdefault(phase, seconds)
+
+    def startup_report(self):
+        with self._lock:
+            return dict(self._startup)
+
+    def record_job(self, job):
+        """Attribute a finished BigQuery job to the current request, if any."""
+        record = current_record.get()
+        if record is not None:
+            record.add_job(job)
+
+    def record_coalesced(self):
+        """Count a query the current request shared with an identical in-flight one."""
+        record = current_record.get()
+        if record is not None:
+            record.add_coalesced()
+
+    def record_result_read(self):
+        """Count a page the current request read from an earlier job's result table."""
+        record = current_record.get()
+        if record is not None:
+            record.add_result_read()
+
+    def record_admission_wait(self, seconds):
+        """Add the time the current request waited for a BigQuery job slot."""
+        record = current_record.get()
+        if record is not None:
+            record.add_admission_wait(seconds)
+
+    def snapshot(self):
+        """Per-route totals plus latency percentiles, as plain dicts."""
+        with self._lock:
+            routes = {route: (dict(stats.totals), sorted(stats.latencies), stats.latency_sum, list(stats.last_jobs))
+                      for route, stats in self._routes.items()}
+        summary = {}
+        for route, (totals, ordered, latency_sum, last_jobs) in sorted(routes.items()):
+            summary[route] = {
+                **totals,
+                "latency_seconds": {
+                    f"p{int(quantile * 100)}": _percentile(ordered, quantile) for quantile in LATENCY_QUANTILES
+                },
+                "latency_seconds_sum": latency_sum,
+                "recent_jobs": last_jobs
+            }
+        return summary
+
+    def prometheus(self):
+        """Prometheus text exposition of snapshot()."""
+        summary = self.snapshot()
+        lines = [
+            "# HELP ezpass_request_duration_seconds Request wall-clock time",
+            "# TYPE ezpass_request_duration_seconds summary"
+        ]
+        for route, stats in summary.items():
+            label = route.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in LATENCY_QUANTILES:
+                value = stats["latency_seconds"][f"p{int(quantile * 100)}"]
+                if value is not None:
+                    lines.append(f'ezpass_request_duration_seconds{{route="{label}",quantile="{quantile}"}} {value}')
+            lines.append(f'ezpass_request_duration_seconds_sum{{route="{label}"}} {stats["latency_seconds_sum"]}')
+            lines.append(f'ezpass_request_duration_seconds_count{{route="{label}"}} {stats["requests"]}')
+
+        lines.append("# HELP ezpass_startup_seconds Seconds taken by each startup phase of this process")
+        lines.append("# TYPE ezpass_startup_seconds gauge")
+        for phase, seconds in sorted(self.startup_report().items()):
+            lines.append(f'ezpass_startup_seconds{{phase="{phase}"}} {seconds}')
+
+        for key, name, metric_type, help_text in COUNTERS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for route, stats in summary.items():
+                label = route.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{name}{{route="{label}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._startup.clear()
@@ -1,6 +1,32 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from app import app
+from app import app, count_cache, prewarmed, query_cache, result_tables, status_events_tables, table_schemas
+
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    """Make sure cached and prewarmed responses, counts, result tables and table metadata never leak between tests."""
+    for cache in (query_cache, table_schemas, count_cache, result_tables, prewarmed, status_events_tables):
+        cache.invalidate()
+    yield
+    for cache in (query_cache, table_schemas, count_cache, result_tables, prewarmed, status_events_tables):
+        cache.invalidate()
+
+@pytest.fixture(autouse=True)
+def no_table_version(monkeypatch):
+    """
+    Skip the ETag table-version lookup so tests never reach the real
+    BigQuery metadata API; the ETag tests in test_responses.py patch in
+    their own version.
+    """
+    monkeypatch.setattr("app.table_version", lambda: None)
+
+@pytest.fixture(autouse=True)
+def no_dry_run(monkeypatch):
+    """
+    Run queries without the dry-run estimate, so each query is one call on
+    the mock client; test_query_budget.py turns it back on.
+    """
+    monkeypatch.setattr("app.QUERY_DRY_RUN", False)
 
 @pytest.fixture
 def client():
@@ -17,6 +43,8 @@ def mock_bigquery():
     with patch("app.client") as mock_client:
         # This ensures mock_client.query().result() exists
         mock_client.query.return_value.result.return_value = iter([])
+        # Streaming inserts (status events) succeed
+        mock_client.insert_rows_json.return_value = []
 
         yield mock_client
 
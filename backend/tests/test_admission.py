@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+CLASSES = {"interactive": (0, 2), "standard": (1, 2), "heavy": (2, 1)}
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+def start_waiter(controller, route_class, outcomes):
+    def run():
+        try:
+            controller.acquire(route_class)
+            outcomes.append((route_class, "admitted"))
+        except AdmissionRejected:
+            outcomes.append((route_class, "rejected"))
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def test_waiters_are_admitted_by_priority():
+    controller = AdmissionController(CLASSES, max_concurrent=1, max_queue=8, max_wait=2)
+    controller.acquire("standard")
+    outcomes = []
+    heavy = start_waiter(controller, "heavy", outcomes)
+    wait_for(lambda: controller.snapshot()["queue_depth"] == 1)
+    interactive = start_waiter(controller, "interactive", outcomes)
+    wait_for(lambda: controller.snapshot()["queue_depth"] == 2)
+
+    controller.release("standard")
+    interactive.join(1)
+    assert outcomes == [("interactive", "admitted")]
+    controller.release("interactive")
+    heavy.join(1)
+    assert outcomes[-1] == ("heavy", "admitted")
+
+def test_per_class_limit_leaves_room_for_others():
+    controller = AdmissionController(CLASSES, max_concurrent=4, max_queue=8, max_wait=0.05)
+    controller.acquire("heavy")
+    with pytest.raises(AdmissionRejected):
+        controller.acquire("heavy")
+    # The heavy limit is full, the process is not
+    assert controller.acquire("interactive") >= 0
+    assert controller.snapshot()["classes"]["heavy"]["timed_out"] == 1
+
+def test_full_queue_sheds_lower_priority_waiter():
+    controller = AdmissionController(CLASSES, max_concurrent=1, max_queue=1, max_wait=2)
+    controller.acquire("standard")
+    outcomes = []
+    heavy = start_waiter(controller, "heavy", outcomes)
+    wait_for(lambda: controller.snapshot()["queue_depth"] == 1)
+    interactive = start_waiter(controller, "interactive", outcomes)
+    heavy.join(1)
+    assert outcomes == [("heavy", "rejected")]
+
+    # An arrival with nothing less urgent to shed is rejected itself
+    with pytest.raises(AdmissionRejected):
+        controller.acquire("standard")
+    controller.release("standard")
+    interactive.join(1)
+    assert outcomes[-1] == ("interactive", "admitted")
+    assert controller.snapshot()["classes"]["heavy"]["shed"] == 1
+
+def test_disabled_controller_never_waits():
+    controller = AdmissionController(CLASSES, max_concurrent=0)
+    with controller.slot("heavy") as waited:
+        assert waited == 0.0
+    assert controller.snapshot()["running"] == 0
+
+def test_rejected_query_is_503(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    controller = AdmissionController(CLASSES, max_concurrent=1, max_queue=0, max_wait=0.05)
+    controller.acquire("standard")
+    monkeypatch.setattr("app.admission", controller)
+
+    response = client.get("/api/charts/severity")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    mock_bigquery.query.assert_not_called()
+
+def test_routes_take_their_class_slot(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    controller = AdmissionController(CLASSES, max_concurrent=4)
+    monkeypatch.setattr("app.admission", controller)
+
+    client.get("/api/charts/severity")
+    client.get("/api/transactions/alerts")
+    classes = controller.snapshot()["classes"]
+    assert classes["heavy"]["admitted"] == 1
+    assert classes["interactive"]["admitted"] == 1
+    assert controller.snapshot()["running"] == 0
+
+def test_queue_metrics_are_exposed(client, monkeypatch):
+    monkeypatch.setattr("app.admission", AdmissionController(CLASSES, max_concurrent=4))
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'ezpass_admission_queue_depth{class="interactive"} 0' in metrics
+    assert 'ezpass_admission_wait_seconds_total{class="heavy"}' in metrics
+    admission = client.get("/api/_stats").get_json()["admission"]
+    assert admission["classes"]["heavy"]["limit"] == 1
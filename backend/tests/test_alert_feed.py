@@ -0,0 +1,120 @@
+import queue
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from alert_feed import RESYNC, AlertFeed
+
+def test_alert_feed_polls_once_for_all_subscribers():
+    polled = threading.Event()
+    calls = []
+
+    def poll(watermark):
+        calls.append(watermark)
+        polled.set()
+        return "event: alerts\ndata: {}\n\n", watermark + 1
+
+    feed = AlertFeed(poll, lambda: 0, interval=0.05)
+    first = feed.subscribe()
+    second = feed.subscribe()
+
+    assert polled.wait(2)
+    assert first.get(timeout=2) == second.get(timeout=2) == "event: alerts\ndata: {}\n\n"
+    # One shared query per interval, not one per subscriber
+    assert calls[0] == 0
+    assert calls == list(range(len(calls)))
+
+    feed.unsubscribe(first)
+    feed.unsubscribe(second)
+    assert feed.subscriber_count == 0
+
+def test_alert_feed_resyncs_slow_subscribers():
+    feed = AlertFeed(MagicMock(), MagicMock(), max_backlog=2)
+    subscriber = queue.Queue(maxsize=2)
+    feed._subscribers.add(subscriber)
+
+    for event in ("a", "b", "c"):
+        feed.publish(event)
+
+    assert subscriber.get_nowait() is RESYNC
+    assert subscriber.empty()
+
+def test_alert_stream_sends_shared_events(client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    subscriber = queue.Queue()
+    subscriber.put("event: alerts\ndata: {\"data\": []}\n\n")
+    subscriber.put(RESYNC)
+    feed = MagicMock(interval=0.01)
+    feed.subscribe.return_value = subscriber
+    monkeypatch.setattr("app.alert_feed", feed)
+
+    response = client.get("/api/alerts/stream")
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    chunks = response.iter_encoded()
+    assert next(chunks).startswith(b"retry: ")
+    assert next(chunks) == b"event: alerts\ndata: {\"data\": []}\n\n"
+    assert next(chunks) == b"event: resync\ndata: {}\n\n"
+    response.close()
+    feed.unsubscribe.assert_called_once_with(subscriber)
+
+def test_poll_alert_changes_advances_watermark(mock_bigquery, monkeypatch):
+    import app
+
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    changed_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    mock_bigquery.query.return_value.result.side_effect = [
+        iter([{"watermark": changed_at}]),
+        iter([{"transaction_id": "t1", "status": "Needs Review", "amount": 5, "changed_at": changed_at}])
+    ]
+
+    event, watermark = app.poll_alert_changes(app.AlertWatermark(app.EPOCH))
+
+    assert watermark == app.AlertWatermark(changed_at, "t1", False)
+    assert event.startswith("event: alerts\ndata: ")
+    assert '"transaction_id":"t1"' in event
+    probe, query = [call[0][0] for call in mock_bigquery.query.call_args_list]
+    assert "SELECT MAX(" in probe and "transaction_date >= @start_date" in probe
+    assert "transaction_id > @watermark_id" in query
+    assert "transaction_date >= @start_date" in query
+    assert "GREATEST(" in query
+
+def test_poll_alert_changes_skips_fetch_when_nothing_changed(mock_bigquery, monkeypatch):
+    import app
+
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    changed_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter([{"watermark": changed_at}])
+
+    watermark = app.AlertWatermark(changed_at, "t9")
+    assert app.poll_alert_changes(watermark) == (None, watermark)
+    # Only the MAX(changed_at) probe ran
+    assert mock_bigquery.query.call_count == 1
+
+def test_poll_alert_changes_pages_through_one_model_run(mock_bigquery, monkeypatch):
+    import app
+
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ALERT_STREAM_MAX_ROWS", 2)
+    # Every row of a model run shares one prediction_timestamp
+    run_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    rows = [{"transaction_id": f"t{i}", "status": "Needs Review", "changed_at": run_at} for i in range(3)]
+    mock_bigquery.query.return_value.result.side_effect = [
+        iter([{"watermark": run_at}]), iter(rows[:2]),
+        # Full page: no probe, straight to the next rows
+        iter(rows[2:])
+    ]
+
+    _, watermark = app.poll_alert_changes(app.AlertWatermark(app.EPOCH))
+    assert watermark == app.AlertWatermark(run_at, "t1", True)
+    event, watermark = app.poll_alert_changes(watermark)
+    assert '"transaction_id":"t2"' in event
+    assert watermark == app.AlertWatermark(run_at, "t2", False)
+    params = {p.name: p.value for p in mock_bigquery.query.call_args[1]["job_config"].query_parameters}
+    assert params["watermark"] == run_at and params["watermark_id"] == "t1"
+
+def test_alert_stream_unsupported_table(client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "other_table")
+    response = client.get("/api/alerts/stream")
+    assert response.status_code == 400
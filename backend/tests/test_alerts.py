@@ -42,3 +42,17 @@ def test_alerts_unsupported_table(mock_bigquery, client, monkeypatch):
     data = response.get_json()
     assert "error" in data
     assert data["error"] == "Unsupported table"
+
+def test_alerts_select_alert_card_columns(mock_bigquery, client, monkeypatch):
+    from types import SimpleNamespace
+
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.get_table.return_value = SimpleNamespace(schema=[
+        SimpleNamespace(name=name) for name in ("transaction_id", "amount", "is_anomaly", "speed_mph")
+    ])
+
+    client.get("/api/transactions/alerts")
+    assert "SELECT transaction_id, amount, is_anomaly\n" in mock_bigquery.query.call_args[0][0]
+
+    client.get("/api/transactions/alerts?fields=speed_mph")
+    assert "SELECT speed_mph\n" in mock_bigquery.query.call_args[0][0]
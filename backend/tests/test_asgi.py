@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+import asgi
+
+class FakeJob:
+    """Query job that finishes after `polls` done() checks (never if None)."""
+    def __init__(self, rows, polls=0):
+        self.rows = rows
+        self.polls = polls
+        self.job_id = "job-1"
+        self.cancelled = False
+
+    def done(self):
+        if self.polls is None or self.cancelled:
+            return self.cancelled
+        self.polls -= 1
+        return self.polls < 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def result(self, **kwargs):
+        return iter(self.rows)
+
+@pytest.fixture(autouse=True)
+def fresh_poller(monkeypatch):
+    # Every asyncio.run() gets a new loop, so the poller must be rebuilt
+    monkeypatch.setattr("asgi.poller", None)
+
+def call(path, disconnect_after=None):
+    """Drive asgi.application for one GET; returns (status, headers, body)."""
+    sent = []
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []}
+    asyncio.run(asgi.application(scope, receive, send))
+
+    if not sent:
+        return None, {}, b""
+    headers = {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    return sent[0]["status"], headers, b"".join(message.get("body", b"") for message in sent[1:])
+
+def test_asgi_serves_flask_routes(client):
+    status, headers, body = call("/api/table-info")
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert json.loads(body) == client.get("/api/table-info").get_json()
+
+def test_asgi_polls_job_until_done(mock_bigquery):
+    job = FakeJob([{"transaction_id": "t1"}], polls=3)
+    mock_bigquery.query.return_value = job
+
+    status, _, body = call("/api/transactions/alerts")
+    assert status == 200
+    assert json.loads(body)["data"] == [{"transaction_id": "t1"}]
+    assert job.polls < 0
+
+def test_asgi_cancels_job_on_disconnect(mock_bigquery):
+    job = FakeJob([], polls=None)
+    mock_bigquery.query.return_value = job
+
+    status, _, _ = call("/api/transactions/alerts", disconnect_after=0.1)
+    assert status is None
+    assert job.cancelled
+
+def test_asgi_request_deadline(mock_bigquery, monkeypatch):
+    monkeypatch.setattr("asgi.ASGI_REQUEST_TIMEOUT_SECONDS", 0.2)
+    job = FakeJob([], polls=None)
+    mock_bigquery.query.return_value = job
+
+    status, headers, body = call("/api/transactions/alerts")
+    assert status == 503
+    assert headers["retry-after"] == "30"
+    assert "deadline" in json.loads(body)["error"]
+    assert job.cancelled
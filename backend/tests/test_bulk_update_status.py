@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import MagicMock
+
+from status_writer import StatusWriteQueue
+
+@pytest.fixture(autouse=True)
+def update_in_place(monkeypatch):
+    """These tests cover the DML path; test_status_events.py covers the event table."""
+    monkeypatch.setattr("app.STATUS_EVENTS_TABLE", "")
+
+def _fake_query(current_rows, affected=None):
+    """Reads return current_rows; a MERGE reports `affected` rows (default: all)."""
+    def fake_query(query, *args, **kwargs):
+        job = MagicMock()
+        job.result.return_value = iter(current_rows if "SELECT transaction_id, status" in query else [])
+        if "MERGE" in query:
+            updates = kwargs["job_config"].query_parameters[0].values
+            job.num_dml_affected_rows = len(updates) if affected is None else affected
+        return job
+    return fake_query
+
+def test_bulk_update_status_single_merge(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = _fake_query([
+        {"transaction_id": "t1", "status": "Needs Review"},
+        {"transaction_id": "t2", "status": "Investigating"}
+    ])
+
+    response = client.post("/api/transactions/update-status/bulk", json={"updates": [
+        {"transactionId": "t1", "newStatus": "Investigating"},
+        {"transactionId": "t2", "newStatus": "Resolved - Fraud"}
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["success"] is True
+    assert data["updated"] == ["t1", "t2"]
+
+    # One read plus one MERGE, regardless of batch size
+    assert mock_bigquery.query.call_count == 2
+    merge_call = mock_bigquery.query.call_args_list[1]
+    assert "MERGE" in merge_call[0][0]
+    assert "t.status IS NOT DISTINCT FROM u.expected_status" in merge_call[0][0]
+    structs = merge_call[1]["job_config"].query_parameters[0].values
+    assert [struct.struct_values["expected_status"] for struct in structs] == ["Needs Review", "Investigating"]
+
+def test_bulk_update_status_reports_concurrent_changes(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    # Same rows for the validation read and the read-back after the MERGE:
+    # t2 was changed by someone else in between, so it kept its old status
+    mock_bigquery.query.side_effect = _fake_query([
+        {"transaction_id": "t1", "status": "Investigating"},
+        {"transaction_id": "t2", "status": "Investigating"}
+    ], affected=1)
+
+    response = client.post("/api/transactions/update-status/bulk", json={"updates": [
+        {"transactionId": "t1", "newStatus": "Resolved - Fraud"},
+        {"transactionId": "t2", "newStatus": "Resolved - Not Fraud"}
+    ]})
+
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data["updated"] == []
+    assert [e["error"] for e in data["errors"]] == ["Status changed concurrently"] * 2
+
+def test_bulk_update_status_reports_rejected_rows(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = _fake_query([
+        {"transaction_id": "t1", "status": "Needs Review"},
+        {"transaction_id": "t2", "status": "Resolved - Fraud"}
+    ])
+
+    response = client.post("/api/transactions/update-status/bulk", json={"updates": [
+        {"transactionId": "t1", "newStatus": "Investigating"},
+        {"transactionId": "t2", "newStatus": "Investigating"},
+        {"transactionId": "t3", "newStatus": "Investigating"}
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["success"] is False
+    assert data["updated"] == ["t1"]
+    assert [e["error"] for e in data["errors"]] == ["Invalid status transition", "Transaction not found"]
+
+def test_bulk_update_status_missing_updates(client):
+    response = client.post("/api/transactions/update-status/bulk", json={})
+    assert response.status_code == 400
+
+def test_status_write_queue_batches_updates():
+    flushed = []
+    def flush(updates):
+        flushed.append(updates)
+        return set(updates)
+    queue = StatusWriteQueue(flush, window_seconds=60)
+
+    futures = [
+        queue.submit("t1", "Investigating", "Needs Review"),
+        queue.submit("t2", "Resolved - Fraud", "Investigating")
+    ]
+    queue.drain()
+
+    assert flushed == [{"t1": ("Investigating", "Needs Review"), "t2": ("Resolved - Fraud", "Investigating")}]
+    assert all(future.result(timeout=1) for future in futures)
+
+def test_status_write_queue_conflicting_updates_fail():
+    statuses = {"t1": "Investigating"}
+    def flush(updates):
+        applied = set()
+        for transaction_id, (new_status, expected_status) in updates.items():
+            if statuses[transaction_id] == expected_status:
+                statuses[transaction_id] = new_status
+                applied.add(transaction_id)
+        return applied
+    queue = StatusWriteQueue(flush, window_seconds=60)
+
+    # Both analysts validated against Investigating in the same window
+    first = queue.submit("t1", "Resolved - Fraud", "Investigating")
+    second = queue.submit("t1", "Resolved - Not Fraud", "Investigating")
+    queue.drain()
+    queue.drain()
+
+    assert first.result(timeout=1) is True
+    assert second.result(timeout=1) is False
+    assert statuses["t1"] == "Resolved - Fraud"
+
+def test_status_write_queue_propagates_errors():
+    def failing_flush(updates):
+        raise RuntimeError("DML quota exceeded")
+
+    queue = StatusWriteQueue(failing_flush, window_seconds=0.01)
+    future = queue.submit("t1", "Investigating")
+    with pytest.raises(RuntimeError, match="DML quota"):
+        future.result(timeout=1)
+
+def test_update_status_queue_conflict(mock_bigquery, client, monkeypatch):
+    queue = MagicMock()
+    queue.submit.return_value.result.return_value = False
+    monkeypatch.setattr("app.status_queue", queue)
+    mock_bigquery.query.return_value.result.return_value = [{"status": "Investigating"}]
+
+    response = client.post("/api/transactions/update-status", json={
+        "transactionId": "t1", "newStatus": "Resolved - Fraud"
+    })
+
+    assert response.status_code == 409
+    queue.submit.assert_called_once_with("t1", "Resolved - Fraud", "Investigating")
+    # The queued MERGE is the only write
+    assert mock_bigquery.query.call_count == 1
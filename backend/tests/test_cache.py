@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+def _metrics_job():
+    job = MagicMock()
+    job.result.return_value = iter([{
+        "total_transactions": 10,
+        "total_flagged": 1,
+        "total_amount": 5.0,
+        "total_alerts_ytd": 1,
+        "detected_frauds_current_month": 0,
+        "potential_loss_ytd": 5.0
+    }])
+    return job
+
+def test_metrics_served_from_cache(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = lambda *args, **kwargs: _metrics_job()
+
+    first = client.get("/api/metrics")
+    second = client.get("/api/metrics")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json() == first.get_json()
+    assert mock_bigquery.query.call_count == 1
+
+def test_cache_key_includes_table(mock_bigquery, client, monkeypatch):
+    mock_bigquery.query.side_effect = lambda *args, **kwargs: _metrics_job()
+
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    client.get("/api/metrics")
+    monkeypatch.setattr("app.TABLE_NAME", "gold_automation")
+    client.get("/api/metrics")
+
+    assert mock_bigquery.query.call_count == 2
+
+def test_errors_are_not_cached(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = Exception("Boom!")
+
+    assert client.get("/api/charts/severity").status_code == 500
+    assert client.get("/api/charts/severity").status_code == 500
+    assert mock_bigquery.query.call_count == 2
+
+def test_update_status_invalidates_cache(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = lambda *args, **kwargs: _metrics_job()
+    client.get("/api/metrics")
+
+    status_job = MagicMock()
+    status_job.result.side_effect = lambda *args, **kwargs: iter([{"transaction_id": "txn123", "status": "Needs Review"}])
+    mock_bigquery.query.side_effect = None
+    mock_bigquery.query.return_value = status_job
+    response = client.post("/api/transactions/update-status", json={
+        "transactionId": "txn123",
+        "newStatus": "Investigating"
+    })
+    assert response.status_code == 200
+
+    mock_bigquery.query.side_effect = lambda *args, **kwargs: _metrics_job()
+    assert client.get("/api/metrics").headers["X-Cache"] == "MISS"
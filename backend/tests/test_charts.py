@@ -43,3 +43,82 @@ def test_category_chart_unsupported_table(client, monkeypatch):
     assert response.status_code == 400
     data = response.get_json()
     assert data["error"] == "Unsupported table"
+
+def test_scatter_chart_stratified_points(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+
+    mock_query_job = MagicMock()
+    mock_query_job.result.return_value = iter([
+        {"amount": 12.5, "ml_anomaly_score": 0.9, "risk_level": "Critical Risk"}
+    ])
+    mock_bigquery.query.return_value = mock_query_job
+
+    response = client.get("/api/charts/scatter?max_points=100")
+    assert response.status_code == 200
+    assert response.get_json()["data"][0]["risk_level"] == "Critical Risk"
+
+    query = mock_bigquery.query.call_args[0][0]
+    params = mock_bigquery.query.call_args[1]["job_config"].query_parameters
+    assert "PARTITION BY risk_level" in query
+    assert params[0].value == 100
+
+def test_scatter_chart_hexbin_counts(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "gold_automation")
+
+    mock_query_job = MagicMock()
+    mock_query_job.result.return_value = iter([
+        {"amount": 30.0, "ml_anomaly_score": 4.0, "risk_level": "High Risk", "count": 42}
+    ])
+    mock_bigquery.query.return_value = mock_query_job
+
+    response = client.get("/api/charts/scatter?mode=hexbin&bins=20")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["mode"] == "hexbin"
+    assert data["data"][0]["count"] == 42
+    assert "rule_based_score AS ml_anomaly_score" in mock_bigquery.query.call_args[0][0]
+
+def test_scatter_chart_invalid_mode(client):
+    response = client.get("/api/charts/scatter?mode=pie")
+    assert response.status_code == 400
+
+def test_scatter_chart_invalid_numbers(client):
+    assert client.get("/api/charts/scatter?max_points=lots").status_code == 400
+    assert client.get("/api/charts/scatter?mode=grid&bins=1.5").status_code == 400
+
+def test_scatter_chart_max_points_capped(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.SCATTER_MAX_POINTS", 5000)
+    mock_bigquery.query.return_value.result.return_value = iter([])
+
+    client.get("/api/charts/scatter?max_points=1000000")
+    params = mock_bigquery.query.call_args[1]["job_config"].query_parameters
+    assert params[0].value == 5000
+
+def test_charts_prune_to_requested_window(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = iter([])
+
+    for path in ("/api/charts/category", "/api/charts/severity", "/api/charts/monthly", "/api/charts/timeseries"):
+        response = client.get(f"{path}?start_date=2025-01-01&end_date=2025-03-31")
+        assert response.get_json()["window"] == {"start_date": "2025-01-01", "end_date": "2025-03-31"}
+        query = mock_bigquery.query.call_args[0][0]
+        # Uses the rollup, which is partitioned on transaction_date as well
+        assert "dashboard_rollup" in query
+        assert "transaction_date >= @start_date" in query and "transaction_date <= @end_date" in query
+
+    # Without a window the aggregates still cover all history
+    response = client.get("/api/charts/severity")
+    assert response.get_json()["window"] == {"start_date": None, "end_date": None}
+    assert "@start_date" not in mock_bigquery.query.call_args[0][0]
+
+def test_scatter_chart_default_window(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = iter([])
+
+    response = client.get("/api/charts/scatter")
+    assert response.get_json()["window"]["start_date"] == "2024-01-01"
+    assert "DATE(transaction_date)" not in mock_bigquery.query.call_args[0][0]
+
+def test_chart_invalid_window(client):
+    assert client.get("/api/charts/monthly?end_date=yesterday").status_code == 400
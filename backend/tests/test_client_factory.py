@@ -0,0 +1,54 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import telemetry, warm_up
+from bigquery_client import LazyClient, create_bigquery_client
+
+def test_lazy_client_created_once_on_first_use():
+    factory = MagicMock()
+    created = []
+    client = LazyClient(factory, on_create=created.append)
+    assert not client.initialized
+    assert factory.call_count == 0
+
+    client.query("SELECT 1")
+    client.get_table("t")
+    assert factory.call_count == 1
+    assert len(created) == 1
+    factory.return_value.query.assert_called_once_with("SELECT 1")
+
+def test_lazy_client_recreated_after_fork(monkeypatch):
+    factory = MagicMock(side_effect=lambda: object())
+    client = LazyClient(factory)
+    parent = client.get()
+
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert client.get() is not parent
+    assert factory.call_count == 2
+
+def test_lazy_client_introspection_does_not_create():
+    factory = MagicMock()
+    client = LazyClient(factory)
+    assert not hasattr(client, "__wrapped__")
+    assert factory.call_count == 0
+
+def test_bigquery_client_connection_pool():
+    key_json = os.getenv("BIGQUERY_KEY_JSON")
+    if not key_json:
+        pytest.skip("needs a service-account key in BIGQUERY_KEY_JSON")
+
+    client = create_bigquery_client(key_json, pool_size=48)
+    adapter = client._http.get_adapter("https://bigquery.googleapis.com")
+    assert adapter._pool_maxsize == 48
+
+def test_startup_timings_reported(mock_bigquery, client):
+    telemetry.reset()
+    warm_up()
+    client.get("/api/table-info")
+
+    startup = client.get("/api/_stats").get_json()["startup"]
+    assert startup["warm_up"] >= 0
+    assert startup["first_response"] > 0
+    assert "ezpass_startup_seconds{phase=\"first_response\"}" in client.get("/metrics").get_data(as_text=True)
@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+# One generic row is enough for every aggregate to parse
+fake_row = {
+    "total_transactions": 3, "total_flagged": 1, "total_amount": 9.5,
+    "total_alerts_ytd": 1, "detected_frauds_current_month": 0, "potential_loss_ytd": 9.5,
+    "total": 3, "category": "Weekend", "severity": "High Risk", "count": 1,
+    "month": "May 2025", "year": 2025, "month_num": 5, "fraud_alerts": 1
+}
+
+def test_dashboard_returns_every_section(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+
+    mock_bigquery.query.side_effect = lambda *args, **kwargs: MagicMock(
+        result=MagicMock(return_value=iter([dict(fake_row)]))
+    )
+
+    response = client.get("/api/dashboard?limit=10&search=abc123&match=exact&start_date=2025-05-01")
+    assert response.status_code == 200
+
+    data = response.get_json()
+    assert data["errors"] == {}
+    assert data["metrics"]["total_transactions"] == 3
+    assert data["count"]["total"] == 3
+    assert data["transactions"]["limit"] == 10
+    assert data["table_info"]["table_name"] == "master_viz"
+    assert mock_bigquery.query.call_count == 7
+
+    # Listing filters reach both the transactions and count sections
+    listing_queries = [call[0][0] for call in mock_bigquery.query.call_args_list if "@search" in call[0][0]]
+    assert len(listing_queries) == 2
+    assert all("LIKE" not in query and "@start_date" in query for query in listing_queries)
+
+def test_dashboard_partial_failure(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+
+    def fake_query(query, *args, **kwargs):
+        if "COUNT(*) AS total\n" in query:
+            raise Exception("Boom!")
+        return MagicMock(result=MagicMock(return_value=iter([dict(fake_row)])))
+    mock_bigquery.query.side_effect = fake_query
+
+    response = client.get("/api/dashboard")
+    assert response.status_code == 200
+
+    data = response.get_json()
+    assert data["errors"] == {"count": "Boom!"}
+    assert data["severity"]["data"][0]["count"] == 1
+    assert data["table_info"]["table_name"] == "master_viz"
+
+def test_dashboard_forwards_window_to_every_section(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = lambda *args, **kwargs: MagicMock(
+        result=MagicMock(return_value=iter([dict(fake_row)]))
+    )
+
+    data = client.get("/api/dashboard?start_date=2025-05-01&end_date=2025-05-31").get_json()
+    assert data["errors"] == {}
+    for name in ("metrics", "monthly", "category", "severity", "recent_flagged", "transactions", "count"):
+        assert data[name]["window"] == {"start_date": "2025-05-01", "end_date": "2025-05-31"}, name
+    assert all("@end_date" in call[0][0] for call in mock_bigquery.query.call_args_list)
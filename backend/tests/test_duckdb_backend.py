@@ -0,0 +1,112 @@
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+from duckdb_backend import DuckDBClient, translate_sql
+
+FLAG_COLUMNS = [
+    "flag_rush_hour", "flag_is_weekend", "flag_is_holiday", "flag_overlapping_journey",
+    "flag_driver_amount_outlier", "flag_route_amount_outlier", "flag_amount_unusually_high",
+    "flag_driver_spend_spike"
+]
+
+@pytest.fixture
+def duckdb_client(tmp_path, monkeypatch):
+    """Three-row master_viz snapshot served through the DuckDB backend."""
+    flags = ", ".join(f"{'TRUE' if name == 'flag_is_weekend' else 'FALSE'} AS {name}" for name in FLAG_COLUMNS)
+    duckdb.execute(f"""
+        COPY (
+            SELECT *, {flags}
+            FROM (VALUES
+                ('t1', DATE '2025-05-01', 'ABC123', 'Critical Risk', 'Needs Review', 1, 40.0, -0.4, TIMESTAMP '2025-05-01 08:15:00'),
+                ('t2', DATE '2025-05-02', 'XYZ999', 'Low Risk', 'No Action Required', 0, 5.5, 0.2, TIMESTAMP '2025-05-02 13:00:00'),
+                ('t3', DATE '2025-05-03', 'ABC777', 'High Risk', 'Needs Review', 1, 12.0, -0.1, TIMESTAMP '2025-05-03 08:45:00')
+            ) AS v(transaction_id, transaction_date, tag_plate_number, ml_predicted_category, status,
+                   is_anomaly, amount, ml_predicted_score, entry_time)
+        ) TO '{tmp_path / "master_viz.parquet"}' (FORMAT PARQUET)
+    """)
+    monkeypatch.setattr("app.client", DuckDBClient(str(tmp_path)))
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+    monkeypatch.setattr("app.SEARCH_INDEX_TABLE", "")
+    monkeypatch.setattr("app.STATUS_EVENTS_TABLE", "")
+    # The snapshot is older than the default window
+    monkeypatch.setattr("app.DEFAULT_WINDOW_DAYS", 0)
+    return tmp_path
+
+def test_translate_sql_rewrites_bigquery_dialect():
+    sql = translate_sql(
+        "SELECT f.label FROM `njc-ezpass.ezpass_data.master_viz`, "
+        "UNNEST([STRUCT('Weekend' AS label, flag_is_weekend AS value)]) AS f WHERE status = @status"
+    )
+    assert sql == (
+        'SELECT f.label FROM "master_viz", '
+        "UNNEST([{'label': 'Weekend', 'value': flag_is_weekend}]) AS _f(f) WHERE status = $status"
+    )
+
+def test_duckdb_transactions_listing(duckdb_client, client):
+    response = client.get("/api/transactions?search=abc&include_total=true&limit=1")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total"] == 2
+    assert [row["transaction_id"] for row in data["data"]] == ["t3"]
+
+def test_duckdb_cursor_pagination(duckdb_client, client):
+    first = client.get("/api/transactions?cursor=&limit=2").get_json()
+    second = client.get(f"/api/transactions?cursor={first['next_cursor']}&limit=2").get_json()
+    assert [row["transaction_id"] for row in first["data"] + second["data"]] == ["t3", "t2", "t1"]
+    assert second["next_cursor"] is None
+
+def test_duckdb_cursor_pagination_reaches_null_dates(tmp_path, client, monkeypatch):
+    duckdb.execute(f"""
+        COPY (
+            SELECT * FROM (VALUES
+                ('t1', DATE '2025-05-01'), ('t2', NULL), ('t3', DATE '2025-05-03'), ('t4', NULL)
+            ) AS v(transaction_id, transaction_date)
+        ) TO '{tmp_path / "master_viz.parquet"}' (FORMAT PARQUET)
+    """)
+    monkeypatch.setattr("app.client", DuckDBClient(str(tmp_path)))
+    monkeypatch.setattr("app.SEARCH_INDEX_TABLE", "")
+    monkeypatch.setattr("app.STATUS_EVENTS_TABLE", "")
+    # The snapshot is older than the default window
+    monkeypatch.setattr("app.DEFAULT_WINDOW_DAYS", 0)
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = client.get(f"/api/transactions?cursor={cursor}&limit=1").get_json()
+        seen += [row["transaction_id"] for row in page["data"]]
+        cursor = page["next_cursor"]
+    assert seen == ["t3", "t1", "t4", "t2"]
+
+def test_duckdb_dashboard_aggregates(duckdb_client, client):
+    assert client.get("/api/metrics").get_json()["total_flagged"] == 2
+    assert client.get("/api/charts/category").get_json()["data"] == [{"category": "Weekend", "count": 2}]
+    assert client.get("/api/charts/timeseries").get_json()["data"] == [{"hour": 8, "fraud_count": 2}]
+    assert len(client.get("/api/charts/scatter?max_points=3").get_json()["data"]) == 3
+    assert sum(row["count"] for row in client.get("/api/charts/scatter?mode=hexbin&bins=4").get_json()["data"]) == 3
+
+def test_duckdb_ngram_search(duckdb_client, client, monkeypatch):
+    # Same shape as the dbt search_ngrams model
+    duckdb.execute(f"""
+        COPY (
+            SELECT DISTINCT substr(search_key, position, 3) AS ngram, transaction_id
+            FROM (
+                SELECT transaction_id, lower(unnest([transaction_id, tag_plate_number])) AS search_key
+                FROM '{duckdb_client / "master_viz.parquet"}'
+            ), range(1, length(search_key) - 1) AS r(position)
+        ) TO '{duckdb_client / "search_ngrams.parquet"}' (FORMAT PARQUET)
+    """)
+    monkeypatch.setattr("app.client", DuckDBClient(str(duckdb_client)))
+    monkeypatch.setattr("app.SEARCH_INDEX_TABLE", "search_ngrams")
+    monkeypatch.setattr("app.STATUS_EVENTS_TABLE", "")
+    # The snapshot is older than the default window
+    monkeypatch.setattr("app.DEFAULT_WINDOW_DAYS", 0)
+
+    data = client.get("/api/transactions?search=bc7").get_json()
+    assert [row["transaction_id"] for row in data["data"]] == ["t3"]
+    assert client.get("/api/transactions/count?search=abc").get_json()["total"] == 2
+
+def test_duckdb_metrics_empty_window(duckdb_client, client):
+    response = client.get("/api/metrics?start_date=2031-01-01")
+    assert response.status_code == 200
+    assert response.get_json()["total_flagged"] == 0
@@ -0,0 +1,49 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+def _fake_results(pages):
+    results = MagicMock()
+    results.schema = [SimpleNamespace(name="transaction_id"), SimpleNamespace(name="transaction_date")]
+    results.pages = iter(pages)
+    return results
+
+def test_export_csv_streams_pages(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = _fake_results([
+        [{"transaction_id": "t2", "transaction_date": date(2025, 5, 2)}],
+        [{"transaction_id": "t1", "transaction_date": None}]
+    ])
+
+    response = client.get("/api/transactions/export?status=Needs+Review&start_date=2025-05-01")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert response.is_streamed
+    assert response.get_data(as_text=True).splitlines() == [
+        "transaction_id,transaction_date",
+        "t2,2025-05-02",
+        "t1,"
+    ]
+
+    query = mock_bigquery.query.call_args[0][0]
+    assert "transaction_date >= @start_date" in query
+    assert "LIMIT" not in query
+    assert "ORDER BY" not in query
+
+def test_export_ordering_is_opt_in(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = _fake_results([])
+
+    client.get("/api/transactions/export?order=newest")
+    assert "ORDER BY transaction_date DESC" in mock_bigquery.query.call_args[0][0]
+
+def test_export_ndjson(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = _fake_results([
+        [{"transaction_id": "t1", "transaction_date": date(2025, 5, 1)}]
+    ])
+
+    response = client.get("/api/transactions/export?format=ndjson")
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == '{"transaction_id": "t1", "transaction_date": "2025-05-01"}\n'
+
+def test_export_invalid_parameters(client):
+    assert client.get("/api/transactions/export?format=xlsx").status_code == 400
+    assert client.get("/api/transactions/export?end_date=yesterday").status_code == 400
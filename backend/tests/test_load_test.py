@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+@pytest.fixture
+def load_test(monkeypatch):
+    monkeypatch.syspath_prepend(BENCHMARKS)
+    import fake_bigquery
+    import load_test
+
+    monkeypatch.setattr("app.client", fake_bigquery.FakeBigQueryClient(latency=0, page_size=20, pool_size=100))
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    return load_test
+
+def test_every_route_succeeds_against_fake_client(load_test):
+    """Keeps the synthetic rows in step with the columns the routes read."""
+    for method, path, body in load_test.ROUTES:
+        results, elapsed = load_test.run_sync(method, path, body, requests=2, concurrency=2, workers=2)
+        summary = load_test.summarize(path, results, elapsed)
+        assert summary["errors"] == 0, path
+        assert summary["mean_bytes"] > 0, path
+
+def test_fake_client_honours_limit_and_page_size(load_test):
+    import fake_bigquery
+
+    fake = fake_bigquery.FakeBigQueryClient(latency=0, page_size=20, pool_size=100)
+    assert len(list(fake.query("SELECT * FROM t LIMIT 5").result())) == 5
+    assert len(list(fake.query("SELECT * FROM t").result())) == 20
+    assert len(list(fake.query("SELECT COUNT(*) AS total FROM t").result())) == 1
+    rows = list(fake.query("SELECT agency, COUNT(*) AS count FROM t GROUP BY agency").result())
+    assert set(rows[0]) == {"agency", "count"}
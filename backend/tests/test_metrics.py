@@ -1,3 +1,4 @@
+import pytest
 from unittest.mock import MagicMock
 
 def test_metrics_master_viz_empty(mock_bigquery, client, monkeypatch):
@@ -64,3 +65,59 @@ def test_metrics_unsupported_table(client, monkeypatch):
     data = response.get_json()
     assert "error" in data
     assert data["error"] == "Unsupported table"
+
+def test_metrics_reads_dashboard_rollup(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+
+    mock_query_job = MagicMock()
+    mock_query_job.result.return_value = iter([{
+        "total_transactions": 10, "total_flagged": 2, "total_amount": 40.0,
+        "total_alerts_ytd": 1, "detected_frauds_current_month": 1, "potential_loss_ytd": 20.0
+    }])
+    mock_bigquery.query.return_value = mock_query_job
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.get_json()["total_transactions"] == 10
+
+    query = mock_bigquery.query.call_args[0][0]
+    assert "dashboard_rollup" in query
+    assert "SUM(transaction_count)" in query
+
+def test_metrics_rollup_disabled_uses_fact_table(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+
+    mock_query_job = MagicMock()
+    mock_query_job.result.return_value = iter([{
+        "total_transactions": 10, "total_flagged": 2, "total_amount": 40.0,
+        "total_alerts_ytd": 1, "detected_frauds_current_month": 1, "potential_loss_ytd": 20.0
+    }])
+    mock_bigquery.query.return_value = mock_query_job
+
+    client.get("/api/metrics")
+    query = mock_bigquery.query.call_args[0][0]
+    assert "master_viz" in query
+    assert "dashboard_rollup" not in query
+
+@pytest.mark.parametrize("rollup_table", ["dashboard_rollup", ""])
+def test_metrics_empty_window(mock_bigquery, client, monkeypatch, rollup_table):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", rollup_table)
+    # SUM over no rows is NULL, on the rollup even for total_transactions
+    empty_row = {
+        "total_transactions": None if rollup_table else 0,
+        "total_flagged": None,
+        "total_amount": None,
+        "total_alerts_ytd": None,
+        "detected_frauds_current_month": None,
+        "potential_loss_ytd": None
+    }
+    mock_bigquery.query.return_value.result.return_value = iter([empty_row])
+
+    response = client.get("/api/metrics?start_date=2031-01-01")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total_transactions"] == 0
+    assert data["total_amount"] == 0.0
+    assert data["window"]["start_date"] == "2031-01-01"
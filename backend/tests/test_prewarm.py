@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+import pytest
+
+import app as app_module
+
+@pytest.fixture
+def table_version(monkeypatch):
+    version = {"value": "2025-05-01 00:00:00+00:00"}
+    monkeypatch.setattr("app.table_version", lambda: version["value"])
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+    monkeypatch.setattr("app.PREWARM_TOKEN", "secret")
+    return version
+
+def prewarm(client, token="secret"):
+    return client.post("/api/_prewarm", headers={"X-Prewarm-Token": token})
+
+@pytest.fixture
+def mock_bigquery(mock_bigquery):
+    # One all-zero row fits every dashboard query
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter([defaultdict(int, total=0)])
+    return mock_bigquery
+
+def test_prewarm_serves_default_payloads_without_queries(mock_bigquery, client, table_version):
+    response = prewarm(client)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["table_version"] == table_version["value"]
+    assert body["errors"] == {}
+    assert "/api/metrics" in body["warmed"] and body["warmed"][-1] == "/api/dashboard"
+
+    mock_bigquery.query.reset_mock()
+    for path in ("/api/metrics", "/api/charts/severity", "/api/transactions?page=1&limit=50",
+                 "/api/transactions/alerts", "/api/dashboard"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == "HIT"
+    mock_bigquery.query.assert_not_called()
+
+def test_prewarmed_payloads_follow_table_version(mock_bigquery, client, table_version):
+    prewarm(client)
+    table_version["value"] = "2025-05-02 00:00:00+00:00"
+    mock_bigquery.query.reset_mock()
+
+    response = client.get("/api/transactions/alerts")
+    assert response.headers.get("X-Cache") != "HIT"
+    mock_bigquery.query.assert_called()
+
+def test_prewarm_drops_payloads_cached_before_the_rebuild(mock_bigquery, client, table_version):
+    client.get("/api/metrics")
+    assert len(app_module.query_cache) == 1
+    mock_bigquery.query.reset_mock()
+
+    prewarm(client)
+    # Metrics ran again rather than copying the pre-rebuild payload
+    assert any("total_transactions" in call.args[0] for call in mock_bigquery.query.call_args_list)
+
+def test_prewarm_requires_token(mock_bigquery, client, table_version):
+    assert client.post("/api/_prewarm").status_code == 403
+    assert prewarm(client, token="wrong").status_code == 403
+    mock_bigquery.query.assert_not_called()
+    assert prewarm(client).status_code == 200
+
+def test_prewarm_disabled_without_token(mock_bigquery, client, table_version, monkeypatch):
+    monkeypatch.setattr("app.PREWARM_TOKEN", "")
+    client.get("/api/metrics")
+    mock_bigquery.query.reset_mock()
+
+    assert client.post("/api/_prewarm").status_code == 403
+    # Nothing dropped, nothing run
+    assert len(app_module.query_cache) == 1
+    mock_bigquery.query.assert_not_called()
+
+def test_prewarm_needs_table_version(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.PREWARM_TOKEN", "secret")
+    response = prewarm(client)
+    assert response.status_code == 503
+    mock_bigquery.query.assert_not_called()
+
+def test_prewarm_reports_failed_payloads(mock_bigquery, client, table_version):
+    mock_bigquery.query.return_value.result.side_effect = Exception("boom")
+
+    response = prewarm(client)
+    assert response.status_code == 500
+    errors = response.get_json()["errors"]
+    assert errors["/api/transactions/alerts"] == "boom"
+    assert "/api/metrics" in errors
+    assert len(app_module.prewarmed) == 0
@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+from google.api_core.exceptions import BadRequest
+
+from query_budget import QueryBudgetExceeded, error_status
+
+def job_configs(mock_bigquery):
+    return [call[1]["job_config"] for call in mock_bigquery.query.call_args_list]
+
+def test_jobs_carry_endpoint_budget(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.QUERY_MAX_BYTES_BILLED", 1000)
+    monkeypatch.setattr("app.QUERY_TIMEOUT_SECONDS", 2)
+
+    client.get("/api/transactions/alerts")
+    config = job_configs(mock_bigquery)[-1]
+    assert config.maximum_bytes_billed == 1000
+    assert int(config.job_timeout_ms) == 2000
+
+def test_dry_run_over_budget_is_429(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.QUERY_DRY_RUN", True)
+    monkeypatch.setattr("app.QUERY_MAX_BYTES_BILLED", 1000)
+    mock_bigquery.query.return_value = MagicMock(total_bytes_processed=5000)
+
+    response = client.get("/api/transactions?search=abc")
+    assert response.status_code == 429
+    assert "narrow the date range" in response.get_json()["error"]
+    # Only the dry run reached BigQuery
+    assert [config.dry_run for config in job_configs(mock_bigquery)] == [True]
+
+def test_dry_run_within_budget_runs_query(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.QUERY_DRY_RUN", True)
+    monkeypatch.setattr("app.RESULT_REUSE_MAX_ROWS", 0)
+    mock_bigquery.query.return_value.total_bytes_processed = 10
+    mock_bigquery.query.return_value.result.return_value = [{"transaction_id": "t1"}]
+
+    response = client.get("/api/transactions?search=abc")
+    assert response.status_code == 200
+    assert [bool(config.dry_run) for config in job_configs(mock_bigquery)] == [True, False]
+
+def test_bytes_billed_limit_from_bigquery_is_429(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.side_effect = BadRequest(
+        "Query exceeded limit for bytes billed", errors=[{"reason": "bytesBilledLimitExceeded"}]
+    )
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 429
+    assert "Retry-After" not in response.headers
+
+def test_job_timeout_is_503(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.side_effect = BadRequest(
+        "Job timed out", errors=[{"reason": "timeout"}]
+    )
+
+    response = client.get("/api/charts/severity")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+
+def test_error_status():
+    assert error_status(QueryBudgetExceeded("too big")) == 429
+    assert error_status(Exception("Boom!")) is None
@@ -0,0 +1,127 @@
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+import app as app_module
+from responses import FastJSONProvider
+
+# Captured before the autouse fixture stubs it out
+real_table_version = app_module.table_version
+
+@pytest.fixture
+def table_version(monkeypatch):
+    version = {"value": "2025-05-01 00:00:00+00:00"}
+    monkeypatch.setattr("app.table_version", lambda: version["value"])
+    return version
+
+def _rows(count):
+    return [{"transaction_id": f"t{i}", "transaction_date": date(2025, 5, 1), "status": "Needs Review"} for i in range(count)]
+
+def test_etag_then_not_modified(mock_bigquery, client, table_version):
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter(_rows(1))
+
+    first = client.get("/api/transactions/alerts")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get("/api/transactions/alerts", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert mock_bigquery.query.call_count == 1
+
+def test_etag_changes_with_version_and_params(mock_bigquery, client, table_version):
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter(_rows(1))
+
+    etag = client.get("/api/transactions?page=1").headers["ETag"]
+    assert client.get("/api/transactions?page=2").headers["ETag"] != etag
+
+    table_version["value"] = "2025-05-02 00:00:00+00:00"
+    response = client.get("/api/transactions?page=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_compressed_etag_round_trip(mock_bigquery, client, table_version):
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter(_rows(200))
+
+    first = client.get("/api/transactions/alerts", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["ETag"].endswith('-gzip"')
+    assert len(json.loads(gzip.decompress(first.get_data()))["data"]) == 200
+
+    second = client.get("/api/transactions/alerts", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": first.headers["ETag"]
+    })
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert "Accept-Encoding" in second.headers["Vary"]
+
+def test_table_version_reads_table_metadata(mock_bigquery, monkeypatch):
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+    monkeypatch.setattr("app.STATUS_EVENTS_TABLE", "")
+    app_module.table_versions.invalidate()
+    mock_bigquery.get_table.return_value = SimpleNamespace(modified="2025-05-01")
+
+    assert real_table_version() == "2025-05-01"
+    assert real_table_version() == "2025-05-01"
+    assert mock_bigquery.get_table.call_count == 1
+
+    app_module.invalidate_caches()
+    mock_bigquery.get_table.side_effect = Exception("unavailable")
+    assert real_table_version() is None
+
+def test_compression_threshold(mock_bigquery, client, monkeypatch):
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter(_rows(1))
+
+    small = client.get("/api/transactions/alerts", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+    monkeypatch.setattr("app.COMPRESS_MIN_BYTES", 1)
+    large = client.get("/api/transactions/alerts", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in large.headers["Vary"]
+
+    plain = client.get("/api/transactions/alerts")
+    assert "Content-Encoding" not in plain.headers
+
+def test_streamed_export_is_not_buffered(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.COMPRESS_MIN_BYTES", 1)
+    results = MagicMock()
+    results.schema = [SimpleNamespace(name="transaction_id")]
+    results.pages = iter([[{"transaction_id": "t1"}]])
+    mock_bigquery.query.return_value.result.return_value = results
+
+    response = client.get("/api/transactions/export", headers={"Accept-Encoding": "gzip"})
+    assert response.is_streamed
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True).splitlines() == ["transaction_id", "t1"]
+
+def test_fast_provider_matches_stock_provider():
+    payload = {
+        "date": date(2025, 5, 1),
+        "datetime": datetime(2025, 5, 1, 13, 45, 30),
+        "amount": Decimal("12.50"),
+        "nested": [{"b": 1, "a": None}]
+    }
+    with app_module.app.app_context():
+        fast = FastJSONProvider(app_module.app)
+        stock = DefaultJSONProvider(app_module.app)
+        assert json.loads(fast.dumps(payload)) == json.loads(stock.dumps(payload))
+        assert json.loads(fast.response(payload).get_data()) == json.loads(stock.response(payload).get_data())
+
+def test_jsonify_uses_orjson(monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    calls = []
+    real_dumps = orjson.dumps
+    monkeypatch.setattr("responses.orjson.dumps", lambda *a, **k: calls.append(1) or real_dumps(*a, **k))
+
+    with app_module.app.app_context():
+        response = app_module.jsonify({"data": [{"transaction_date": date(2025, 5, 1)}]})
+    assert calls
+    assert response.get_json() == {"data": [{"transaction_date": "Thu, 01 May 2025 00:00:00 GMT"}]}
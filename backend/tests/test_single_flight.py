@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return "rows"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "key", slow) for _ in range(8)]
+        # Let every caller queue up behind the first before it finishes
+        while len(calls) == 0:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == "rows" for result, _ in results)
+    assert sum(not shared for _, shared in results) == 1
+    assert len(flight) == 0
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flight.do("key", MagicMock(side_effect=RuntimeError("boom")))
+    assert flight.do("key", lambda: 1) == (1, False)
+
+def test_identical_requests_share_one_bigquery_job(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+    release = threading.Event()
+
+    def query(*args, **kwargs):
+        job = MagicMock()
+        job.result.side_effect = lambda **kw: release.wait(2) and iter([{"category": "Speeding", "count": 3}])
+        return job
+    mock_bigquery.query.side_effect = query
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        futures = [pool.submit(client.get, "/api/charts/category") for _ in range(6)]
+        time.sleep(0.2)
+        release.set()
+        responses = [future.result() for future in futures]
+
+    assert mock_bigquery.query.call_count == 1
+    assert all(response.get_json()["data"] == [{"category": "Speeding", "count": 3}] for response in responses)
+
+def test_writes_are_never_coalesced(monkeypatch):
+    import app
+
+    execute = MagicMock(return_value=iter([]))
+    monkeypatch.setattr("app.execute_query", execute)
+    app.run_query("UPDATE t SET status = 'x' WHERE true")
+    app.run_query("SELECT 1", coalesce=False)
+    assert execute.call_count == 2
+    assert len(app.in_flight_queries) == 0
+
+def test_coalescing_key_ignores_indentation():
+    import app
+
+    assert app.coalescing_key("  SELECT 1\n\n    FROM t", None) == app.coalescing_key("SELECT 1\nFROM t", None)
+    assert app.coalescing_key("SELECT 'a  b'", None) != app.coalescing_key("SELECT 'a b'", None)
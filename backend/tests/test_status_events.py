@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import app as app_module
+
+EVENTS_TABLE = "njc-ezpass.ezpass_data.transaction_status_events"
+
+# conftest replaces app.table_version for every test; keep the real one
+real_table_version = app_module.table_version
+
+def _lookup(rows):
+    def fake_query(query, *args, **kwargs):
+        job = MagicMock()
+        job.result.return_value = iter(rows)
+        return job
+    return fake_query
+
+def test_update_status_appends_event_instead_of_update(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = _lookup([{"transaction_id": "txn123", "status": "Needs Review"}])
+
+    response = client.post("/api/transactions/update-status", json={
+        "transactionId": "txn123",
+        "newStatus": "Investigating"
+    })
+
+    assert response.status_code == 200
+    assert not any("UPDATE" in call.args[0] for call in mock_bigquery.query.call_args_list)
+    table_id, rows = mock_bigquery.insert_rows_json.call_args.args
+    assert table_id == EVENTS_TABLE
+    assert rows == [{
+        "transaction_id": "txn123",
+        "status": "Investigating",
+        "previous_status": "Needs Review",
+        "changed_at": rows[0]["changed_at"]
+    }]
+    assert len(mock_bigquery.insert_rows_json.call_args.kwargs["row_ids"]) == 1
+
+def test_bulk_update_status_appends_one_batch(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = _lookup([
+        {"transaction_id": "t1", "status": "Needs Review"},
+        {"transaction_id": "t2", "status": "Investigating"}
+    ])
+
+    response = client.post("/api/transactions/update-status/bulk", json={"updates": [
+        {"transactionId": "t1", "newStatus": "Investigating"},
+        {"transactionId": "t2", "newStatus": "Resolved - Fraud"}
+    ]})
+
+    assert response.status_code == 200
+    assert sorted(response.get_json()["updated"]) == ["t1", "t2"]
+    assert mock_bigquery.insert_rows_json.call_count == 1
+    assert not any("MERGE" in call.args[0] for call in mock_bigquery.query.call_args_list)
+
+def test_failed_event_insert_is_an_error(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.side_effect = _lookup([{"transaction_id": "txn123", "status": "Needs Review"}])
+    mock_bigquery.insert_rows_json.return_value = [{"index": 0, "errors": ["invalid"]}]
+
+    response = client.post("/api/transactions/update-status", json={
+        "transactionId": "txn123",
+        "newStatus": "Investigating"
+    })
+    assert response.status_code == 500
+
+def test_event_append_rechecks_status(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    # Validated against Needs Review, but another analyst moved it on before the append
+    statuses = iter(["Needs Review", "Investigating"])
+    mock_bigquery.query.side_effect = lambda query, *args, **kwargs: _lookup([
+        {"transaction_id": "txn123", "status": next(statuses)}
+    ])(query)
+
+    response = client.post("/api/transactions/update-status", json={
+        "transactionId": "txn123",
+        "newStatus": "Investigating"
+    })
+
+    assert response.status_code == 409
+    assert response.get_json()["current_status"] == "Needs Review"
+    mock_bigquery.insert_rows_json.assert_not_called()
+
+def test_bulk_event_append_skips_changed_rows(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    lookups = iter([
+        [{"transaction_id": "t1", "status": "Needs Review"}, {"transaction_id": "t2", "status": "Needs Review"}],
+        [{"transaction_id": "t1", "status": "Needs Review"}, {"transaction_id": "t2", "status": "Investigating"}]
+    ])
+    mock_bigquery.query.side_effect = lambda query, *args, **kwargs: _lookup(next(lookups))(query)
+
+    response = client.post("/api/transactions/update-status/bulk", json={"updates": [
+        {"transactionId": "t1", "newStatus": "Investigating"},
+        {"transactionId": "t2", "newStatus": "Investigating"}
+    ]})
+
+    body = response.get_json()
+    assert body["updated"] == ["t1"]
+    assert body["errors"][0]["transactionId"] == "t2"
+    assert body["errors"][0]["error"] == "Status changed concurrently"
+    _, rows = mock_bigquery.insert_rows_json.call_args.args
+    assert [row["transaction_id"] for row in rows] == ["t1"]
+
+def test_reads_overlay_latest_event(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    client.get("/api/transactions/alerts")
+
+    query = mock_bigquery.query.call_args[0][0]
+    assert f"`{EVENTS_TABLE}`" in query
+    assert "COALESCE(e.status, t.status) AS status" in query
+
+def test_missing_event_table_falls_back_to_in_place_update(mock_bigquery, client, monkeypatch):
+    from google.api_core.exceptions import NotFound
+
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.get_table.side_effect = NotFound("transaction_status_events")
+    mock_bigquery.query.side_effect = _lookup([{"transaction_id": "txn123", "status": "Needs Review"}])
+
+    assert app_module.get_table() == "`njc-ezpass.ezpass_data.master_viz`"
+    response = client.post("/api/transactions/update-status", json={
+        "transactionId": "txn123",
+        "newStatus": "Investigating"
+    })
+    assert response.status_code == 200
+    assert any("UPDATE" in call.args[0] for call in mock_bigquery.query.call_args_list)
+    mock_bigquery.insert_rows_json.assert_not_called()
+
+def test_gold_automation_is_updated_in_place(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "gold_automation")
+    assert app_module.get_status_events_table_id() is None
+    assert app_module.get_table() == "`njc-ezpass.ezpass_data.gold_automation`"
+
+def test_table_version_follows_streamed_events(mock_bigquery, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+    app_module.table_versions.invalidate()
+    tables = {
+        "njc-ezpass.ezpass_data.master_viz": SimpleNamespace(modified="2025-05-01"),
+        EVENTS_TABLE: SimpleNamespace(modified="2025-04-01", num_rows=10, streaming_buffer=SimpleNamespace(estimated_rows=2))
+    }
+    mock_bigquery.get_table.side_effect = tables.get
+    assert real_table_version() == "2025-05-01|10+2"
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import telemetry
+
+@pytest.fixture(autouse=True)
+def reset_telemetry():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+def _job(rows, **stats):
+    job = MagicMock(job_id="job-123", total_bytes_processed=2048, total_bytes_billed=10485760,
+                    cache_hit=False, slot_millis=350)
+    job.configure_mock(**stats)
+    job.result.return_value = iter(rows)
+    return job
+
+def test_stats_record_job_statistics(mock_bigquery, client):
+    mock_bigquery.query.return_value = _job([{"transaction_id": "t1"}])
+    client.get("/api/transactions/alerts")
+    mock_bigquery.query.return_value = _job([], cache_hit=True, total_bytes_billed=0)
+    client.get("/api/transactions/alerts")
+
+    stats = client.get("/api/_stats").get_json()["routes"]["/api/transactions/alerts"]
+    assert stats["requests"] == 2
+    assert stats["queries"] == 2
+    assert stats["bytes_processed"] == 4096
+    assert stats["bytes_billed"] == 10485760
+    assert stats["bigquery_cache_hits"] == 1
+    assert stats["slot_ms"] == 700
+    assert stats["payload_bytes"] > 0
+    assert stats["serialization_seconds"] > 0
+    assert stats["latency_seconds"]["p50"] is not None
+    assert stats["recent_jobs"][0]["job_id"] == "job-123"
+
+def test_stats_count_response_cache_hits(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    monkeypatch.setattr("app.ROLLUP_TABLE", "")
+    mock_bigquery.query.return_value.result.side_effect = lambda *a, **k: iter([{"hour": 8, "fraud_count": 2}])
+
+    client.get("/api/charts/timeseries")
+    client.get("/api/charts/timeseries")
+
+    stats = client.get("/api/_stats").get_json()["routes"]["/api/charts/timeseries"]
+    assert stats["requests"] == 2
+    assert stats["response_cache_hits"] == 1
+    assert stats["queries"] == 1
+
+def test_prometheus_metrics(mock_bigquery, client):
+    mock_bigquery.query.return_value = _job([])
+    client.get("/api/transactions/alerts")
+
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert '# TYPE ezpass_request_duration_seconds summary' in text
+    assert 'ezpass_request_duration_seconds{route="/api/transactions/alerts",quantile="0.99"}' in text
+    assert 'ezpass_bigquery_bytes_billed_total{route="/api/transactions/alerts"} 10485760' in text
+    # The telemetry endpoints do not report on themselves
+    assert 'route="/metrics"' not in text
@@ -33,3 +33,40 @@ def test_transactions_count_with_filters(mock_bigquery, client):
     data = response.get_json()
     assert "total" in data
     assert data["total"] == 0  # Our mock always returns 0
+
+def test_approx_count_unfiltered_uses_table_metadata(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.DEFAULT_WINDOW_DAYS", 0)
+    mock_bigquery.get_table.return_value = MagicMock(num_rows=1234)
+
+    data = client.get("/api/transactions/count?approx=true").get_json()
+    assert data == {"total": 1234, "approximate": True, "source": "metadata",
+                    "window": {"start_date": None, "end_date": None}}
+    mock_bigquery.query.assert_not_called()
+
+def test_approx_count_status_filter_uses_rollup(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = iter([{"total": 42}])
+
+    data = client.get("/api/transactions/count?approx=true&status=Needs+Review").get_json()
+    assert data["total"] == 42 and data["source"] == "rollup"
+    query = mock_bigquery.query.call_args[0][0]
+    assert "dashboard_rollup" in query
+    assert "status = @status" in query and "transaction_date >= @start_date" in query
+
+def test_approx_count_search_is_cached_per_filters(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = iter([{"total": 7}])
+
+    first = client.get("/api/transactions/count?approx=true&search=abc")
+    second = client.get("/api/transactions/count?approx=true&search=abc")
+    assert first.get_json()["source"] == "query"
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert second.get_json()["total"] == 7
+    assert mock_bigquery.query.call_count == 1
+
+    # Exact counts always run, and refresh what approx=true serves
+    mock_bigquery.query.return_value.result.return_value = iter([{"total": 8}])
+    assert client.get("/api/transactions/count?search=abc").get_json() == {
+        "total": 8, "window": first.get_json()["window"]
+    }
+    assert client.get("/api/transactions/count?approx=true&search=abc").get_json()["total"] == 8
@@ -1,3 +1,5 @@
+from google.cloud import bigquery
+
 def test_transactions_returns_rows(mock_bigquery, client):
     # Mock a fake BigQuery response row
     mock_bigquery.query.return_value.result.return_value = [
@@ -11,3 +13,256 @@ def test_transactions_returns_rows(mock_bigquery, client):
     data = response.get_json()
     assert len(data["data"]) == 2
     assert data["data"][0]["transaction_id"] == 123
+
+def test_transactions_cursor_first_page(mock_bigquery, client):
+    from datetime import date
+    from app import decode_cursor
+
+    mock_bigquery.query.return_value.result.return_value = [
+        {"transaction_id": "t3", "transaction_date": date(2025, 5, 3)},
+        {"transaction_id": "t2", "transaction_date": date(2025, 5, 2)},
+        {"transaction_id": "t1", "transaction_date": date(2025, 5, 1)}
+    ]
+
+    response = client.get("/api/transactions?cursor=&limit=2")
+    assert response.status_code == 200
+
+    data = response.get_json()
+    assert len(data["data"]) == 2
+    assert decode_cursor(data["next_cursor"]) == (date(2025, 5, 2), "t2")
+    params = mock_bigquery.query.call_args[1]["job_config"].query_parameters
+    assert {p.name: p.value for p in params}["limit"] == 3
+
+def test_transactions_cursor_seeks_from_last_row(mock_bigquery, client):
+    from datetime import date
+    from app import encode_cursor
+
+    mock_bigquery.query.return_value.result.return_value = [
+        {"transaction_id": "t1", "transaction_date": date(2025, 5, 1)}
+    ]
+    cursor = encode_cursor({"transaction_id": "t2", "transaction_date": date(2025, 5, 2)})
+
+    response = client.get(f"/api/transactions?cursor={cursor}&limit=2")
+    assert response.status_code == 200
+    assert response.get_json()["next_cursor"] is None
+
+    query = mock_bigquery.query.call_args[0][0]
+    params = mock_bigquery.query.call_args[1]["job_config"].query_parameters
+    assert "transaction_date <= @cursor_date" in query
+    assert "OFFSET" not in query
+    values = {p.name: p.value for p in params}
+    assert values["cursor_date"] == date(2025, 5, 2)
+    assert values["cursor_id"] == "t2"
+
+def test_transactions_invalid_cursor(client):
+    response = client.get("/api/transactions?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid cursor"
+
+def test_transactions_filters_are_parameterized(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.SEARCH_INDEX_TABLE", "")
+    monkeypatch.setattr("app.DEFAULT_WINDOW_DAYS", 0)
+    # One job per page, so the page's own limit and offset are bound
+    monkeypatch.setattr("app.RESULT_REUSE_MAX_ROWS", 0)
+    mock_bigquery.query.return_value.result.return_value = []
+
+    response = client.get("/api/transactions?search=O'Brien&status=Needs+Review&category=all")
+    assert response.status_code == 200
+
+    query = mock_bigquery.query.call_args[0][0]
+    params = mock_bigquery.query.call_args[1]["job_config"].query_parameters
+    assert "O'Brien" not in query and "o'brien" not in query
+    assert "@category" not in query
+    assert {p.name: p.value for p in params} == {
+        "search": "o'brien", "status": "Needs Review", "limit": 50, "offset": 0
+    }
+
+def test_transactions_include_total_single_job(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = [
+        {"transaction_id": "t1", "total_count": 120}
+    ]
+
+    response = client.get("/api/transactions?include_total=true")
+    data = response.get_json()
+    assert data["total"] == 120
+    assert "total_count" not in data["data"][0]
+    assert "COUNT(*) OVER()" in mock_bigquery.query.call_args[0][0]
+    assert mock_bigquery.query.call_count == 1
+
+def test_query_template_reused_across_searches():
+    from query_builder import listing_query, parse_filters
+
+    first, _ = listing_query("`t`", "master_viz", parse_filters({"search": "abc"}), 50)
+    second, _ = listing_query("`t`", "master_viz", parse_filters({"search": "xyz"}), 50, offset=50)
+    assert first is second
+
+def test_transactions_exact_search_fast_path(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = []
+
+    response = client.get("/api/transactions?search=abc123&match=exact")
+    assert response.status_code == 200
+
+    query = mock_bigquery.query.call_args[0][0]
+    params = mock_bigquery.query.call_args[1]["job_config"].query_parameters
+    assert "tag_plate_number IN (@search, UPPER(@search))" in query
+    assert "transaction_id IN (@search, LOWER(@search))" in query
+    assert "LIKE" not in query
+    assert {p.name: p.value for p in params}["search"] == "abc123"
+
+def test_transactions_substring_search_uses_ngram_index(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = []
+
+    client.get("/api/transactions?search=AbC12")
+
+    query = mock_bigquery.query.call_args[0][0]
+    params = {p.name: p for p in mock_bigquery.query.call_args[1]["job_config"].query_parameters}
+    assert "search_ngrams" in query
+    assert params["ngrams"].values == ["abc", "bc1", "c12"]
+    assert params["ngram_count"].value == 3
+
+def test_transactions_category_search_skips_ngram_index(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = []
+
+    client.get("/api/transactions?search=critical")
+
+    query = mock_bigquery.query.call_args[0][0]
+    assert "search_ngrams" not in query
+    assert "ml_predicted_category AS STRING" in query
+
+def test_transactions_no_risk_search_keeps_category_match(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    mock_bigquery.query.return_value.result.return_value = []
+
+    for term in ("No Risk", "no r"):
+        client.get(f"/api/transactions?search={term}")
+        query = mock_bigquery.query.call_args[0][0]
+        assert "search_ngrams" not in query
+        assert "ml_predicted_category AS STRING" in query
+
+def test_transactions_invalid_match(client):
+    assert client.get("/api/transactions?search=x&match=fuzzy").status_code == 400
+
+def _schema(mock_bigquery, *columns):
+    from types import SimpleNamespace
+
+    mock_bigquery.get_table.return_value = SimpleNamespace(schema=[SimpleNamespace(name=c) for c in columns])
+
+def test_transactions_default_projection_is_listing_columns(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    _schema(mock_bigquery, "transaction_id", "transaction_date", "amount", "driver_amount_median")
+
+    client.get("/api/transactions?limit=2")
+
+    query = mock_bigquery.query.call_args[0][0]
+    assert "SELECT transaction_id, transaction_date, amount\n" in query
+    assert "driver_amount_median" not in query
+
+def test_transactions_fields_projection(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    _schema(mock_bigquery, "transaction_id", "transaction_date", "amount", "status")
+
+    client.get("/api/transactions?cursor=&fields=amount,status")
+
+    # Keyset pages always carry the cursor columns
+    assert "SELECT amount, status, transaction_date, transaction_id\n" in mock_bigquery.query.call_args[0][0]
+
+    client.get("/api/transactions?fields=*")
+    assert "SELECT *\n" in mock_bigquery.query.call_args[0][0]
+
+def test_transactions_unknown_field_is_rejected(mock_bigquery, client, monkeypatch):
+    monkeypatch.setattr("app.TABLE_NAME", "master_viz")
+    _schema(mock_bigquery, "transaction_id", "amount")
+
+    response = client.get("/api/transactions?fields=amount,1;DROP")
+    assert response.status_code == 400
+    assert "1;DROP" in response.get_json()["error"]
+    assert not mock_bigquery.query.called
+
+def test_transaction_detail(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = [{"transaction_id": "t1", "driver_amount_median": 4.5}]
+
+    response = client.get("/api/transactions/t1?transaction_date=2025-05-01")
+    assert response.status_code == 200
+    assert response.get_json()["data"]["driver_amount_median"] == 4.5
+
+    query = mock_bigquery.query.call_args[0][0]
+    assert "SELECT *" in query
+    assert "transaction_date = @transaction_date" in query
+    params = {p.name: p.value for p in mock_bigquery.query.call_args[1]["job_config"].query_parameters}
+    assert params["transaction_id"] == "t1"
+
+def test_transaction_detail_not_found(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = []
+    assert client.get("/api/transactions/missing").status_code == 404
+    assert client.get("/api/transactions/t1?transaction_date=May").status_code == 400
+
+def test_transactions_default_date_window(mock_bigquery, client, monkeypatch):
+    from datetime import date, timedelta
+
+    monkeypatch.setattr("app.DEFAULT_WINDOW_DAYS", 90)
+    mock_bigquery.query.return_value.result.return_value = []
+
+    data = client.get("/api/transactions").get_json()
+    query = mock_bigquery.query.call_args[0][0]
+    params = {p.name: p.value for p in mock_bigquery.query.call_args[1]["job_config"].query_parameters}
+    assert "transaction_date >= @start_date" in query
+    assert date.fromisoformat(data["window"]["start_date"]) == params["start_date"]
+    assert params["start_date"] >= date.today() - timedelta(days=91)
+    assert data["window"]["end_date"] is None
+
+def test_transactions_all_history_and_invalid_window(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = []
+
+    data = client.get("/api/transactions?start_date=all").get_json()
+    assert data["window"] == {"start_date": None, "end_date": None}
+    assert "@start_date" not in mock_bigquery.query.call_args[0][0]
+
+    response = client.get("/api/transactions?start_date=2025-06-01&end_date=2025-05-01")
+    assert response.status_code == 400
+
+class ResultRows(list):
+    """RowIterator stand-in: rows plus the result schema."""
+    schema = [bigquery.SchemaField("transaction_id", "STRING")]
+
+def test_transactions_later_pages_read_the_first_result(mock_bigquery, client):
+    mock_bigquery.query.return_value.result.return_value = ResultRows([{"transaction_id": "t1"}])
+    mock_bigquery.query.return_value.destination = "project._anon.result"
+    mock_bigquery.list_rows.return_value = iter([{"transaction_id": "t51"}])
+
+    first = client.get("/api/transactions?page=1&limit=50").get_json()
+    second = client.get("/api/transactions?page=2&limit=50").get_json()
+
+    assert first["data"] == [{"transaction_id": "t1"}]
+    assert second["data"] == [{"transaction_id": "t51"}]
+    # One job, materializing the sorted listing up to RESULT_REUSE_MAX_ROWS
+    assert mock_bigquery.query.call_count == 1
+    params = {p.name: p.value for p in mock_bigquery.query.call_args[1]["job_config"].query_parameters}
+    assert params["limit"] == 10000 and params["offset"] == 0
+    mock_bigquery.query.return_value.result.assert_called_once_with(start_index=0, max_results=50)
+    # With the schema, so list_rows doesn't fetch the table's metadata first
+    mock_bigquery.list_rows.assert_called_once_with(
+        "project._anon.result", selected_fields=ResultRows.schema, start_index=50, max_results=50
+    )
+
+def test_transactions_expired_result_table_reruns_listing(mock_bigquery, client):
+    from google.api_core.exceptions import NotFound
+
+    mock_bigquery.query.return_value.result.return_value = ResultRows([{"transaction_id": "t1"}])
+    mock_bigquery.list_rows.side_effect = NotFound("expired")
+
+    client.get("/api/transactions?page=1")
+    response = client.get("/api/transactions?page=2")
+    assert response.status_code == 200
+    assert mock_bigquery.query.call_count == 2
+
+def test_transactions_result_tables_dropped_after_status_write(mock_bigquery, client):
+    from app import invalidate_caches, result_tables
+
+    mock_bigquery.query.return_value.result.return_value = ResultRows()
+    client.get("/api/transactions?page=1")
+    assert len(result_tables) == 1
+    invalidate_caches()
+    assert len(result_tables) == 0
@@ -1,5 +1,11 @@
+import pytest
 from unittest.mock import MagicMock
 
+@pytest.fixture(autouse=True)
+def update_in_place(monkeypatch):
+    """These tests cover the DML path; test_status_events.py covers the event table."""
+    monkeypatch.setattr("app.STATUS_EVENTS_TABLE", "")
+
 def test_update_status_success(mock_bigquery, client, monkeypatch):
     monkeypatch.setattr("app.TABLE_NAME", "master_viz")
 
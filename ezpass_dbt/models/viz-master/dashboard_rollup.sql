@@ -0,0 +1,68 @@
+{{ config(
+    materialized='table',
+    partition_by={
+        'field': 'transaction_date',
+        'data_type': 'date'
+    },
+    cluster_by=['rollup_type', 'is_anomaly'],
+    tags=['master', 'visualization']
+) }}
+
+-- Daily pre-aggregation of master_viz for the dashboard endpoints.
+-- 'total' rows hold counts/amounts per date, hour, risk category, status and anomaly flag;
+-- 'flag' rows hold the same measures per rule-based flag (one row per flag that fired).
+
+WITH master AS (
+    SELECT * FROM {{ ref('master_viz') }}
+),
+
+flags AS (
+    SELECT
+        m.transaction_date,
+        EXTRACT(HOUR FROM m.entry_time) AS hour,
+        m.ml_predicted_category AS risk_category,
+        m.status,
+        m.is_anomaly,
+        f.flag_label,
+        m.amount
+    FROM master m,
+    UNNEST([
+        STRUCT('Rush Hour' AS flag_label, m.flag_rush_hour AS flag_value),
+        STRUCT('Weekend' AS flag_label, m.flag_is_weekend AS flag_value),
+        STRUCT('Holiday' AS flag_label, m.flag_is_holiday AS flag_value),
+        STRUCT('Overlapping Journey' AS flag_label, m.flag_overlapping_journey AS flag_value),
+        STRUCT('Driver Amount Outlier' AS flag_label, m.flag_driver_amount_outlier AS flag_value),
+        STRUCT('Route Amount Outlier' AS flag_label, m.flag_route_amount_outlier AS flag_value),
+        STRUCT('Amount Unusually High' AS flag_label, m.flag_amount_unusually_high AS flag_value),
+        STRUCT('Driver Spend Spike' AS flag_label, m.flag_driver_spend_spike AS flag_value)
+    ]) AS f
+    WHERE f.flag_value IS TRUE
+)
+
+SELECT
+    'total' AS rollup_type,
+    transaction_date,
+    EXTRACT(HOUR FROM entry_time) AS hour,
+    ml_predicted_category AS risk_category,
+    status,
+    is_anomaly,
+    CAST(NULL AS STRING) AS flag_label,
+    COUNT(*) AS transaction_count,
+    SUM(amount) AS total_amount
+FROM master
+GROUP BY transaction_date, hour, risk_category, status, is_anomaly
+
+UNION ALL
+
+SELECT
+    'flag' AS rollup_type,
+    transaction_date,
+    hour,
+    risk_category,
+    status,
+    is_anomaly,
+    flag_label,
+    COUNT(*) AS transaction_count,
+    SUM(amount) AS total_amount
+FROM flags
+GROUP BY transaction_date, hour, risk_category, status, is_anomaly, flag_label
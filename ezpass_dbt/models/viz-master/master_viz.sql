@@ -5,7 +5,18 @@
         'data_type': 'date'
     },
     cluster_by=['tag_plate_number', 'ml_predicted_category', 'transaction_date'],
-    tags=['master', 'visualization']
+    tags=['master', 'visualization'],
+    pre_hook="""
+        CREATE TABLE IF NOT EXISTS {{ source('ezpass_app', 'transaction_status_events') }} (
+            transaction_id STRING NOT NULL,
+            status STRING NOT NULL,
+            previous_status STRING,
+            changed_at TIMESTAMP NOT NULL
+        )
+        PARTITION BY DATE(changed_at)
+        CLUSTER BY transaction_id
+        OPTIONS (description = 'Append-only analyst status changes for master_viz')
+    """
 ) }}
 
 WITH predictions AS (
@@ -14,18 +25,31 @@ WITH predictions AS (
 
 gold_data AS (
     SELECT * FROM {{ ref('gold') }}
+),
+
+-- Latest analyst status change per transaction, so statuses survive rebuilds
+status_events AS (
+    SELECT
+        transaction_id,
+        MAX_BY(status, changed_at) AS status,
+        MAX(changed_at) AS changed_at
+    FROM {{ source('ezpass_app', 'transaction_status_events') }}
+    GROUP BY transaction_id
 )
 
 SELECT 
     -- ===== CORE IDENTIFIERS =====
 
     
-    -- Status column for workflow management
-    CASE 
-        WHEN LOWER(p.anomaly_category) IN ('high risk', 'critical risk') THEN 'Needs Review'
-        WHEN p.anomaly_category IS NULL THEN NULL
-        ELSE 'No Action Required'
-    END AS status,
+    -- Status column for workflow management (an analyst's change wins)
+    COALESCE(
+        e.status,
+        CASE 
+            WHEN LOWER(p.anomaly_category) IN ('high risk', 'critical risk') THEN 'Needs Review'
+            WHEN p.anomaly_category IS NULL THEN NULL
+            ELSE 'No Action Required'
+        END
+    ) AS status,
     
     g.transaction_id,
     g.transaction_date,
@@ -120,10 +144,12 @@ SELECT
     
     -- ===== METADATA =====
     p.prediction_timestamp,
-    g.last_updated,
+    IF(e.changed_at > g.last_updated OR g.last_updated IS NULL, e.changed_at, g.last_updated) AS last_updated,
     -- g.source_file
 
 FROM gold_data g
 LEFT JOIN predictions p
     ON g.transaction_id = p.transaction_id
+LEFT JOIN status_events e
+    ON g.transaction_id = e.transaction_id
 
@@ -0,0 +1,25 @@
+{{ config(
+    materialized='table',
+    cluster_by=['ngram'],
+    tags=['master', 'visualization']
+) }}
+
+-- Trigram lookup table for substring search on transaction_id and tag_plate_number.
+-- The backend resolves a search term to the transactions containing all of its
+-- trigrams, so a lookup only reads the clusters of those trigrams.
+
+WITH search_keys AS (
+    SELECT
+        transaction_id,
+        LOWER(search_key) AS search_key
+    FROM {{ ref('master_viz') }},
+    UNNEST([CAST(transaction_id AS STRING), tag_plate_number]) AS search_key
+    WHERE search_key IS NOT NULL
+        AND LENGTH(search_key) >= 3
+)
+
+SELECT DISTINCT
+    SUBSTR(search_key, position, 3) AS ngram,
+    transaction_id
+FROM search_keys,
+UNNEST(GENERATE_ARRAY(1, LENGTH(search_key) - 2)) AS position
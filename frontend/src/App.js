@@ -30,7 +30,8 @@ const fetchTransactions = async (page = 1, limit = 50, search = '', status = 'al
 
 const fetchTransactionsCount = async (search = '', status = 'all', category = 'all') => {
     try {
-        const params = new URLSearchParams();
+        // "Page X of ~Y" only needs an estimate; the backend serves it from metadata or cache
+        const params = new URLSearchParams({ approx: 'true' });
         if (search) params.append('search', search);
         if (status && status !== 'all') params.append('status', status);
         if (category && category !== 'all') params.append('category', category);
@@ -873,6 +874,23 @@ const DashboardView = ({ setActiveView }) => {
 
         loadRecentTransactions();
         loadMetrics();
+
+        // New or changed alerts are pushed by the backend instead of re-polled
+        const stream = new EventSource(`${apiUrl}/api/alerts/stream`);
+        stream.addEventListener('alerts', (event) => {
+            const { data } = JSON.parse(event.data);
+            setRecentFlaggedTransactions((current) => {
+                const changed = new Set(data.map((row) => row.id));
+                const latest = [...data].reverse();
+                return [...latest, ...current.filter((row) => !changed.has(row.id))].slice(0, 3);
+            });
+        });
+        stream.addEventListener('resync', () => {
+            loadRecentTransactions();
+            loadMetrics();
+        });
+
+        return () => stream.close();
     }, []);
 
     return (
@@ -1242,14 +1260,9 @@ const DataView = () => {
         const loadData = async () => {
             setLoading(true);
             try {
-                // Fetch data and count in parallel
-                const [data, count] = await Promise.all([
-                    fetchTransactions(currentPage, itemsPerPage, searchDebounce, filterStatus, filterMLCategory),
-                    fetchTransactionsCount(searchDebounce, filterStatus, filterMLCategory)
-                ]);
+                const data = await fetchTransactions(currentPage, itemsPerPage, searchDebounce, filterStatus, filterMLCategory);
                 
                 setTransactionData(data);
-                setTotalCount(count);
                 
                 // Detect table type from the data
                 if (data && data.length > 0) {
@@ -1258,7 +1271,6 @@ const DataView = () => {
             } catch (error) {
                 console.error('Error loading transactions:', error);
                 setTransactionData([]);
-                setTotalCount(0);
             } finally {
                 setLoading(false);
             }
@@ -1266,6 +1278,15 @@ const DataView = () => {
         loadData();
     }, [currentPage, searchDebounce, filterStatus, filterMLCategory]);
 
+    // The total only depends on the filters, not on the page
+    useEffect(() => {
+        let cancelled = false;
+        fetchTransactionsCount(searchDebounce, filterStatus, filterMLCategory).then(count => {
+            if (!cancelled) setTotalCount(count);
+        });
+        return () => { cancelled = true; };
+    }, [searchDebounce, filterStatus, filterMLCategory]);
+
     // Reset to page 1 when search or filters change
     useEffect(() => {
         setCurrentPage(1);
@@ -122,7 +122,8 @@ with DAG(
         }
     )
     
-    # Task 8: Run master_viz models
+    # Task 8: Run master_viz models (its pre-hook creates the transaction_status_events
+    # source if no main DAG run has yet, so this DAG works on a fresh project)
     dbt_run_master_viz = BashOperator(
         task_id='dbt_master_table',
         bash_command=f'export PATH="$PATH:/home/airflow/.local/bin" && cd {DBT_PROJECT_DIR} && dbt run --select master_viz --profiles-dir {DBT_PROFILES_DIR}',
@@ -134,6 +135,18 @@ with DAG(
         }
     )
     
-    # Execution order: deps -> silver -> gold_rulebased/gold_train -> remaining gold -> model_training DAG -> pred_viz -> master_viz
-    dbt_deps >> dbt_run_silver >> dbt_run_gold_train >> dbt_run_gold >> trigger_model_training >> dbt_run_pred_viz >> dbt_run_master_viz
+    # Task 9: Run dashboard rollup and search index over master_viz
+    dbt_run_master_derived = BashOperator(
+        task_id='dbt_master_derived_tables',
+        bash_command=f'export PATH="$PATH:/home/airflow/.local/bin" && cd {DBT_PROJECT_DIR} && dbt run --select dashboard_rollup search_ngrams --profiles-dir {DBT_PROFILES_DIR}',
+        env={
+            'GOOGLE_APPLICATION_CREDENTIALS': '/opt/airflow/config/gcp-key.json',
+            'GCS_PROJECT_ID': GCS_PROJECT_ID or '',
+            'BIGQUERY_DATASET': BIGQUERY_DATASET,
+            'PATH': '/home/airflow/.local/bin:/usr/local/bin:/usr/bin:/bin',
+        }
+    )
+    
+    # Execution order: deps -> silver -> gold_rulebased/gold_train -> remaining gold -> model_training DAG -> pred_viz -> master_viz -> dashboard_rollup/search_ngrams
+    dbt_deps >> dbt_run_silver >> dbt_run_gold_train >> dbt_run_gold >> trigger_model_training >> dbt_run_pred_viz >> dbt_run_master_viz >> dbt_run_master_derived
 
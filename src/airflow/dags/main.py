@@ -25,6 +25,8 @@ BIGQUERY_TRAIN = os.getenv('BIGQUERY_TRAIN', 'gold_train')
 DBT_PROJECT_DIR = '/opt/airflow/dbt_project'
 DBT_PROFILES_DIR = '/opt/airflow/config'
 ML_TRAINING_PATH = '/opt/airflow/ml_train'
+DASHBOARD_API_URL = os.getenv('DASHBOARD_API_URL', '')
+PREWARM_TOKEN = os.getenv('PREWARM_TOKEN', '')
 
 # Column mapping from raw to normalized names
 COLUMN_MAPPING = {
@@ -883,6 +885,42 @@ def create_predictions_table(**context):
     
     return table_id
 
+def create_status_events_table(**context):
+    """Create transaction_status_events (analyst status changes) if it doesn't exist"""
+    from google.cloud import bigquery
+    
+    if not GCS_PROJECT_ID:
+        raise ValueError("GCS_PROJECT_ID must be set")
+    
+    client = bigquery.Client(project=GCS_PROJECT_ID)
+    table_id = f"{GCS_PROJECT_ID}.{BIGQUERY_DATASET}.transaction_status_events"
+    
+    # Appended to by the dashboard backend, folded into master_viz by dbt
+    schema = [
+        bigquery.SchemaField("transaction_id", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("status", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("previous_status", "STRING", mode="NULLABLE"),
+        bigquery.SchemaField("changed_at", "TIMESTAMP", mode="REQUIRED"),
+    ]
+    
+    try:
+        table = client.get_table(table_id)
+        print(f"✓ Table already exists: {table_id}")
+    except Exception:
+        print(f"Creating new table: {table_id}")
+        table = bigquery.Table(table_id, schema=schema)
+        table.description = "Append-only analyst status changes for master_viz"
+        table.time_partitioning = bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.DAY,
+            field="changed_at"
+        )
+        table.clustering_fields = ["transaction_id"]
+        
+        table = client.create_table(table)
+        print(f"✓ Created table: {table_id}")
+    
+    return table_id
+
 def run_fraud_training(**context):
     import logging
     logger = logging.getLogger(__name__)
@@ -902,6 +940,27 @@ def run_fraud_training(**context):
     
     trainer.run_training_pipeline()
 
+def prewarm_dashboard_cache(**context):
+    """Ask the dashboard backend to precompute its default payloads for the rebuilt tables"""
+    import requests
+    
+    if not DASHBOARD_API_URL or not PREWARM_TOKEN:
+        print("DASHBOARD_API_URL or PREWARM_TOKEN not set, skipping dashboard cache warm-up")
+        return None
+    
+    headers = {'X-Prewarm-Token': PREWARM_TOKEN}
+    response = requests.post(f"{DASHBOARD_API_URL.rstrip('/')}/api/_prewarm", headers=headers, timeout=600)
+    body = response.json() if response.headers.get('Content-Type', '').startswith('application/json') else {}
+    
+    for path in body.get('warmed', []):
+        print(f"✓ Warmed {path}")
+    for path, error in body.get('errors', {}).items():
+        print(f"✗ {path}: {error}")
+    response.raise_for_status()
+    
+    print(f"✓ Dashboard cache warm for table version {body.get('table_version')}")
+    return body.get('table_version')
+
 # ============================================================================
 # DAG DEFINITION
 # ============================================================================
@@ -1075,6 +1134,11 @@ with DAG(
         }
     )
     
+    create_status_events_table_task = PythonOperator(
+        task_id='create_status_events_table',
+        python_callable=create_status_events_table
+    )
+    
     dbt_run_master_viz = BashOperator(
         task_id='dbt_master_table',
         bash_command=f'export PATH="$PATH:/home/airflow/.local/bin" && cd {DBT_PROJECT_DIR} && dbt run --select master_viz --profiles-dir {DBT_PROFILES_DIR}',
@@ -1086,6 +1150,25 @@ with DAG(
         }
     )
     
+    dbt_run_master_derived = BashOperator(
+        task_id='dbt_master_derived_tables',
+        bash_command=f'export PATH="$PATH:/home/airflow/.local/bin" && cd {DBT_PROJECT_DIR} && dbt run --select dashboard_rollup search_ngrams --profiles-dir {DBT_PROFILES_DIR}',
+        env={
+            'GOOGLE_APPLICATION_CREDENTIALS': '/opt/airflow/config/gcp-key.json',
+            'GCS_PROJECT_ID': GCS_PROJECT_ID or '',
+            'BIGQUERY_DATASET': BIGQUERY_DATASET,
+            'PATH': '/home/airflow/.local/bin:/usr/local/bin:/usr/bin:/bin',
+        }
+    )
+    
+    # ========================================================================
+    # PHASE 7: DASHBOARD CACHE WARM-UP
+    # ========================================================================
+    prewarm_dashboard_cache_task = PythonOperator(
+        task_id='prewarm_dashboard_cache',
+        python_callable=prewarm_dashboard_cache
+    )
+    
     # ========================================================================
     # TASK DEPENDENCIES
     # ========================================================================
@@ -1102,5 +1185,8 @@ with DAG(
     dbt_run_gold >> create_ml_dataset_task >> create_training_metrics_table_task >> delete_predictions_table_task >> create_predictions_table_task >> train_fraud_model_task
     
     # Phase 6: DBT post-training pipeline
-    train_fraud_model_task >> dbt_run_pred_viz >> dbt_run_master_viz
+    train_fraud_model_task >> dbt_run_pred_viz >> create_status_events_table_task >> dbt_run_master_viz >> dbt_run_master_derived
+    
+    # Phase 7: Dashboard cache warm-up once master_viz and its derived tables are rebuilt
+    dbt_run_master_derived >> prewarm_dashboard_cache_task
 